@@ -0,0 +1,223 @@
+"""Initial schema
+
+Tables as previously created by ``Base.metadata.create_all`` on startup. A
+database that was created that way already has them: mark it as migrated with
+``alembic stamp 0001`` and then run ``alembic upgrade head``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-03-10 09:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps(updated: bool = True):
+    columns = [
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+        )
+    ]
+    if updated:
+        columns.append(
+            sa.Column(
+                "updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+            )
+        )
+    return columns
+
+
+def upgrade() -> None:
+    op.create_table(
+        "organizations",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("api_key", sa.String(), nullable=False),
+        sa.Column("config", sa.JSON(), nullable=False, server_default="{}"),
+        *_timestamps(),
+    )
+    op.create_index("ix_organizations_id", "organizations", ["id"], unique=True)
+    op.create_index("ix_organizations_name", "organizations", ["name"], unique=True)
+    op.create_index(
+        "ix_organizations_api_key", "organizations", ["api_key"], unique=True
+    )
+
+    op.create_table(
+        "users",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("first_name", sa.String(), nullable=False),
+        sa.Column("last_name", sa.String(), nullable=False),
+        sa.Column("role", sa.String(), nullable=True),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("is_superuser", sa.Boolean()),
+        sa.Column(
+            "organization_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("organizations.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        *_timestamps(),
+    )
+    op.create_index("ix_users_id", "users", ["id"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "llm_providers",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("api_base_url", sa.String(), nullable=False),
+        sa.Column(
+            "auth_method",
+            sa.Enum("API_KEY", "OAUTH", name="authmethod"),
+            nullable=False,
+        ),
+        sa.Column("config", sa.JSON(), nullable=False, server_default="{}"),
+        sa.Column("is_active", sa.Boolean()),
+        *_timestamps(),
+    )
+    op.create_index("ix_llm_providers_id", "llm_providers", ["id"], unique=True)
+    op.create_index("ix_llm_providers_name", "llm_providers", ["name"], unique=True)
+
+    op.create_table(
+        "teams",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False, unique=True),
+        sa.Column(
+            "organization_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("organizations.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        *_timestamps(),
+    )
+    op.create_index("ix_teams_id", "teams", ["id"], unique=True)
+
+    op.create_table(
+        "team_members",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "team_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("teams.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("role", sa.Enum("ADMIN", "MEMBER", "GUEST", name="teamrole")),
+        *_timestamps(updated=False),
+    )
+    op.create_index("ix_team_members_id", "team_members", ["id"], unique=True)
+
+    op.create_table(
+        "prompts",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("parameters", sa.JSON(), nullable=False, server_default="{}"),
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "organization_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("organizations.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        *_timestamps(),
+    )
+    op.create_index("ix_prompts_id", "prompts", ["id"], unique=True)
+
+    op.create_table(
+        "responses",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("metadata", sa.JSON(), nullable=False, server_default="{}"),
+        sa.Column(
+            "prompt_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("prompts.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "llm_provider_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("llm_providers.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("latency", sa.Float()),
+        sa.Column("time_to_first_token", sa.Float(), nullable=True),
+        sa.Column("token_count", sa.Integer()),
+        sa.Column("is_cached", sa.Boolean()),
+        *_timestamps(),
+    )
+    op.create_index("ix_responses_id", "responses", ["id"], unique=True)
+
+    op.create_table(
+        "feedback",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "response_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("responses.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="SET NULL"),
+        ),
+        sa.Column("rating", sa.Integer(), nullable=False),
+        sa.Column("comment", sa.Text(), nullable=True),
+        *_timestamps(updated=False),
+    )
+    op.create_index("ix_feedback_id", "feedback", ["id"])
+
+    op.create_table(
+        "workflows",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+        ),
+        sa.Column("steps", sa.JSON(), nullable=False),
+        *_timestamps(updated=False),
+    )
+    op.create_index("ix_workflows_id", "workflows", ["id"])
+
+
+def downgrade() -> None:
+    for table in (
+        "workflows",
+        "feedback",
+        "responses",
+        "prompts",
+        "team_members",
+        "teams",
+        "llm_providers",
+        "users",
+        "organizations",
+    ):
+        op.drop_table(table)
+    sa.Enum(name="teamrole").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="authmethod").drop(op.get_bind(), checkfirst=True)
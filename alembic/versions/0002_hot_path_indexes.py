@@ -0,0 +1,69 @@
+"""Composite indexes for the listing, lookup and analytics queries
+
+Built with CREATE INDEX CONCURRENTLY so a live database keeps accepting
+writes. CONCURRENTLY cannot run inside a transaction, hence the autocommit
+block; IF NOT EXISTS makes a re-run after an interrupted build (or on a
+database that create_all already indexed) a no-op for finished indexes.
+
+An interrupted concurrent build can leave an INVALID index behind; drop it
+(``DROP INDEX CONCURRENTLY <name>``) before upgrading again.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-03-10 09:30:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns)
+INDEXES = [
+    # GET /prompts keyset pages per user / organization
+    ("ix_prompts_user_id_created_at_id", "prompts", ["user_id", "created_at", "id"]),
+    (
+        "ix_prompts_organization_id_created_at_id",
+        "prompts",
+        ["organization_id", "created_at", "id"],
+    ),
+    ("ix_prompts_created_at", "prompts", ["created_at"]),
+    # Latest response per prompt, per-prompt counts, prompt -> response joins
+    ("ix_responses_prompt_id_created_at", "responses", ["prompt_id", "created_at"]),
+    # Per-provider usage over a time range
+    (
+        "ix_responses_llm_provider_id_created_at",
+        "responses",
+        ["llm_provider_id", "created_at"],
+    ),
+    ("ix_responses_created_at", "responses", ["created_at"]),
+    # Organization usage reports join users on organization_id
+    ("ix_users_organization_id", "users", ["organization_id"]),
+    ("ix_feedback_response_id", "feedback", ["response_id"]),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,198 @@
+"""Partition prompts and responses by month on created_at
+
+Each table is rebuilt as a declaratively range-partitioned table:
+
+1. the old table is renamed to ``<table>_unpartitioned``;
+2. a partitioned table with the same columns is created; its primary key
+   becomes (id, created_at), since unique constraints on a partitioned table
+   must include the partition key;
+3. one partition per month from the oldest row to three months ahead is
+   created, and the rows are copied over;
+4. the old table is dropped and the indexes are rebuilt on the new one.
+
+Foreign keys that point *at* these tables (responses.prompt_id and
+feedback.response_id) cannot be kept, because id alone is no longer unique
+at the database level. Future partitions are created by the app on startup
+and by ``python -m app.cli partitions ensure``; see app/db/partitions.py.
+
+The copy rewrites both tables in one transaction, so run this in a
+maintenance window on large databases.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-03-24 09:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+# table -> (foreign keys from the table, indexes to rebuild)
+TABLES = {
+    "prompts": (
+        [
+            ("user_id", "users", "CASCADE"),
+            ("organization_id", "organizations", "CASCADE"),
+        ],
+        [
+            ("ix_prompts_user_id_created_at_id", ["user_id", "created_at", "id"]),
+            (
+                "ix_prompts_organization_id_created_at_id",
+                ["organization_id", "created_at", "id"],
+            ),
+            ("ix_prompts_created_at", ["created_at"]),
+        ],
+    ),
+    "responses": (
+        [("llm_provider_id", "llm_providers", "SET NULL")],
+        [
+            ("ix_responses_prompt_id_created_at", ["prompt_id", "created_at"]),
+            (
+                "ix_responses_llm_provider_id_created_at",
+                ["llm_provider_id", "created_at"],
+            ),
+            ("ix_responses_created_at", ["created_at"]),
+        ],
+    ),
+}
+
+
+def _create_monthly_partitions(table: str, source: str) -> None:
+    # Months are UTC calendar months; partitions are named <table>_pYYYY_MM.
+    op.execute(f"""
+        DO $$
+        DECLARE
+            first_month timestamp;
+            last_month timestamp;
+            month timestamp;
+        BEGIN
+            SELECT date_trunc('month', COALESCE(min(created_at), now()) AT TIME ZONE 'UTC'),
+                   date_trunc('month', GREATEST(max(created_at), now()) AT TIME ZONE 'UTC')
+              INTO first_month, last_month
+              FROM {source};
+            month := first_month;
+            WHILE month <= last_month + interval '{MONTHS_AHEAD} months' LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+                    '{table}_p' || to_char(month, 'YYYY_MM'),
+                    month AT TIME ZONE 'UTC',
+                    (month + interval '1 month') AT TIME ZONE 'UTC'
+                );
+                month := month + interval '1 month';
+            END LOOP;
+        END $$;
+        """)
+
+
+def _partition(table: str) -> None:
+    foreign_keys, indexes = TABLES[table]
+    old = f"{table}_unpartitioned"
+
+    op.rename_table(table, old)
+    op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey")
+    op.drop_index(f"ix_{table}_id", table_name=old, if_exists=True)
+    for name, _ in indexes:
+        op.drop_index(name, table_name=old, if_exists=True)
+
+    op.execute(
+        f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)"
+        " PARTITION BY RANGE (created_at)"
+    )
+    op.execute(f"ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL")
+    op.create_primary_key(f"{table}_pkey", table, ["id", "created_at"])
+    for column, referred, ondelete in foreign_keys:
+        op.create_foreign_key(
+            f"{table}_{column}_fkey",
+            table,
+            referred,
+            [column],
+            ["id"],
+            ondelete=ondelete,
+        )
+
+    _create_monthly_partitions(table, old)
+    op.execute(
+        f"UPDATE {old} SET created_at = COALESCE(updated_at, now())"
+        " WHERE created_at IS NULL"
+    )
+    op.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+    op.drop_table(old)
+
+    for name, columns in indexes:
+        op.create_index(name, table, columns)
+
+
+def upgrade() -> None:
+    op.drop_constraint("feedback_response_id_fkey", "feedback", type_="foreignkey")
+    op.drop_constraint("responses_prompt_id_fkey", "responses", type_="foreignkey")
+    _partition("prompts")
+    _partition("responses")
+    op.execute("ANALYZE prompts")
+    op.execute("ANALYZE responses")
+
+
+def _unpartition(table: str) -> None:
+    foreign_keys, indexes = TABLES[table]
+    old = f"{table}_partitioned"
+
+    op.rename_table(table, old)
+    op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey")
+    for name, _ in indexes:
+        op.drop_index(name, table_name=old)
+
+    op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)")
+    op.create_primary_key(f"{table}_pkey", table, ["id"])
+    op.execute(f"ALTER TABLE {table} ALTER COLUMN created_at DROP NOT NULL")
+    for column, referred, ondelete in foreign_keys:
+        op.create_foreign_key(
+            f"{table}_{column}_fkey",
+            table,
+            referred,
+            [column],
+            ["id"],
+            ondelete=ondelete,
+        )
+    op.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+    op.drop_table(old)  # Drops its partitions too
+
+    op.create_index(f"ix_{table}_id", table, ["id"], unique=True)
+    for name, columns in indexes:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    _unpartition("prompts")
+    _unpartition("responses")
+    op.execute(
+        "DELETE FROM responses WHERE NOT EXISTS"
+        " (SELECT 1 FROM prompts WHERE prompts.id = responses.prompt_id)"
+    )
+    op.execute(
+        "DELETE FROM feedback WHERE NOT EXISTS"
+        " (SELECT 1 FROM responses WHERE responses.id = feedback.response_id)"
+    )
+    op.create_foreign_key(
+        "responses_prompt_id_fkey",
+        "responses",
+        "prompts",
+        ["prompt_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.create_foreign_key(
+        "feedback_response_id_fkey",
+        "feedback",
+        "responses",
+        ["response_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
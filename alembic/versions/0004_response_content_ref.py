@@ -0,0 +1,35 @@
+"""Allow response bodies to live in the blob store
+
+Adds responses.content_ref and makes responses.content nullable: a row whose
+body was offloaded (see app/db/blob_store.py) keeps NULL content and a
+"zstd:<sha256>" reference. Both changes only touch the catalog, so they are
+cheap on the partitioned table.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-03-24 11:00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("responses", sa.Column("content_ref", sa.String(80), nullable=True))
+    op.alter_column("responses", "content", existing_type=sa.Text(), nullable=True)
+
+
+def downgrade() -> None:
+    # Offloaded bodies must be brought back inline first:
+    # python -m app.cli responses inline
+    op.alter_column("responses", "content", existing_type=sa.Text(), nullable=False)
+    op.drop_column("responses", "content_ref")
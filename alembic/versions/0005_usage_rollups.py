@@ -0,0 +1,49 @@
+"""Hourly and daily usage rollup tables
+
+The app adds to these as it stores responses. Fill them for the history
+that is already there with ``python -m app.cli rollups rebuild``.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-04-07 09:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("usage_rollups_hourly", "usage_rollups_daily")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.create_table(
+            table,
+            sa.Column("bucket", sa.DateTime(timezone=True), primary_key=True),
+            sa.Column(
+                "organization_id", postgresql.UUID(as_uuid=True), primary_key=True
+            ),
+            sa.Column("user_id", postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column(
+                "llm_provider_id", postgresql.UUID(as_uuid=True), primary_key=True
+            ),
+            sa.Column("model", sa.String(), primary_key=True),
+            sa.Column("prompt_count", sa.BigInteger(), nullable=False),
+            sa.Column("cached_count", sa.BigInteger(), nullable=False),
+            sa.Column("token_count", sa.BigInteger(), nullable=False),
+            sa.Column("latency_sum", sa.Float(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_table(table)
@@ -0,0 +1,41 @@
+"""Per-worker latency sketches per time bucket, provider and model
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-04-08 09:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "latency_sketches",
+        sa.Column("bucket", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("llm_provider", sa.String(), primary_key=True),
+        sa.Column("model", sa.String(), primary_key=True),
+        sa.Column("worker_id", sa.String(length=100), primary_key=True),
+        sa.Column("sample_count", sa.BigInteger(), nullable=False),
+        sa.Column("error_count", sa.BigInteger(), nullable=False),
+        sa.Column("sketch", sa.JSON(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=True,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("latency_sketches")
@@ -0,0 +1,92 @@
+"""Materialized views for the heavier analytics reports
+
+Built from the usage rollups and latency sketches, and refreshed with
+REFRESH MATERIALIZED VIEW CONCURRENTLY by the app (see
+app/db/materialized_views.py), which needs a unique index on each view.
+The views are populated here; that only reads the rollup tables.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-04-09 09:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, query, unique key)
+VIEWS = [
+    # Daily prompts and tokens per organization
+    (
+        "mv_organization_daily_usage",
+        """
+        SELECT bucket AS day,
+               organization_id,
+               sum(prompt_count) AS prompt_count,
+               sum(cached_count) AS cached_count,
+               sum(token_count) AS token_count
+        FROM usage_rollups_daily
+        GROUP BY bucket, organization_id
+        """,
+        ["day", "organization_id"],
+    ),
+    # Daily successful and failed upstream calls per provider and model
+    (
+        "mv_provider_daily_errors",
+        """
+        SELECT date_trunc('day', bucket, 'UTC') AS day,
+               llm_provider,
+               model,
+               sum(sample_count) AS success_count,
+               sum(error_count) AS error_count
+        FROM latency_sketches
+        GROUP BY date_trunc('day', bucket, 'UTC'), llm_provider, model
+        """,
+        ["day", "llm_provider", "model"],
+    ),
+    # Daily usage of each team's current members
+    (
+        "mv_team_daily_usage",
+        """
+        SELECT r.bucket AS day,
+               t.organization_id,
+               m.team_id,
+               sum(r.prompt_count) AS prompt_count,
+               sum(r.token_count) AS token_count
+        FROM usage_rollups_daily r
+        JOIN team_members m ON m.user_id = r.user_id
+        JOIN teams t ON t.id = m.team_id
+        GROUP BY r.bucket, t.organization_id, m.team_id
+        """,
+        ["day", "team_id"],
+    ),
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "materialized_view_refreshes",
+        sa.Column("view_name", sa.String(), primary_key=True),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("duration_seconds", sa.Float(), nullable=False),
+    )
+    for name, query, key in VIEWS:
+        op.execute(f"CREATE MATERIALIZED VIEW {name} AS {query.strip()}")
+        op.create_index(f"ux_{name}", name, key, unique=True)
+        op.execute(
+            "INSERT INTO materialized_view_refreshes " f"VALUES ('{name}', now(), 0)"
+        )
+
+
+def downgrade() -> None:
+    for name, _, _ in reversed(VIEWS):
+        op.execute(f"DROP MATERIALIZED VIEW {name}")
+    op.drop_table("materialized_view_refreshes")
@@ -0,0 +1,303 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from typing import Callable, List, Literal, Optional
+from uuid import UUID
+
+from app.db.session import get_read_db, read_session_factory
+from app.core.security import get_current_user
+from app.models.user import User
+from app.schemas.analytics import (
+    LatencyPercentiles,
+    OrganizationDailyUsageReport,
+    OrganizationUsage,
+    ProviderErrorReport,
+    TeamUsageReport,
+    UserPromptCount,
+    UserUsage,
+)
+from app.services.analytics_cache import analytics_cache
+from app.services.analytics_service import AnalyticsService
+from app.services import export
+
+router = APIRouter()
+
+
+def _window(start: Optional[datetime], end: Optional[datetime]):
+    """Normalize the report window to UTC; naive times are taken as UTC."""
+    start, end = (
+        None if t is None else t.replace(tzinfo=t.tzinfo or timezone.utc)
+        for t in (start, end)
+    )
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end",
+        )
+    return start, end
+
+
+def _organization(current_user: User, organization_id: Optional[UUID]):
+    """
+    Organization a report is limited to.
+
+    Superusers may ask for any organization, or all of them; everyone else
+    only sees their own.
+    """
+    if current_user.is_superuser:
+        return organization_id
+    if current_user.organization_id is None or organization_id not in (
+        None,
+        current_user.organization_id,
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    return current_user.organization_id
+
+
+def _in_session(session_factory: sessionmaker, report: Callable, **kwargs):
+    """
+    Run a cached report in a session of its own. The computation is shared
+    by concurrent callers and outlives the request that started it, which
+    closes its dependency session when it disconnects.
+    """
+    with session_factory() as db:
+        return report(db, **kwargs)
+
+
+@router.get("/usage", response_model=List[UserUsage])
+async def usage_report(
+    *,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    organization_id: Optional[UUID] = None,
+):
+    """
+    Prompt and token usage per user in [start, end)
+    """
+    start, end = _window(start, end)
+    organization_id = _organization(current_user, organization_id)
+    session_factory = read_session_factory(request)
+    return await analytics_cache.get_or_compute(
+        "usage",
+        organization_id,
+        end,
+        start,
+        lambda: run_in_threadpool(
+            _in_session,
+            session_factory,
+            AnalyticsService.generate_usage_report,
+            since=start,
+            until=end,
+            organization_id=organization_id,
+        ),
+    )
+
+
+@router.get("/top-users", response_model=List[UserPromptCount])
+async def top_users(
+    *,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    organization_id: Optional[UUID] = None,
+    limit: int = Query(5, ge=1, le=100),
+):
+    """
+    Users with the most prompts answered in [start, end)
+    """
+    start, end = _window(start, end)
+    organization_id = _organization(current_user, organization_id)
+    session_factory = read_session_factory(request)
+    return await analytics_cache.get_or_compute(
+        "top-users",
+        organization_id,
+        end,
+        (start, limit),
+        lambda: run_in_threadpool(
+            _in_session,
+            session_factory,
+            AnalyticsService.get_top_users_by_prompt_count,
+            limit=limit,
+            since=start,
+            until=end,
+            organization_id=organization_id,
+        ),
+    )
+
+
+@router.get("/organizations", response_model=List[OrganizationUsage])
+async def organization_usage(
+    *,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    organization_id: Optional[UUID] = None,
+):
+    """
+    Prompt and token usage per organization in [start, end)
+    """
+    start, end = _window(start, end)
+    organization_id = _organization(current_user, organization_id)
+    session_factory = read_session_factory(request)
+    return await analytics_cache.get_or_compute(
+        "organizations",
+        organization_id,
+        end,
+        start,
+        lambda: run_in_threadpool(
+            _in_session,
+            session_factory,
+            AnalyticsService.get_token_usage_by_organization,
+            since=start,
+            until=end,
+            organization_id=organization_id,
+        ),
+    )
+
+
+@router.get("/organizations/daily", response_model=OrganizationDailyUsageReport)
+async def organization_daily_usage(
+    *,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    organization_id: Optional[UUID] = None,
+):
+    """
+    Prompt and token usage per organization and UTC day, as of the last view
+    refresh
+    """
+    start, end = _window(start, end)
+    organization_id = _organization(current_user, organization_id)
+    return await run_in_threadpool(
+        AnalyticsService.get_daily_usage_by_organization,
+        db,
+        since=start,
+        until=end,
+        organization_id=organization_id,
+    )
+
+
+@router.get("/providers/errors", response_model=ProviderErrorReport)
+async def provider_error_rates(
+    *,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """
+    Upstream error rate per provider and model, as of the last view refresh
+    """
+    start, end = _window(start, end)
+    return await run_in_threadpool(
+        AnalyticsService.get_provider_error_rates, db, since=start, until=end
+    )
+
+
+@router.get("/teams", response_model=TeamUsageReport)
+async def team_usage(
+    *,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    organization_id: Optional[UUID] = None,
+):
+    """
+    Prompt and token usage per team, as of the last view refresh
+    """
+    start, end = _window(start, end)
+    organization_id = _organization(current_user, organization_id)
+    return await run_in_threadpool(
+        AnalyticsService.get_usage_by_team,
+        db,
+        since=start,
+        until=end,
+        organization_id=organization_id,
+    )
+
+
+@router.get("/latency", response_model=List[LatencyPercentiles])
+async def latency_percentiles(
+    *,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    llm_provider: Optional[str] = None,
+    model: Optional[str] = None,
+):
+    """
+    Upstream latency percentiles and error counts per provider and model
+    in [start, end)
+    """
+    start, end = _window(start, end)
+    session_factory = read_session_factory(request)
+    return await analytics_cache.get_or_compute(
+        "latency",
+        None,
+        end,
+        (start, llm_provider, model),
+        lambda: run_in_threadpool(
+            _in_session,
+            session_factory,
+            AnalyticsService.get_latency_percentiles,
+            since=start,
+            until=end,
+            llm_provider=llm_provider,
+            model=model,
+        ),
+    )
+
+
+@router.get("/export")
+async def export_responses(
+    *,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    organization_id: Optional[UUID] = None,
+    format: Literal["parquet", "arrow"] = "parquet",
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
+):
+    """
+    Stream responses and their prompts in [start, end) as Parquet or an Arrow
+    IPC stream
+    """
+    start, end = _window(start, end)
+    organization_id = _organization(current_user, organization_id)
+    try:
+        export_schema = export.schema(columns.split(",") if columns else None)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    # Dependency sessions are closed before a streamed body is sent
+    session_factory = read_session_factory(request)
+
+    def body():
+        with session_factory() as db:
+            yield from export.stream(
+                export.record_batches(
+                    db, export_schema.names, organization_id, start, end
+                ),
+                export_schema,
+                format,
+            )
+
+    filename = f"responses.{'parquet' if format == 'parquet' else 'arrows'}"
+    return StreamingResponse(
+        body(),
+        media_type=export.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
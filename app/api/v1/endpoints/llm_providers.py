@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Any, Dict, List
 from uuid import UUID
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models.user import User
 from app.schemas.llm_provider import LLMProviderCreate, LLMProviderResponse
 from app.db.crud.llm_provider import (
@@ -12,6 +12,7 @@ from app.db.crud.llm_provider import (
     list_llm_providers,
 )
 from app.core.security import get_current_user
+from app.services.llm_service import llm_service
 
 router = APIRouter()
 
@@ -28,8 +29,50 @@ async def create_new_llm_provider(
     return create_llm_provider(db=db, llm_in=llm_in)
 
 
+@router.get("/pool-stats", response_model=Dict[str, Dict[str, int]])
+async def get_http_pool_stats(*, current_user: User = Depends(get_current_user)):
+    """
+    Connection pool usage of the shared HTTP client for each provider
+    """
+    return llm_service.pool_stats()
+
+
+@router.get("/cache-stats", response_model=Dict[str, Any])
+async def get_response_cache_stats(*, current_user: User = Depends(get_current_user)):
+    """
+    Hit/miss counters of the exact and near-duplicate response caches
+    """
+    return llm_service.cache_stats()
+
+
+@router.get("/routing-stats", response_model=List[Dict[str, Any]])
+async def get_routing_stats(*, current_user: User = Depends(get_current_user)):
+    """
+    Rolling latency percentiles and error rates used for provider routing
+    """
+    return llm_service.routing_stats()
+
+
+@router.get("/rate-limits", response_model=List[Dict[str, Any]])
+async def get_rate_limit_stats(*, current_user: User = Depends(get_current_user)):
+    """
+    Concurrency slots in use, queued callers and current adaptive rates
+    """
+    return llm_service.rate_limit_stats()
+
+
+@router.get("/circuit-breakers", response_model=List[Dict[str, Any]])
+async def get_circuit_breakers(*, current_user: User = Depends(get_current_user)):
+    """
+    Circuit breaker state (closed/open/half_open) for each provider
+    """
+    return llm_service.circuit_breaker_stats()
+
+
 @router.get("/{provider_id}", response_model=LLMProviderResponse)
-async def get_llm_provider_by_id(*, db: Session = Depends(get_db), provider_id: UUID):
+async def get_llm_provider_by_id(
+    *, db: Session = Depends(get_read_db), provider_id: UUID
+):
     """
     Get an LLM provider by ID
     """
@@ -43,7 +86,9 @@ async def get_llm_provider_by_id(*, db: Session = Depends(get_db), provider_id:
 
 @router.get("/", response_model=List[LLMProviderResponse])
 async def list_llm_providers(
-    *, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+    *,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
 ):
     """
     List available LLM providers
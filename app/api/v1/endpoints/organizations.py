@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models.user import User
 from app.schemas.organization import OrganizationCreate, OrganizationResponse
 from app.db.crud.organization import (
@@ -30,7 +30,7 @@ async def create_new_organization(
 
 
 @router.get("/{org_id}", response_model=OrganizationResponse)
-async def get_organization_by_id(*, db: Session = Depends(get_db), org_id: UUID):
+async def get_organization_by_id(*, db: Session = Depends(get_read_db), org_id: UUID):
     """
     Get an organization by ID
     """
@@ -44,7 +44,9 @@ async def get_organization_by_id(*, db: Session = Depends(get_db), org_id: UUID)
 
 @router.get("/", response_model=List[OrganizationResponse])
 async def get_all_organizations(
-    *, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+    *,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
 ):
     """
     List all organizations (admin only)
@@ -1,28 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+import json
+import logging
 import uuid
 
-from app.db.session import get_db
+from app.config import settings
+from app.db.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.db.session import AsyncSessionLocal, get_async_db, get_async_read_db
 from app.core.security import get_current_user
 from app.models.user import User
-from app.schemas.prompt import PromptCreate, PromptResponse, PromptList
+from app.schemas.prompt import (
+    FanOutMode,
+    PromptBatchCreate,
+    PromptBatchResponse,
+    PromptCreate,
+    PromptFanOutCreate,
+    PromptFanOutResponse,
+    PromptList,
+    PromptResponse,
+    PromptRouteCreate,
+    PromptRouteResponse,
+)
 from app.schemas.response import ResponseCreate, ResponseRead
 from app.db.crud.prompt import (
     create_prompt,
-    get_prompt,
+    get_prompt_with_latest_response,
     get_prompts_by_user,
     get_prompts_by_organization,
 )
 from app.services.llm_service import llm_service
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a single Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
 @router.post("/", response_model=PromptResponse, status_code=status.HTTP_201_CREATED)
 async def submit_prompt(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
     prompt_in: PromptCreate,
 ):
@@ -30,7 +53,7 @@ async def submit_prompt(
     Submit a prompt to an LLM provider and get a response
     """
     # Create prompt record
-    prompt = create_prompt(
+    prompt = await create_prompt(
         db=db,
         content=prompt_in.content,
         parameters=prompt_in.parameters,
@@ -38,41 +61,280 @@ async def submit_prompt(
         organization_id=current_user.organization_id,
     )
 
-    # Process the prompt with the specified LLM provider
-    response = await llm_service.process_prompt(
+    # Process the prompt with the specified LLM provider, or its fallbacks
+    response, provider_name = await llm_service.process_prompt_with_fallback(
         db=db,
         prompt=prompt,
         provider_name=prompt_in.llm_provider,
         parameters=prompt_in.parameters,
+        fallback_providers=prompt_in.fallback_providers,
+    )
+
+    return {
+        "prompt_id": str(prompt.id),
+        "prompt_content": prompt.content,
+        "response_id": str(response.id),
+        "response_content": response.content,
+        "llm_provider": provider_name,
+        "latency": response.latency,
+        "token_count": response.token_count,
+        "created_at": prompt.created_at,
+    }
+
+
+def _fan_out_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten one provider's fan-out outcome for the API response."""
+    response = result["response"]
+    if response is None:
+        return {"llm_provider": result["llm_provider"], "error": result["error"]}
+    return {
+        "llm_provider": result["llm_provider"],
+        "response_id": response.id,
+        "response_content": response.content,
+        "latency": response.latency,
+        "token_count": response.token_count,
+    }
+
+
+@router.post(
+    "/fan-out",
+    response_model=PromptFanOutResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def submit_fan_out_prompt(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    prompt_in: PromptFanOutCreate,
+):
+    """
+    Send one prompt to several LLM providers concurrently.
+
+    In ``first`` mode the first successful provider wins and the others are
+    cancelled; in ``all`` mode every provider answering before the deadline
+    is returned for comparison.
+    """
+    if not prompt_in.llm_providers:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one LLM provider is required",
+        )
+
+    prompt = await create_prompt(
+        db=db,
+        content=prompt_in.content,
+        parameters=prompt_in.parameters,
+        user_id=current_user.id,
+        organization_id=current_user.organization_id,
+    )
+
+    results = await llm_service.fan_out_prompt(
+        db=db,
+        prompt=prompt,
+        provider_names=prompt_in.llm_providers,
+        parameters=prompt_in.parameters,
+        first_wins=prompt_in.mode == FanOutMode.FIRST,
+        timeout=prompt_in.timeout or settings.LLM_FAN_OUT_TIMEOUT,
+    )
+
+    return {
+        "prompt_id": prompt.id,
+        "prompt_content": prompt.content,
+        "mode": prompt_in.mode,
+        "results": [_fan_out_result(result) for result in results],
+        "created_at": prompt.created_at,
+    }
+
+
+def _batch_result(index: int, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten one batch item's outcome for the API response."""
+    item = {
+        "index": index,
+        "prompt_id": result["prompt"].id,
+        "llm_provider": result["llm_provider"],
+    }
+    response = result["response"]
+    if response is None:
+        return {**item, "error": result["error"]}
+    return {
+        **item,
+        "response_id": response.id,
+        "response_content": response.content,
+        "latency": response.latency,
+        "token_count": response.token_count,
+    }
+
+
+@router.post(
+    "/batch",
+    response_model=PromptBatchResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def submit_prompt_batch(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    batch_in: PromptBatchCreate,
+):
+    """
+    Submit many prompts at once.
+
+    Prompts run concurrently (bounded by ``max_concurrency``) and are stored
+    in a single transaction. Items fail independently: each result carries
+    either its response or an error.
+    """
+    if not batch_in.items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one prompt is required",
+        )
+    if len(batch_in.items) > settings.LLM_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can hold at most {settings.LLM_BATCH_MAX_ITEMS} prompts",
+        )
+
+    max_concurrency = min(
+        batch_in.max_concurrency or settings.LLM_BATCH_MAX_CONCURRENCY,
+        settings.LLM_BATCH_MAX_CONCURRENCY,
+    )
+    results = await llm_service.process_prompt_batch(
+        db=db,
+        items=[item.dict() for item in batch_in.items],
+        user_id=current_user.id,
+        organization_id=current_user.organization_id,
+        max_concurrency=max(1, max_concurrency),
+    )
+
+    failed = sum(1 for result in results if result["response"] is None)
+    return {
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "results": [_batch_result(i, result) for i, result in enumerate(results)],
+    }
+
+
+@router.post(
+    "/route", response_model=PromptRouteResponse, status_code=status.HTTP_201_CREATED
+)
+async def submit_routed_prompt(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    prompt_in: PromptRouteCreate,
+):
+    """
+    Submit a prompt to the currently fastest healthy provider in a pool,
+    optionally hedging slow requests with the runner-up
+    """
+    if not prompt_in.llm_providers:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one LLM provider is required",
+        )
+
+    prompt = await create_prompt(
+        db=db,
+        content=prompt_in.content,
+        parameters=prompt_in.parameters,
+        user_id=current_user.id,
+        organization_id=current_user.organization_id,
+    )
+
+    response, provider_name = await llm_service.route_prompt(
+        db=db,
+        prompt=prompt,
+        provider_pool=prompt_in.llm_providers,
+        parameters=prompt_in.parameters,
+        hedge=prompt_in.hedge,
     )
 
     return {
-        "prompt_id": str(prompt.uuid),
+        "prompt_id": prompt.id,
         "prompt_content": prompt.content,
-        "response_id": str(response.uuid),
+        "response_id": response.id,
         "response_content": response.content,
-        "llm_provider": prompt_in.llm_provider,
+        "llm_provider": provider_name,
         "latency": response.latency,
         "token_count": response.token_count,
         "created_at": prompt.created_at,
     }
 
 
+@router.post("/stream")
+async def stream_prompt(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    prompt_in: PromptCreate,
+):
+    """
+    Submit a prompt and stream the LLM's reply back as Server-Sent Events
+    """
+    prompt = await create_prompt(
+        db=db,
+        content=prompt_in.content,
+        parameters=prompt_in.parameters,
+        user_id=current_user.id,
+        organization_id=current_user.organization_id,
+    )
+
+    async def event_stream():
+        # The request-scoped session is closed before the body is sent, so
+        # the streamed response is persisted through its own session.
+        stream_db = AsyncSessionLocal()
+        try:
+            yield _sse_event("prompt", {"prompt_id": str(prompt.id)})
+            async for event in llm_service.stream_prompt(
+                db=stream_db,
+                prompt=prompt,
+                provider_name=prompt_in.llm_provider,
+                parameters=prompt_in.parameters,
+            ):
+                if event["event"] == "delta":
+                    yield _sse_event("delta", {"text": event["text"]})
+                    continue
+
+                response = event["response"]
+                yield _sse_event(
+                    "done",
+                    {
+                        "response_id": str(response.id),
+                        "llm_provider": prompt_in.llm_provider,
+                        "latency": response.latency,
+                        "time_to_first_token": response.time_to_first_token,
+                        "token_count": response.token_count,
+                    },
+                )
+        except Exception as e:
+            logger.error(f"Streaming prompt {prompt.id} failed: {str(e)}")
+            yield _sse_event("error", {"detail": "LLM provider request failed"})
+        finally:
+            await stream_db.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{prompt_id}", response_model=PromptResponse)
 async def get_prompt_with_responses(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
-    prompt_id: str,
+    prompt_id: uuid.UUID,
 ):
     """
-    Get a specific prompt and its responses
+    Get a specific prompt and its latest response
     """
-    prompt = get_prompt(db, uuid=prompt_id)
-    if not prompt:
+    found = await get_prompt_with_latest_response(db, uuid=prompt_id)
+    if not found:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Prompt not found"
         )
+    prompt, response, provider_name = found
 
     # Check if user has access to this prompt
     if prompt.user_id != current_user.id and not current_user.is_superuser:
@@ -82,12 +344,9 @@ async def get_prompt_with_responses(
                 detail="Not enough permissions to access this prompt",
             )
 
-    # Get the latest response
-    response = prompt.responses[0] if prompt.responses else None
-
     if not response:
         return {
-            "prompt_id": str(prompt.uuid),
+            "prompt_id": str(prompt.id),
             "prompt_content": prompt.content,
             "response_id": None,
             "response_content": None,
@@ -98,11 +357,11 @@ async def get_prompt_with_responses(
         }
 
     return {
-        "prompt_id": str(prompt.uuid),
+        "prompt_id": str(prompt.id),
         "prompt_content": prompt.content,
-        "response_id": str(response.uuid),
+        "response_id": str(response.id),
         "response_content": response.content,
-        "llm_provider": response.llm_provider.name,
+        "llm_provider": provider_name,
         "latency": response.latency,
         "token_count": response.token_count,
         "created_at": prompt.created_at,
@@ -112,30 +371,41 @@ async def get_prompt_with_responses(
 @router.get("/", response_model=List[PromptList])
 async def list_prompts(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     org_only: bool = False,
 ):
     """
-    List prompts for the current user or organization
+    List prompts for the current user or organization, newest first.
+
+    Pass the X-Next-Cursor header of one page as ``cursor`` to get the next;
+    the header is absent on the last page.
     """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     if org_only and not current_user.is_superuser:
-        prompts = get_prompts_by_organization(
-            db, organization_id=current_user.organization_id, skip=skip, limit=limit
+        rows, next_key = await get_prompts_by_organization(
+            db, organization_id=current_user.organization_id, limit=limit, after=after
         )
     else:
-        prompts = get_prompts_by_user(
-            db, user_id=current_user.id, skip=skip, limit=limit
+        rows, next_key = await get_prompts_by_user(
+            db, user_id=current_user.id, limit=limit, after=after
         )
 
+    if next_key is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(*next_key)
     return [
         {
-            "prompt_id": str(p.uuid),
+            "id": p.id,
             "content": p.content[:100] + "..." if len(p.content) > 100 else p.content,
             "created_at": p.created_at,
-            "response_count": len(p.responses),
+            "response_count": response_count,
         }
-        for p in prompts
+        for p, response_count in rows
     ]
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 
-from app.db.session import get_db
+from app.db.session import get_async_read_db
 from app.schemas.response import ResponseResponse
 from app.db.crud.response import get_response
 
@@ -11,11 +11,13 @@ router = APIRouter()
 
 
 @router.get("/{response_id}", response_model=ResponseResponse)
-async def get_response_by_id(*, db: Session = Depends(get_db), response_id: UUID):
+async def get_response_by_id(
+    *, db: AsyncSession = Depends(get_async_read_db), response_id: UUID
+):
     """
     Get a response by ID
     """
-    response = get_response(db, response_id=response_id)
+    response = await get_response(db, response_id=response_id)
     if not response:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Response not found"
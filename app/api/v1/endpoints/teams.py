@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.schemas.team import TeamCreate, TeamResponse
@@ -33,7 +33,7 @@ async def create_new_team(
 
 
 @router.get("/{team_id}", response_model=TeamResponse)
-async def get_team_by_id(*, db: Session = Depends(get_db), team_id: UUID):
+async def get_team_by_id(*, db: Session = Depends(get_read_db), team_id: UUID):
     """
     Get a team by ID
     """
@@ -47,7 +47,9 @@ async def get_team_by_id(*, db: Session = Depends(get_db), team_id: UUID):
 
 @router.get("/", response_model=List[TeamResponse])
 async def list_teams(
-    *, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+    *,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
 ):
     """
     List teams within the current user's organization
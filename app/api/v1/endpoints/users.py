@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse
@@ -28,7 +28,7 @@ async def create_new_user(*, db: Session = Depends(get_db), user_in: UserCreate)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user_by_id(*, db: Session = Depends(get_db), user_id: UUID):
+async def get_user_by_id(*, db: Session = Depends(get_read_db), user_id: UUID):
     """
     Get a user by ID
     """
@@ -42,7 +42,9 @@ async def get_user_by_id(*, db: Session = Depends(get_db), user_id: UUID):
 
 @router.get("/", response_model=List[UserResponse])
 async def list_users(
-    *, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+    *,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
 ):
     """
     List users in the current user's organization
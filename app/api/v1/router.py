@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
 from app.api.v1.endpoints import (
+    analytics,
     auth,
     users,
     organizations,
@@ -22,3 +23,4 @@ api_router.include_router(responses.router, prefix="/responses", tags=["response
 api_router.include_router(
     llm_providers.router, prefix="/llm-providers", tags=["llm-providers"]
 )
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
@@ -0,0 +1,257 @@
+"""
+Maintenance commands, run from the project root:
+
+    python -m app.cli partitions list
+    python -m app.cli partitions ensure --months-ahead 3
+    python -m app.cli partitions retention --keep-months 12 --action archive
+    python -m app.cli responses offload
+    python -m app.cli rollups rebuild --since 2025-01-01
+    python -m app.cli export responses.parquet --since 2025-01-01
+    python -m app.cli views refresh
+"""
+
+import logging
+from datetime import timezone
+
+import click
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.blob_store import response_bodies
+from app.db.materialized_views import (
+    VIEWS,
+    MaterializedViewRefresher,
+    refresh_intervals,
+    refresh_timeouts,
+)
+from app.db.partitions import PARTITIONED_TABLES, RETENTION_ACTIONS, PartitionManager
+from app.db.session import engine
+from app.models.response import Response
+from app.services import export, usage_rollups
+
+
+@click.group()
+def cli():
+    """Outside Insights API maintenance commands."""
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+
+@cli.group()
+def partitions():
+    """Monthly partitions of the prompts and responses tables."""
+
+
+@partitions.command("list")
+def list_partitions():
+    """Show the partitions of each partitioned table."""
+    manager = PartitionManager(engine)
+    for table in PARTITIONED_TABLES:
+        names = manager.list_partitions(table)
+        click.echo(f"{table}: {', '.join(names) if names else '(none)'}")
+
+
+@partitions.command("ensure")
+@click.option(
+    "--months-ahead",
+    default=settings.PARTITION_MONTHS_AHEAD,
+    show_default=True,
+    help="Months of partitions to create beyond the current one.",
+)
+def ensure_partitions(months_ahead: int):
+    """Create missing partitions for this month and the coming ones."""
+    created = PartitionManager(engine).ensure_partitions(months_ahead)
+    click.echo(f"Created {len(created)} partition(s)")
+
+
+@partitions.command("retention")
+@click.option(
+    "--keep-months",
+    default=settings.PARTITION_RETENTION_MONTHS,
+    show_default=True,
+    help="Months to keep, including the current one.",
+)
+@click.option(
+    "--action",
+    type=click.Choice(RETENTION_ACTIONS),
+    default=settings.PARTITION_RETENTION_ACTION,
+    show_default=True,
+    help="detach: keep as standalone tables; drop; archive: CSV.gz, then drop.",
+)
+@click.option(
+    "--archive-dir",
+    default=settings.PARTITION_ARCHIVE_DIR,
+    show_default=True,
+    help="Where --action archive writes its files.",
+)
+@click.option("--dry-run", is_flag=True, help="Only list what would be retired.")
+def apply_retention(keep_months: int, action: str, archive_dir: str, dry_run: bool):
+    """Retire partitions older than the retention period."""
+    manager = PartitionManager(engine)
+    if dry_run:
+        for table, name in manager.expired_partitions(keep_months):
+            click.echo(f"would {action} {name}")
+        return
+    retired = manager.apply_retention(keep_months, action, archive_dir)
+    click.echo(f"Retired {len(retired)} partition(s)")
+
+
+@cli.group()
+def responses():
+    """Response bodies kept in the blob store."""
+
+
+def _rewrite_bodies(criteria, values, batch_size: int) -> int:
+    """Rewrite the body columns of matching responses, one batch per commit."""
+    table = Response.__table__
+    query = select(
+        table.c.id, table.c.created_at, table.c.content, table.c.content_ref
+    ).where(*criteria)
+    rewritten = 0
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(query.limit(batch_size)).all()
+            for row in rows:
+                connection.execute(
+                    update(table)
+                    .where(table.c.id == row.id, table.c.created_at == row.created_at)
+                    .values(**values(row))
+                )
+        rewritten += len(rows)
+        if len(rows) < batch_size:
+            return rewritten
+
+
+@responses.command("offload")
+@click.option("--batch-size", default=500, show_default=True)
+def offload_responses(batch_size: int):
+    """Move existing large bodies from the responses table to the blob store."""
+    if not response_bodies.enabled:
+        raise click.ClickException("Set RESPONSE_BLOB_ENABLED=true first")
+    table = Response.__table__
+    moved = _rewrite_bodies(
+        [
+            table.c.content_ref.is_(None),
+            func.octet_length(table.c.content) >= response_bodies.threshold,
+        ],
+        lambda row: {
+            "content": None,
+            "content_ref": response_bodies.offload(row.content),
+        },
+        batch_size,
+    )
+    click.echo(f"Offloaded {moved} response body(ies)")
+
+
+@responses.command("inline")
+@click.option("--batch-size", default=500, show_default=True)
+def inline_responses(batch_size: int):
+    """Copy offloaded bodies back into the responses table."""
+    table = Response.__table__
+    restored = _rewrite_bodies(
+        [table.c.content_ref.is_not(None)],
+        lambda row: {
+            "content": response_bodies.load(row.content_ref),
+            "content_ref": None,
+        },
+        batch_size,
+    )
+    click.echo(f"Inlined {restored} response body(ies)")
+
+
+@cli.group()
+def rollups():
+    """Hourly and daily usage rollups read by the analytics reports."""
+
+
+@rollups.command("rebuild")
+@click.option(
+    "--since",
+    type=click.DateTime(),
+    help="First UTC day to rebuild (default: all history).",
+)
+@click.option(
+    "--until",
+    type=click.DateTime(),
+    help="Rebuild up to this UTC time, rounded up to a whole day.",
+)
+def rebuild_rollups(since, until):
+    """Recompute usage rollups from the responses table."""
+    since = since.replace(tzinfo=timezone.utc) if since else None
+    until = until.replace(tzinfo=timezone.utc) if until else None
+    with engine.begin() as connection:
+        written = usage_rollups.rebuild(connection, since, until)
+    for table, rows in written.items():
+        click.echo(f"{table}: {rows} row(s)")
+
+
+@cli.group()
+def views():
+    """Materialized views behind the heavier analytics reports."""
+
+
+@views.command("refresh")
+@click.argument("names", nargs=-1, type=click.Choice(sorted(VIEWS)))
+def refresh_views(names):
+    """Refresh views now (default: all), even if they were just refreshed."""
+    refresher = MaterializedViewRefresher(
+        engine,
+        refresh_intervals(
+            settings.MATERIALIZED_VIEW_REFRESH_SECONDS,
+            settings.MATERIALIZED_VIEW_REFRESH_INTERVALS,
+        ),
+        refresh_timeouts(
+            settings.MATERIALIZED_VIEW_REFRESH_TIMEOUT_SECONDS,
+            settings.MATERIALIZED_VIEW_REFRESH_TIMEOUTS,
+        ),
+    )
+    for name in names or sorted(VIEWS):
+        if refresher.refresh(name, force=True):
+            click.echo(f"{name}: {refresher.last_duration[name]:.2f}s")
+        else:
+            click.echo(f"{name}: being refreshed by another process")
+
+
+@cli.command("export")
+@click.argument("output", type=click.Path(dir_okay=False, writable=True))
+@click.option(
+    "--format",
+    "format_",
+    type=click.Choice(sorted(export.FORMATS)),
+    default="parquet",
+    show_default=True,
+)
+@click.option("--since", type=click.DateTime(), help="First UTC time to export.")
+@click.option("--until", type=click.DateTime(), help="Export up to this UTC time.")
+@click.option("--organization-id", type=click.UUID, help="Only this organization.")
+@click.option("--columns", help="Comma-separated columns (default: all).")
+@click.option("--batch-size", default=settings.EXPORT_BATCH_SIZE, show_default=True)
+def export_responses(
+    output, format_, since, until, organization_id, columns, batch_size
+):
+    """Write responses and their prompts to a Parquet or Arrow file."""
+    since = since.replace(tzinfo=timezone.utc) if since else None
+    until = until.replace(tzinfo=timezone.utc) if until else None
+    try:
+        export_schema = export.schema(columns.split(",") if columns else None)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--columns")
+    rows = 0
+    with Session(engine) as db, open(output, "wb") as out:
+        batches = export.record_batches(
+            db, export_schema.names, organization_id, since, until, batch_size
+        )
+
+        def counted():
+            nonlocal rows
+            for batch in batches:
+                rows += batch.num_rows
+                yield batch
+
+        for chunk in export.stream(counted(), export_schema, format_):
+            out.write(chunk)
+    click.echo(f"Exported {rows} row(s) to {output}")
+
+
+if __name__ == "__main__":
+    cli()
@@ -50,6 +50,37 @@ class Settings(BaseSettings):
             return v
         return f"postgresql://{values['POSTGRES_USER']}:{values['POSTGRES_PASSWORD']}@{values['POSTGRES_SERVER']}/{values['POSTGRES_DB']}"
 
+    # Connection pool (applies to the sync and the async engine separately)
+    DB_POOL_SIZE: int = Field(10, env="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(20, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: float = Field(30.0, env="DB_POOL_TIMEOUT")
+    DB_POOL_RECYCLE: int = Field(1800, env="DB_POOL_RECYCLE")  # seconds, -1 = never
+    DB_POOL_PRE_PING: bool = Field(True, env="DB_POOL_PRE_PING")
+    DB_STATEMENT_TIMEOUT_MS: int = Field(30000, env="DB_STATEMENT_TIMEOUT_MS")
+
+    # Read replicas for GET endpoints and analytics (comma-separated DSNs).
+    # A plain str: settings would JSON-decode the env value of a List field.
+    DATABASE_REPLICA_URLS: str = Field("", env="DATABASE_REPLICA_URLS")
+
+    @property
+    def replica_urls(self) -> List[str]:
+        return [i.strip() for i in self.DATABASE_REPLICA_URLS.split(",") if i.strip()]
+
+    DB_REPLICA_MAX_LAG_SECONDS: float = Field(5.0, env="DB_REPLICA_MAX_LAG_SECONDS")
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = Field(
+        2.0, env="DB_REPLICA_LAG_CHECK_INTERVAL"
+    )
+    # After a write, the same client reads from the primary for this long
+    DB_READ_YOUR_WRITES_SECONDS: float = Field(10.0, env="DB_READ_YOUR_WRITES_SECONDS")
+
+    # Monthly partitions of prompts/responses (retention runs via app.cli)
+    PARTITION_MONTHS_AHEAD: int = Field(3, env="PARTITION_MONTHS_AHEAD")
+    PARTITION_RETENTION_MONTHS: int = Field(12, env="PARTITION_RETENTION_MONTHS")
+    PARTITION_RETENTION_ACTION: str = Field(
+        "detach", env="PARTITION_RETENTION_ACTION"
+    )  # detach, drop or archive
+    PARTITION_ARCHIVE_DIR: str = Field("var/archive", env="PARTITION_ARCHIVE_DIR")
+
     # LLM API Configurations
     OPENAI_API_KEY: Optional[str] = Field(None, env="OPENAI_API_KEY")
     OPENAI_API_BASE_URL: str = Field(
@@ -76,6 +107,114 @@ class Settings(BaseSettings):
         "https://api.deepseek.com/v1", env="DEEPSEEK_API_BASE_URL"
     )
 
+    # LLM HTTP Client Pool Configuration
+    LLM_HTTP_MAX_CONNECTIONS: int = Field(100, env="LLM_HTTP_MAX_CONNECTIONS")
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(
+        20, env="LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS"
+    )
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = Field(30.0, env="LLM_HTTP_KEEPALIVE_EXPIRY")
+    LLM_HTTP_HTTP2: bool = Field(True, env="LLM_HTTP_HTTP2")
+    LLM_HTTP_CONNECT_TIMEOUT: float = Field(5.0, env="LLM_HTTP_CONNECT_TIMEOUT")
+    LLM_HTTP_READ_TIMEOUT: float = Field(60.0, env="LLM_HTTP_READ_TIMEOUT")
+    LLM_HTTP_WRITE_TIMEOUT: float = Field(10.0, env="LLM_HTTP_WRITE_TIMEOUT")
+    LLM_HTTP_POOL_TIMEOUT: float = Field(5.0, env="LLM_HTTP_POOL_TIMEOUT")
+
+    # Response Cache Configuration (deterministic prompts only)
+    RESPONSE_CACHE_ENABLED: bool = Field(True, env="RESPONSE_CACHE_ENABLED")
+    RESPONSE_CACHE_MAX_ENTRIES: int = Field(10000, env="RESPONSE_CACHE_MAX_ENTRIES")
+    RESPONSE_CACHE_TTL_SECONDS: float = Field(3600.0, env="RESPONSE_CACHE_TTL_SECONDS")
+
+    # Share one upstream call between concurrent identical prompts
+    LLM_COALESCE_REQUESTS: bool = Field(True, env="LLM_COALESCE_REQUESTS")
+
+    # Default deadline for POST /prompts/fan-out
+    LLM_FAN_OUT_TIMEOUT: float = Field(60.0, env="LLM_FAN_OUT_TIMEOUT")
+
+    # POST /prompts/batch limits
+    LLM_BATCH_MAX_ITEMS: int = Field(1000, env="LLM_BATCH_MAX_ITEMS")
+    LLM_BATCH_MAX_CONCURRENCY: int = Field(16, env="LLM_BATCH_MAX_CONCURRENCY")
+
+    # Latency-aware routing across provider pools
+    LLM_ROUTER_WINDOW_SIZE: int = Field(200, env="LLM_ROUTER_WINDOW_SIZE")
+    LLM_ROUTER_MAX_ERROR_RATE: float = Field(0.5, env="LLM_ROUTER_MAX_ERROR_RATE")
+    LLM_HEDGE_DEFAULT_DELAY: float = Field(5.0, env="LLM_HEDGE_DEFAULT_DELAY")
+
+    # Near-duplicate (MinHash) Cache Configuration
+    SIMILARITY_CACHE_ENABLED: bool = Field(False, env="SIMILARITY_CACHE_ENABLED")
+    SIMILARITY_CACHE_THRESHOLD: float = Field(0.9, env="SIMILARITY_CACHE_THRESHOLD")
+    SIMILARITY_CACHE_MAX_ENTRIES: int = Field(
+        100000, env="SIMILARITY_CACHE_MAX_ENTRIES"
+    )
+
+    # Per-provider limits come from LLMProvider.config; this bounds queueing
+    LLM_RATE_LIMIT_MAX_WAIT: float = Field(30.0, env="LLM_RATE_LIMIT_MAX_WAIT")
+
+    # Circuit breaker defaults (per-provider overrides: config["circuit_breaker"])
+    LLM_BREAKER_WINDOW_SIZE: int = Field(20, env="LLM_BREAKER_WINDOW_SIZE")
+    LLM_BREAKER_MIN_CALLS: int = Field(5, env="LLM_BREAKER_MIN_CALLS")
+    LLM_BREAKER_ERROR_RATE: float = Field(0.5, env="LLM_BREAKER_ERROR_RATE")
+    LLM_BREAKER_SLOW_CALL_SECONDS: float = Field(
+        30.0, env="LLM_BREAKER_SLOW_CALL_SECONDS"
+    )
+    LLM_BREAKER_SLOW_CALL_RATE: float = Field(0.8, env="LLM_BREAKER_SLOW_CALL_RATE")
+    LLM_BREAKER_OPEN_SECONDS: float = Field(30.0, env="LLM_BREAKER_OPEN_SECONDS")
+
+    # Write-behind persistence of responses (batched inserts off the request path)
+    RESPONSE_WRITE_BEHIND: bool = Field(False, env="RESPONSE_WRITE_BEHIND")
+    RESPONSE_WRITE_BATCH_SIZE: int = Field(500, env="RESPONSE_WRITE_BATCH_SIZE")
+    RESPONSE_WRITE_FLUSH_INTERVAL: float = Field(
+        0.5, env="RESPONSE_WRITE_FLUSH_INTERVAL"
+    )
+    RESPONSE_WRITE_MAX_QUEUE: int = Field(10000, env="RESPONSE_WRITE_MAX_QUEUE")
+    RESPONSE_WRITE_SPILL_PATH: str = Field(
+        "var/response_spill.jsonl", env="RESPONSE_WRITE_SPILL_PATH"
+    )
+
+    # Large response bodies go to a zstd-compressed, content-addressed blob store
+    RESPONSE_BLOB_ENABLED: bool = Field(False, env="RESPONSE_BLOB_ENABLED")
+    RESPONSE_BLOB_THRESHOLD_BYTES: int = Field(
+        8192, env="RESPONSE_BLOB_THRESHOLD_BYTES"
+    )
+    RESPONSE_BLOB_DIR: str = Field("var/blobs", env="RESPONSE_BLOB_DIR")
+    RESPONSE_BLOB_ZSTD_LEVEL: int = Field(3, env="RESPONSE_BLOB_ZSTD_LEVEL")
+
+    # Cached /analytics reports (stale ones are served for a few seconds)
+    ANALYTICS_CACHE_TTL_SECONDS: float = Field(60.0, env="ANALYTICS_CACHE_TTL_SECONDS")
+    ANALYTICS_CACHE_STALE_AFTER_SECONDS: float = Field(
+        5.0, env="ANALYTICS_CACHE_STALE_AFTER_SECONDS"
+    )
+    ANALYTICS_CACHE_MAX_ENTRIES: int = Field(1000, env="ANALYTICS_CACHE_MAX_ENTRIES")
+
+    # Prompt/response exports: rows fetched and written per record batch
+    EXPORT_BATCH_SIZE: int = Field(10000, env="EXPORT_BATCH_SIZE")
+
+    # Latency percentile sketches per provider/model, saved per time bucket
+    LATENCY_SKETCH_BUCKET_SECONDS: int = Field(300, env="LATENCY_SKETCH_BUCKET_SECONDS")
+    LATENCY_SKETCH_SNAPSHOT_INTERVAL: float = Field(
+        30.0, env="LATENCY_SKETCH_SNAPSHOT_INTERVAL"
+    )
+    LATENCY_SKETCH_RELATIVE_ACCURACY: float = Field(
+        0.01, env="LATENCY_SKETCH_RELATIVE_ACCURACY"
+    )
+
+    # Report materialized views: refresh interval and statement timeout (0 =
+    # none), each with per-view overrides
+    MATERIALIZED_VIEW_REFRESH_ENABLED: bool = Field(
+        True, env="MATERIALIZED_VIEW_REFRESH_ENABLED"
+    )
+    MATERIALIZED_VIEW_REFRESH_SECONDS: float = Field(
+        300.0, env="MATERIALIZED_VIEW_REFRESH_SECONDS"
+    )
+    MATERIALIZED_VIEW_REFRESH_INTERVALS: Dict[str, float] = Field(
+        default={}, env="MATERIALIZED_VIEW_REFRESH_INTERVALS"
+    )
+    MATERIALIZED_VIEW_REFRESH_TIMEOUT_SECONDS: float = Field(
+        600.0, env="MATERIALIZED_VIEW_REFRESH_TIMEOUT_SECONDS"
+    )
+    MATERIALIZED_VIEW_REFRESH_TIMEOUTS: Dict[str, float] = Field(
+        default={}, env="MATERIALIZED_VIEW_REFRESH_TIMEOUTS"
+    )
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -4,8 +4,9 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
 from app.models.user import User
 from app.db.crud.user import get_user_by_email
 from app.config import settings
@@ -45,10 +46,15 @@ def get_password_hash(password: str) -> str:
 
 
 # -------------------- Authentication -------------------- #
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+async def authenticate_user(
+    db: AsyncSession, email: str, password: str
+) -> Optional[User]:
     """Authenticate a user by email and password."""
-    user = get_user_by_email(db, email=email)
-    if not user or not verify_password(password, user.hashed_password):
+    user = await get_user_by_email(db, email=email)
+    # bcrypt is deliberately slow; keep it off the event loop
+    if not user or not await run_in_threadpool(
+        verify_password, password, user.hashed_password
+    ):
         return None
     return user
 
@@ -65,7 +71,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 # -------------------- User Retrieval -------------------- #
 async def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
 ) -> User:
     """Get the current authenticated user from the JWT token."""
     try:
@@ -78,7 +84,7 @@ async def get_current_user(
     except JWTError:
         raise CREDENTIALS_EXCEPTION
 
-    user = get_user_by_email(db, email=email)
+    user = await get_user_by_email(db, email=email)
     if not user:
         raise CREDENTIALS_EXCEPTION
     if not user.is_active:
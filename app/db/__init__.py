@@ -1,9 +1,11 @@
-from .session import SessionLocal, engine, Base
+from .session import SessionLocal, AsyncSessionLocal, engine, async_engine, Base
 from .crud import user, organization, team, prompt, response, llm_provider
 
 __all__ = [
     "SessionLocal",
+    "AsyncSessionLocal",
     "engine",
+    "async_engine",
     "Base",
     "user",
     "organization",
@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+import zstandard
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# content_ref values are "<codec>:<key>", so other encodings can be added
+# without touching rows written earlier
+_CODEC = "zstd"
+
+
+class BlobStore(ABC):
+    """
+    Immutable blobs addressed by a key chosen by the caller.
+
+    Subclass this to keep response bodies in object storage instead of on
+    the local filesystem.
+    """
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> None:
+        pass
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        pass
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def touch(self, key: str) -> bool:
+        """Mark a blob as just used; False if it does not exist."""
+
+    @abstractmethod
+    def modified_at(self, key: str) -> Optional[float]:
+        """Unix time a blob was last stored or touched (None if missing)."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files under ``root``, fanned out by the key's first bytes."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file and rename, so a reader never sees a
+        # partial blob even when two workers store the same body at once.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def touch(self, key: str) -> bool:
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def modified_at(self, key: str) -> Optional[float]:
+        try:
+            return os.path.getmtime(self._path(key))
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class ResponseBodyStore:
+    """
+    Keeps large response bodies out of the responses table.
+
+    Bodies of at least ``threshold`` UTF-8 bytes are zstd-compressed and
+    stored under the SHA-256 of the body, so identical responses share one
+    blob. The row then holds only ``content_ref``; ``Response.content``
+    fetches and decompresses the body when it is read. Reusing a blob marks
+    it as used, so ``delete`` can leave alone blobs a new row may refer to.
+    """
+
+    def __init__(
+        self,
+        blobs: BlobStore,
+        enabled: bool = False,
+        threshold: int = 8192,
+        level: int = 3,
+    ):
+        self.blobs = blobs
+        self.enabled = enabled
+        self.threshold = threshold
+        self.level = level
+        self.offloaded = 0
+        self.deduplicated = 0
+        self.loads = 0
+        self.deleted = 0
+
+    def offload(self, content: Optional[str]) -> Optional[str]:
+        """
+        Store ``content`` as a blob if it is large enough.
+
+        Returns:
+            The content_ref to keep on the row, or None to keep it inline
+        """
+        if not self.enabled or content is None:
+            return None
+        data = content.encode("utf-8")
+        if len(data) < self.threshold:
+            return None
+        key = hashlib.sha256(data).hexdigest()
+        if self.blobs.touch(key):
+            self.deduplicated += 1
+        else:
+            compressor = zstandard.ZstdCompressor(level=self.level)
+            self.blobs.put(key, compressor.compress(data))
+        self.offloaded += 1
+        return f"{_CODEC}:{key}"
+
+    @staticmethod
+    def _key(ref: str) -> str:
+        codec, _, key = ref.partition(":")
+        if codec != _CODEC:
+            raise ValueError(f"Unknown content_ref codec: {codec}")
+        return key
+
+    def load(self, ref: str) -> str:
+        key = self._key(ref)
+        self.loads += 1
+        data = zstandard.ZstdDecompressor().decompress(self.blobs.get(key))
+        return data.decode("utf-8")
+
+    def delete(self, ref: str, unused_since: float) -> bool:
+        """
+        Delete the blob behind ``ref`` unless it was stored or reused after
+        ``unused_since`` (Unix time). Blobs are shared between identical
+        bodies, so the caller must first check that no row refers to it.
+
+        Returns:
+            Whether the blob was deleted
+        """
+        key = self._key(ref)
+        modified_at = self.blobs.modified_at(key)
+        if modified_at is None or modified_at > unused_since:
+            return False
+        self.blobs.delete(key)
+        self.deleted += 1
+        return True
+
+    async def offload_fields(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Response column values with a large ``content`` moved to a blob.
+
+        ``content_ref`` is always set (None for an inline body), so rows
+        inserted together have the same columns. Compression and the file
+        write run in a worker thread.
+        """
+        ref = None
+        if self.enabled and fields.get("content") is not None:
+            ref = await asyncio.to_thread(self.offload, fields["content"])
+        if ref is None:
+            return {"content_ref": None, **fields}
+        return {**fields, "content": None, "content_ref": ref}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "offloaded": self.offloaded,
+            "deduplicated": self.deduplicated,
+            "loads": self.loads,
+            "deleted": self.deleted,
+        }
+
+
+# Always configured, so bodies offloaded earlier stay readable after the
+# mode is switched off
+response_bodies = ResponseBodyStore(
+    LocalBlobStore(settings.RESPONSE_BLOB_DIR),
+    enabled=settings.RESPONSE_BLOB_ENABLED,
+    threshold=settings.RESPONSE_BLOB_THRESHOLD_BYTES,
+    level=settings.RESPONSE_BLOB_ZSTD_LEVEL,
+)
@@ -1,6 +1,23 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import io
+from datetime import date, datetime
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import Table, cast, column, insert, select, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.db.session import Base
@@ -10,6 +27,168 @@ ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# Rows per COPY round trip when loading with copy_many
+COPY_CHUNK_SIZE = 10000
+
+
+def _rows(objs_in: Sequence[Union[BaseModel, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Column values of each input; every row must set the same fields."""
+    # Native values (UUIDs, datetimes) are kept for the drivers to encode
+    rows = [dict(obj) if isinstance(obj, dict) else obj.dict() for obj in objs_in]
+    if any(row.keys() != rows[0].keys() for row in rows):
+        raise ValueError("Bulk operations need every row to set the same fields")
+    return rows
+
+
+def _keys(model: Any, result: Any) -> List[Any]:
+    """Primary keys from a RETURNING result: scalars, or tuples if composite."""
+    if len(model.__mapper__.primary_key) == 1:
+        return [row[0] for row in result]
+    return [tuple(row) for row in result]
+
+
+def _onupdate(table: Table, assigned: Sequence[str]) -> Dict[str, Any]:
+    """SQL onupdate values (e.g. updated_at = now()) that bulk SETs must add."""
+    return {
+        c.name: c.onupdate.arg
+        for c in table.columns
+        if c.onupdate is not None
+        and c.onupdate.is_clause_element
+        and c.name not in assigned
+    }
+
+
+def _insert_statement(model: Any) -> Any:
+    # Executed with a list of rows, this is sent as multi-row INSERTs
+    # ("insertmanyvalues") and returns every key in input order.
+    return insert(model.__table__).returning(
+        *model.__mapper__.primary_key, sort_by_parameter_order=True
+    )
+
+
+def _upsert_statement(
+    model: Any,
+    rows: List[Dict[str, Any]],
+    conflict_columns: Optional[Sequence[str]],
+    update_columns: Optional[Sequence[str]],
+) -> Tuple[Any, List[Dict[str, Any]]]:
+    if conflict_columns is None:
+        # Partitioned tables (prompts, responses) have (id, created_at) as key
+        conflict_columns = [c.name for c in model.__table__.primary_key.columns]
+    missing = [name for name in conflict_columns if name not in rows[0]]
+    if missing:
+        raise ValueError(f"Upserted rows must set {', '.join(missing)}")
+    if update_columns is None:
+        update_columns = [name for name in rows[0] if name not in conflict_columns]
+    # One statement cannot update the same row twice; the last input wins
+    unique = {tuple(row[name] for name in conflict_columns): row for row in rows}
+    statement = pg_insert(model.__table__)
+    if update_columns:
+        set_ = {name: statement.excluded[name] for name in update_columns}
+        set_.update(_onupdate(model.__table__, [*update_columns, *conflict_columns]))
+        statement = statement.on_conflict_do_update(
+            index_elements=list(conflict_columns), set_=set_
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(
+            index_elements=list(conflict_columns)
+        )
+    return statement.returning(*model.__mapper__.primary_key), list(unique.values())
+
+
+def _update_statement(
+    model: Any, rows: List[Dict[str, Any]], key_columns: Sequence[str]
+) -> Any:
+    """One UPDATE ... FROM (VALUES ...) setting each row's own values."""
+    table = model.__table__
+    names = [*key_columns, *(name for name in rows[0] if name not in key_columns)]
+    source = values(
+        *(column(name, table.c[name].type) for name in names), name="source"
+    ).data([tuple(row[name] for name in names) for row in rows])
+
+    def value(name: str) -> Any:
+        # Postgres infers VALUES column types from the first row; NULLs and
+        # untyped literals would make them text, so cast to the target type
+        return cast(source.c[name], table.c[name].type)
+
+    set_ = {name: value(name) for name in names if name not in key_columns}
+    set_.update(_onupdate(table, names))
+    return (
+        update(table)
+        .where(*(table.c[name] == value(name) for name in key_columns))
+        .values(set_)
+        .returning(*model.__mapper__.primary_key)
+    )
+
+
+def _copy_rows(
+    table: Table, rows: List[Dict[str, Any]], dialect: Any
+) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+    """
+    Column names and DBAPI-ready tuples for COPY.
+
+    COPY skips SQLAlchemy's Python-side defaults (such as ``id = uuid4``),
+    so they are filled in here; columns with only a server default are left
+    out and get it from the database.
+    """
+    defaults = [
+        c
+        for c in table.columns
+        if c.default is not None
+        and not c.default.is_clause_element
+        and c.name not in rows[0]
+    ]
+    for row in rows:
+        for c in defaults:
+            row[c.name] = (
+                c.default.arg(None) if c.default.is_callable else c.default.arg
+            )
+    names = list(rows[0])
+    processors = [table.c[name].type.bind_processor(dialect) for name in names]
+    records = [
+        tuple(
+            process(row[name]) if process is not None else row[name]
+            for name, process in zip(names, processors)
+        )
+        for row in rows
+    ]
+    return names, records
+
+
+def _copied_keys(model: Any, rows: List[Dict[str, Any]]) -> List[Any]:
+    names = [c.name for c in model.__mapper__.primary_key]
+    if any(name not in rows[0] for name in names):
+        return []
+    if len(names) == 1:
+        return [row[names[0]] for row in rows]
+    return [tuple(row[name] for name in names) for row in rows]
+
+
+def _copy_text(value: Any) -> str:
+    """A value in COPY's text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_chunks(records: List[Tuple[Any, ...]]) -> Iterator[io.StringIO]:
+    for start in range(0, len(records), COPY_CHUNK_SIZE):
+        buffer = io.StringIO()
+        for record in records[start : start + COPY_CHUNK_SIZE]:
+            buffer.write("\t".join(_copy_text(value) for value in record) + "\n")
+        buffer.seek(0)
+        yield buffer
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
@@ -67,3 +246,229 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             db.delete(obj)
             db.commit()
         return obj
+
+    def create_many(
+        self, db: Session, objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]]
+    ) -> List[Any]:
+        """
+        Insert many records with multi-row INSERTs and a single commit.
+
+        Returns the new primary keys in input order, without loading the
+        rows back.
+        """
+        if not objs_in:
+            return []
+        result = db.execute(_insert_statement(self.model), _rows(objs_in))
+        keys = _keys(self.model, result)
+        db.commit()
+        return keys
+
+    def upsert_many(
+        self,
+        db: Session,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        conflict_columns: Optional[Sequence[str]] = None,
+        update_columns: Optional[Sequence[str]] = None,
+    ) -> List[Any]:
+        """
+        Insert many records, updating those that conflict (INSERT ... ON CONFLICT).
+
+        **Parameters**
+        * `conflict_columns`: Columns of the unique index that detects conflicts;
+          defaults to the table's primary key, which rows must then set
+        * `update_columns`: Columns to overwrite on conflict; defaults to all
+          given fields, and an empty list skips conflicting rows instead
+
+        Returns the primary keys of the inserted or updated rows.
+        """
+        if not objs_in:
+            return []
+        statement, rows = _upsert_statement(
+            self.model, _rows(objs_in), conflict_columns, update_columns
+        )
+        keys = _keys(self.model, db.execute(statement, rows))
+        db.commit()
+        return keys
+
+    def update_many(
+        self,
+        db: Session,
+        objs_in: Sequence[Dict[str, Any]],
+        key_columns: Sequence[str] = ("id",),
+    ) -> List[Any]:
+        """
+        Update many records, each with its own values, in one statement.
+
+        Every dict holds the `key_columns` identifying its row plus the
+        fields to set. Returns the primary keys of the rows updated.
+        """
+        if not objs_in:
+            return []
+        statement = _update_statement(self.model, _rows(objs_in), key_columns)
+        keys = _keys(self.model, db.execute(statement))
+        db.commit()
+        return keys
+
+    def copy_many(
+        self, db: Session, objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]]
+    ) -> List[Any]:
+        """
+        Load many records with COPY, for imports too large for INSERTs.
+
+        Runs no ORM events or onupdate hooks. Returns the primary keys in
+        input order when they are set client-side (e.g. UUID defaults).
+        """
+        if not objs_in:
+            return []
+        rows = _rows(objs_in)
+        connection = db.connection()
+        names, records = _copy_rows(self.model.__table__, rows, connection.dialect)
+        cursor = connection.connection.cursor()
+        try:
+            for chunk in _copy_chunks(records):
+                cursor.copy_expert(
+                    f"COPY {self.model.__tablename__} ({', '.join(names)})"
+                    " FROM STDIN",
+                    chunk,
+                )
+        finally:
+            cursor.close()
+        db.commit()
+        return _copied_keys(self.model, rows)
+
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init__(self, model: Type[ModelType]):
+        """
+        Async CRUD operations for SQLAlchemy models (AsyncSession).
+
+        **Parameters**
+        * `model`: A SQLAlchemy model class
+        """
+        self.model = model
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        """Retrieve a record by ID (UUID or int)"""
+        return await db.get(self.model, id)
+
+    async def get_multi(
+        self, db: AsyncSession, skip: int = 0, limit: int = 100
+    ) -> List[ModelType]:
+        """Retrieve multiple records with pagination"""
+        result = await db.execute(select(self.model).offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def create(self, db: AsyncSession, obj_in: CreateSchemaType) -> ModelType:
+        """Create a new record"""
+        obj_data = jsonable_encoder(obj_in)
+        db_obj = self.model(**obj_data)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+    ) -> ModelType:
+        """Update an existing record"""
+        update_data = (
+            obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        )
+        for field, value in update_data.items():
+            setattr(db_obj, field, value)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def remove(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        """Delete a record by ID"""
+        obj = await db.get(self.model, id)
+        if obj:
+            await db.delete(obj)
+            await db.commit()
+        return obj
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+    ) -> List[Any]:
+        """
+        Insert many records with multi-row INSERTs and a single commit.
+
+        Returns the new primary keys in input order, without loading the
+        rows back.
+        """
+        if not objs_in:
+            return []
+        result = await db.execute(_insert_statement(self.model), _rows(objs_in))
+        keys = _keys(self.model, result)
+        await db.commit()
+        return keys
+
+    async def upsert_many(
+        self,
+        db: AsyncSession,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        conflict_columns: Optional[Sequence[str]] = None,
+        update_columns: Optional[Sequence[str]] = None,
+    ) -> List[Any]:
+        """
+        Insert many records, updating those that conflict (INSERT ... ON CONFLICT).
+
+        See ``CRUDBase.upsert_many``.
+        """
+        if not objs_in:
+            return []
+        statement, rows = _upsert_statement(
+            self.model, _rows(objs_in), conflict_columns, update_columns
+        )
+        keys = _keys(self.model, await db.execute(statement, rows))
+        await db.commit()
+        return keys
+
+    async def update_many(
+        self,
+        db: AsyncSession,
+        objs_in: Sequence[Dict[str, Any]],
+        key_columns: Sequence[str] = ("id",),
+    ) -> List[Any]:
+        """
+        Update many records, each with its own values, in one statement.
+
+        See ``CRUDBase.update_many``.
+        """
+        if not objs_in:
+            return []
+        statement = _update_statement(self.model, _rows(objs_in), key_columns)
+        keys = _keys(self.model, await db.execute(statement))
+        await db.commit()
+        return keys
+
+    async def copy_many(
+        self,
+        db: AsyncSession,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+    ) -> List[Any]:
+        """
+        Load many records with COPY (asyncpg's binary copy protocol).
+
+        See ``CRUDBase.copy_many``.
+        """
+        if not objs_in:
+            return []
+        rows = _rows(objs_in)
+        connection = await db.connection()
+        names, records = _copy_rows(self.model.__table__, rows, connection.dialect)
+        raw = await connection.get_raw_connection()
+        for start in range(0, len(records), COPY_CHUNK_SIZE):
+            await raw.driver_connection.copy_records_to_table(
+                self.model.__tablename__,
+                records=records[start : start + COPY_CHUNK_SIZE],
+                columns=names,
+            )
+        await db.commit()
+        return _copied_keys(self.model, rows)
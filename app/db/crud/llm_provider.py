@@ -1,5 +1,19 @@
-from app.db.crud.base import CRUDBase
+from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.llm_provider import LLMProvider
 from app.schemas.llm_provider import LLMProviderCreate
 
 llm_provider_crud = CRUDBase[LLMProvider, LLMProviderCreate](LLMProvider)
+async_llm_provider_crud = AsyncCRUDBase[
+    LLMProvider, LLMProviderCreate, LLMProviderCreate
+](LLMProvider)
+
+
+async def get_provider_by_name(db: AsyncSession, name: str) -> Optional[LLMProvider]:
+    """Look up a provider by name, ignoring case ("OpenAI" == "openai")."""
+    result = await db.execute(
+        select(LLMProvider).where(func.lower(LLMProvider.name) == name.lower())
+    )
+    return result.scalars().first()
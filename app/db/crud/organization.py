@@ -1,5 +1,8 @@
-from app.db.crud.base import CRUDBase
+from app.db.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.organization import Organization
-from app.schemas.organization import OrganizationCreate
+from app.schemas.organization import OrganizationCreate, OrganizationUpdate
 
 organization_crud = CRUDBase[Organization, OrganizationCreate](Organization)
+async_organization_crud = AsyncCRUDBase[
+    Organization, OrganizationCreate, OrganizationUpdate
+](Organization)
@@ -1,6 +1,13 @@
-from sqlalchemy.orm import Session
-from app.db.crud.base import CRUDBase
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import func, select, true, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, selectinload
+from app.db.crud.base import AsyncCRUDBase, CRUDBase
+from app.db.pagination import Keyset
+from app.models.llm_provider import LLMProvider
 from app.models.prompt import Prompt
+from app.models.response import Response
 from app.schemas.prompt import PromptCreate
 
 
@@ -9,4 +16,149 @@ class CRUDPrompt(CRUDBase[Prompt, PromptCreate]):
         return db.query(Prompt).filter(Prompt.user_id == user_id).all()
 
 
+class AsyncCRUDPrompt(AsyncCRUDBase[Prompt, PromptCreate, PromptCreate]):
+    async def get_with_responses(self, db: AsyncSession, id: Any) -> Optional[Prompt]:
+        """A prompt with its responses (and their providers) loaded up front."""
+        result = await db.execute(
+            select(Prompt)
+            .where(Prompt.id == id)
+            .options(selectinload(Prompt.responses).selectinload(Response.llm_provider))
+        )
+        return result.scalars().first()
+
+    async def get_with_latest_response(
+        self, db: AsyncSession, id: Any
+    ) -> Optional[Tuple[Prompt, Optional[Response], Optional[str]]]:
+        """
+        A prompt, its newest response and that response's provider name.
+
+        One round-trip: the newest response comes from a LATERAL subquery
+        that reads a single row off the (prompt_id, created_at) index, so the
+        cost does not grow with the number of responses.
+
+        Returns:
+            (prompt, response, provider_name), with response and provider_name
+            None if the prompt has no responses; None if there is no prompt
+        """
+        latest = (
+            select(Response)
+            .where(Response.prompt_id == Prompt.id)
+            .order_by(Response.created_at.desc(), Response.id.desc())
+            .limit(1)
+            .lateral("latest_response")
+        )
+        latest_response = aliased(Response, latest)
+        result = await db.execute(
+            select(Prompt, latest_response, LLMProvider.name)
+            .select_from(Prompt)
+            .outerjoin(latest_response, true())
+            .outerjoin(LLMProvider, LLMProvider.id == latest_response.llm_provider_id)
+            .where(Prompt.id == id)
+        )
+        row = result.first()
+        return tuple(row) if row is not None else None
+
+    async def get_page(
+        self,
+        db: AsyncSession,
+        *criteria: Any,
+        limit: int = 100,
+        after: Optional[Keyset] = None,
+    ) -> Tuple[List[Tuple[Prompt, int]], Optional[Keyset]]:
+        """
+        Newest-first prompts with their response counts, one page at a time.
+
+        Keyset pagination on (created_at, id): ``after`` is the key of the
+        last row of the previous page, so a deep page costs the same index
+        range scan as the first. Responses are counted by a correlated
+        subquery and never loaded.
+
+        Returns:
+            The page of (prompt, response_count) rows and the key to pass as
+            ``after`` for the next page (None on the last page)
+        """
+        response_count = (
+            select(func.count(Response.id))
+            .where(Response.prompt_id == Prompt.id)
+            .correlate(Prompt)
+            .scalar_subquery()
+        )
+        query = select(Prompt, response_count).where(*criteria)
+        if after is not None:
+            query = query.where(tuple_(Prompt.created_at, Prompt.id) < after)
+        result = await db.execute(
+            query.order_by(Prompt.created_at.desc(), Prompt.id.desc()).limit(limit + 1)
+        )
+        rows = [(prompt, count) for prompt, count in result.all()]
+        if len(rows) <= limit:
+            return rows, None
+        last = rows[limit - 1][0]
+        return rows[:limit], (last.created_at, last.id)
+
+
 prompt_crud = CRUDPrompt(Prompt)
+async_prompt_crud = AsyncCRUDPrompt(Prompt)
+
+
+async def create_prompt(
+    db: AsyncSession,
+    content: str,
+    parameters: Optional[Dict[str, Any]],
+    user_id: Any,
+    organization_id: Any = None,
+) -> Prompt:
+    prompt = Prompt(
+        content=content,
+        parameters=parameters or {},
+        user_id=user_id,
+        organization_id=organization_id,
+    )
+    db.add(prompt)
+    await db.commit()
+    await db.refresh(prompt)
+    return prompt
+
+
+async def get_prompt(db: AsyncSession, uuid: Any) -> Optional[Prompt]:
+    return await async_prompt_crud.get_with_responses(db, uuid)
+
+
+async def get_prompt_with_latest_response(
+    db: AsyncSession, uuid: Any
+) -> Optional[Tuple[Prompt, Optional[Response], Optional[str]]]:
+    return await async_prompt_crud.get_with_latest_response(db, uuid)
+
+
+async def get_prompts_by_user(
+    db: AsyncSession, user_id: Any, limit: int = 100, after: Optional[Keyset] = None
+) -> Tuple[List[Tuple[Prompt, int]], Optional[Keyset]]:
+    return await async_prompt_crud.get_page(
+        db, Prompt.user_id == user_id, limit=limit, after=after
+    )
+
+
+async def get_prompts_by_organization(
+    db: AsyncSession,
+    organization_id: Any,
+    limit: int = 100,
+    after: Optional[Keyset] = None,
+) -> Tuple[List[Tuple[Prompt, int]], Optional[Keyset]]:
+    return await async_prompt_crud.get_page(
+        db, Prompt.organization_id == organization_id, limit=limit, after=after
+    )
+
+
+async def save_prompt_batch(
+    db: AsyncSession, prompts: List[Prompt], responses: List[Dict[str, Any]]
+) -> List[Response]:
+    """
+    Insert a batch of prompts and their responses in a single transaction.
+
+    Primary keys are assigned up front so the flush can send each table as
+    one multi-row INSERT instead of a statement (and commit) per row.
+    """
+    response_rows = [Response(id=uuid.uuid4(), **fields) for fields in responses]
+    db.add_all(prompts)
+    db.add_all(response_rows)
+    await db.commit()
+    return response_rows
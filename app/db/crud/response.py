@@ -1,5 +1,20 @@
-from app.db.crud.base import CRUDBase
+from typing import Any, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.response import Response
 from app.schemas.response import ResponseCreate
 
 response_crud = CRUDBase[Response, ResponseCreate](Response)
+async_response_crud = AsyncCRUDBase[Response, ResponseCreate, ResponseCreate](Response)
+
+
+async def create_response(db: AsyncSession, **fields: Any) -> Response:
+    response = Response(**fields)
+    db.add(response)
+    await db.commit()
+    await db.refresh(response)
+    return response
+
+
+async def get_response(db: AsyncSession, response_id: Any) -> Optional[Response]:
+    return await async_response_crud.get(db, response_id)
@@ -1,7 +1,10 @@
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.crud.base import CRUDBase
+from app.db.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.user import User
-from app.schemas.user import UserCreate
+from app.schemas.user import UserCreate, UserUpdate
 
 
 class CRUDUser(CRUDBase[User, UserCreate]):
@@ -9,4 +12,15 @@ class CRUDUser(CRUDBase[User, UserCreate]):
         return db.query(User).filter(User.email == email).first()
 
 
+class AsyncCRUDUser(AsyncCRUDBase[User, UserCreate, UserUpdate]):
+    async def get_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
+
+
 user_crud = CRUDUser(User)
+async_user_crud = AsyncCRUDUser(User)
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    return await async_user_crud.get_by_email(db, email)
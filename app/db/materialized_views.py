@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import column, func, select, table, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Engine
+
+from app.models.materialized_view_refresh import MaterializedViewRefresh
+
+logger = logging.getLogger(__name__)
+
+# Query handles for the views created in migration 0007
+organization_daily_usage = table(
+    "mv_organization_daily_usage",
+    column("day"),
+    column("organization_id"),
+    column("prompt_count"),
+    column("cached_count"),
+    column("token_count"),
+)
+provider_daily_errors = table(
+    "mv_provider_daily_errors",
+    column("day"),
+    column("llm_provider"),
+    column("model"),
+    column("success_count"),
+    column("error_count"),
+)
+team_daily_usage = table(
+    "mv_team_daily_usage",
+    column("day"),
+    column("organization_id"),
+    column("team_id"),
+    column("prompt_count"),
+    column("token_count"),
+)
+
+VIEWS = {
+    view.name: view
+    for view in (organization_daily_usage, provider_daily_errors, team_daily_usage)
+}
+
+
+def _per_view(
+    default: float, overrides: Optional[Dict[str, float]]
+) -> Dict[str, float]:
+    overrides = overrides or {}
+    unknown = set(overrides) - VIEWS.keys()
+    if unknown:
+        raise ValueError(f"Unknown materialized view(s): {', '.join(sorted(unknown))}")
+    return {name: overrides.get(name, default) for name in VIEWS}
+
+
+def refresh_intervals(
+    default: float, overrides: Optional[Dict[str, float]] = None
+) -> Dict[str, float]:
+    """Refresh interval in seconds of every view."""
+    return _per_view(default, overrides)
+
+
+def refresh_timeouts(
+    default: float, overrides: Optional[Dict[str, float]] = None
+) -> Dict[str, float]:
+    """Statement timeout in seconds of every view's refresh (0 = none)."""
+    return _per_view(default, overrides)
+
+
+class MaterializedViewRefresher:
+    """
+    Refreshes the report views in the background.
+
+    Each view is refreshed ``CONCURRENTLY`` (readers are not blocked) once
+    its interval has passed. Workers take a transaction-level advisory lock
+    per view and skip views another worker refreshed within the interval, so
+    several app instances share the work instead of repeating it. The time
+    of each refresh is recorded in ``materialized_view_refreshes`` for the
+    staleness reported with the results.
+
+    A refresh runs under its view's statement timeout (from ``timeouts``,
+    default none) instead of the app engine's. A failed refresh is retried
+    after a tenth of the interval.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        intervals: Dict[str, float],
+        timeouts: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.engine = engine
+        self.intervals = intervals
+        self.timeouts = timeouts or {}
+        self.clock = clock
+        self._next_due = {name: 0.0 for name in intervals}
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = {name: 0 for name in intervals}
+        self.failures = {name: 0 for name in intervals}
+        self.last_duration: Dict[str, float] = {}
+
+    def refresh(self, name: str, force: bool = False) -> bool:
+        """
+        Refresh one view unless another worker is or recently was at it.
+
+        Args:
+            name: View name
+            force: Refresh even if it was refreshed within its interval
+
+        Returns:
+            Whether this call refreshed the view
+        """
+        if name not in VIEWS:
+            raise ValueError(f"Unknown materialized view: {name}")
+        refreshes = MaterializedViewRefresh.__table__
+        with self.engine.begin() as connection:
+            locked = connection.execute(
+                select(func.pg_try_advisory_xact_lock(func.hashtext(name)))
+            ).scalar()
+            if not locked:
+                return False
+            if not force:
+                recent = connection.execute(
+                    select(refreshes.c.view_name).where(
+                        refreshes.c.view_name == name,
+                        refreshes.c.refreshed_at
+                        > func.now() - timedelta(seconds=self.intervals[name]),
+                    )
+                ).first()
+                if recent is not None:
+                    return False
+            # An unpopulated view cannot be refreshed concurrently
+            populated = connection.execute(
+                text("SELECT ispopulated FROM pg_matviews WHERE matviewname = :name"),
+                {"name": name},
+            ).scalar()
+            timeout_ms = int(self.timeouts.get(name, 0) * 1000)
+            connection.execute(text(f"SET LOCAL statement_timeout = {timeout_ms}"))
+            started = time.perf_counter()
+            connection.execute(
+                text(
+                    f"REFRESH MATERIALIZED VIEW "
+                    f"{'CONCURRENTLY ' if populated else ''}{name}"
+                )
+            )
+            duration = time.perf_counter() - started
+            statement = pg_insert(refreshes).values(
+                view_name=name, refreshed_at=func.now(), duration_seconds=duration
+            )
+            connection.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["view_name"],
+                    set_={
+                        "refreshed_at": statement.excluded.refreshed_at,
+                        "duration_seconds": statement.excluded.duration_seconds,
+                    },
+                )
+            )
+        self.last_duration[name] = duration
+        logger.info(f"Refreshed {name} in {duration:.2f}s")
+        return True
+
+    async def refresh_due(self) -> None:
+        """
+        Refresh (in a thread) every view whose interval has passed.
+
+        A view another worker has just refreshed, or whose refresh failed,
+        is checked again after a tenth of its interval, so it is never much
+        older than the interval.
+        """
+        for name, interval in self.intervals.items():
+            if self.clock() < self._next_due[name]:
+                continue
+            self._next_due[name] = self.clock() + interval
+            try:
+                if await asyncio.to_thread(self.refresh, name):
+                    self.refreshes[name] += 1
+                else:
+                    self._next_due[name] = self.clock() + interval / 10
+            except Exception as e:
+                self._next_due[name] = self.clock() + interval / 10
+                self.failures[name] += 1
+                logger.warning(f"Refreshing {name} failed: {e}")
+
+    async def start(self, tick: float = 5.0) -> None:
+        """Check for due views every ``tick`` seconds."""
+        self._task = asyncio.create_task(self._run(tick))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self, tick: float) -> None:
+        while True:
+            await self.refresh_due()
+            await asyncio.sleep(tick)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "interval_seconds": interval,
+                "timeout_seconds": self.timeouts.get(name),
+                "refreshes": self.refreshes[name],
+                "failures": self.failures[name],
+                "last_duration_seconds": self.last_duration.get(name),
+            }
+            for name, interval in self.intervals.items()
+        }
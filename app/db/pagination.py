@@ -0,0 +1,31 @@
+import base64
+import uuid
+from datetime import datetime
+from typing import Tuple
+
+Keyset = Tuple[datetime, uuid.UUID]
+
+
+class InvalidCursorError(ValueError):
+    """A pagination cursor could not be decoded."""
+
+
+def encode_cursor(created_at: datetime, id: uuid.UUID) -> str:
+    """Opaque cursor for the row after which the next page starts."""
+    raw = f"{created_at.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Keyset:
+    """
+    Turn a cursor from ``encode_cursor`` back into its (created_at, id) key.
+
+    Raises:
+        InvalidCursorError: If the cursor was not produced by ``encode_cursor``
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(id)
+    except ValueError as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from e
@@ -0,0 +1,292 @@
+import asyncio
+import gzip
+import logging
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+from app.db.blob_store import ResponseBodyStore, response_bodies
+
+logger = logging.getLogger(__name__)
+
+# Tables range-partitioned by month on created_at (alembic revision 0003)
+PARTITIONED_TABLES = ("prompts", "responses")
+
+RETENTION_ACTIONS = ("detach", "drop", "archive")
+
+# The table whose rows may keep their body in the blob store (content_ref)
+BODY_TABLE = "responses"
+
+_PARTITION_NAME = re.compile(r"^(?P<table>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})$")
+
+_LIST_PARTITIONS = text(
+    "SELECT child.relname FROM pg_inherits"
+    " JOIN pg_class parent ON parent.oid = pg_inherits.inhparent"
+    " JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+    " WHERE parent.relname = :table"
+    " ORDER BY child.relname"
+)
+
+
+def month_start(value: datetime) -> datetime:
+    """First instant (UTC) of the calendar month containing ``value``."""
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def partition_month(name: str) -> Optional[datetime]:
+    """The month a partition covers, parsed from its name (None if foreign)."""
+    match = _PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    return datetime(int(match["year"]), int(match["month"]), 1, tzinfo=timezone.utc)
+
+
+class PartitionManager:
+    """
+    Creates future monthly partitions and retires old ones.
+
+    Partitions cover one UTC calendar month each and are named
+    ``<table>_pYYYY_MM``. There is no default partition, so a row whose
+    month has no partition is rejected: ``ensure_partitions`` keeps
+    ``months_ahead`` months ready, and runs on app startup and daily.
+
+    Retention works on whole partitions instead of DELETEs. A partition is
+    first detached (DETACH PARTITION CONCURRENTLY, so inserts are not
+    blocked), then kept as a standalone table ("detach"), dropped ("drop"),
+    or written to a gzipped CSV file and dropped ("archive").
+
+    Archived response partitions carry their offloaded bodies inline, so
+    the file does not depend on the blob store. When a response partition
+    is dropped (or archived), the blobs its rows referred to are deleted,
+    except those another response still refers to or that were stored or
+    reused within ``body_grace_seconds`` (a writer may be about to insert a
+    row referring to them).
+    """
+
+    def __init__(
+        self,
+        engine: Any,
+        tables: Tuple[str, ...] = PARTITIONED_TABLES,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        bodies: ResponseBodyStore = response_bodies,
+        body_grace_seconds: float = 86400.0,
+    ):
+        self.engine = engine
+        self.tables = tables
+        self.clock = clock
+        self.bodies = bodies
+        self.body_grace_seconds = body_grace_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def list_partitions(self, table: str) -> List[str]:
+        with self.engine.connect() as connection:
+            return list(
+                connection.execute(_LIST_PARTITIONS, {"table": table}).scalars()
+            )
+
+    def ensure_partitions(self, months_ahead: int = 3) -> List[str]:
+        """
+        Create any missing partitions from this month to ``months_ahead``.
+
+        Returns:
+            Names of the partitions that were created
+        """
+        current = month_start(self.clock())
+        created = []
+        with self.engine.begin() as connection:
+            for table in self.tables:
+                existing = set(
+                    connection.execute(_LIST_PARTITIONS, {"table": table}).scalars()
+                )
+                for offset in range(months_ahead + 1):
+                    month = add_months(current, offset)
+                    name = partition_name(table, month)
+                    if name in existing:
+                        continue
+                    connection.execute(
+                        text(
+                            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}"'
+                            f" FOR VALUES FROM ('{month.isoformat()}')"
+                            f" TO ('{add_months(month, 1).isoformat()}')"
+                        )
+                    )
+                    created.append(name)
+        for name in created:
+            logger.info(f"Created partition {name}")
+        return created
+
+    def expired_partitions(self, keep_months: int) -> List[Tuple[str, str]]:
+        """
+        (table, partition) pairs entirely older than ``keep_months`` months.
+
+        The current month counts as the first of the months kept.
+        """
+        cutoff = add_months(month_start(self.clock()), -(keep_months - 1))
+        expired = []
+        for table in self.tables:
+            for name in self.list_partitions(table):
+                month = partition_month(name)
+                if month is not None and month < cutoff:
+                    expired.append((table, name))
+        return expired
+
+    def apply_retention(
+        self,
+        keep_months: int,
+        action: str = "detach",
+        archive_dir: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Retire partitions older than ``keep_months`` months.
+
+        Args:
+            keep_months: Number of months to keep, including the current one
+            action: "detach", "drop" or "archive" (see the class docstring)
+            archive_dir: Where "archive" writes ``<partition>.csv.gz`` files
+
+        Returns:
+            Names of the partitions that were retired
+        """
+        if action not in RETENTION_ACTIONS:
+            raise ValueError(f"Unknown retention action: {action}")
+        if keep_months < 1:
+            raise ValueError("keep_months must be at least 1")
+        if action == "archive" and not archive_dir:
+            raise ValueError("archive_dir is required to archive partitions")
+
+        retired = []
+        for table, name in self.expired_partitions(keep_months):
+            self._detach(table, name)
+            refs = []
+            if table == BODY_TABLE and action in ("drop", "archive"):
+                refs = self._content_refs(name)
+            if action == "archive":
+                path = self._archive(table, name, archive_dir)
+                logger.info(f"Archived partition {name} to {path}")
+            if action in ("drop", "archive"):
+                with self.engine.begin() as connection:
+                    connection.execute(text(f'DROP TABLE "{name}"'))
+            if refs:
+                deleted = self._delete_bodies(refs)
+                logger.info(f"Deleted {deleted} of {len(refs)} blobs of {name}")
+            logger.info(f"Retired partition {name} ({action})")
+            retired.append(name)
+        return retired
+
+    def _content_refs(self, name: str) -> List[str]:
+        with self.engine.connect() as connection:
+            return list(
+                connection.execute(
+                    text(
+                        f'SELECT DISTINCT content_ref FROM "{name}"'
+                        " WHERE content_ref IS NOT NULL"
+                    )
+                ).scalars()
+            )
+
+    def _referenced(self, refs: List[str]) -> Set[str]:
+        """The ``refs`` some remaining response still refers to."""
+        with self.engine.begin() as connection:
+            # content_ref is not indexed: one scan, however long it takes
+            connection.execute(text("SET LOCAL statement_timeout = 0"))
+            return set(
+                connection.execute(
+                    text(
+                        f"SELECT DISTINCT content_ref FROM {BODY_TABLE}"
+                        " WHERE content_ref = ANY(:refs)"
+                    ),
+                    {"refs": refs},
+                ).scalars()
+            )
+
+    def _delete_bodies(self, refs: List[str]) -> int:
+        """Delete the blobs of a retired partition that nothing else uses."""
+        unused_since = time.time() - self.body_grace_seconds
+        referenced = self._referenced(refs)
+        return sum(
+            self.bodies.delete(ref, unused_since)
+            for ref in refs
+            if ref not in referenced
+        )
+
+    def _detach(self, table: str, name: str) -> None:
+        # CONCURRENTLY cannot run inside a transaction block
+        with self.engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            connection.execute(
+                text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}" CONCURRENTLY')
+            )
+
+    def _archive(self, table: str, name: str, archive_dir: str) -> str:
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f"{name}.csv.gz")
+        connection = self.engine.raw_connection()
+        try:
+            with gzip.open(path, "wb") as f:
+                cursor = connection.cursor()
+                # A month of rows takes longer than the app's statement_timeout;
+                # SET LOCAL ends with this (never committed) transaction.
+                cursor.execute("SET LOCAL statement_timeout = 0")
+                if table == BODY_TABLE:
+                    self._inline_bodies(cursor, name)
+                cursor.copy_expert(
+                    f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER)', f
+                )
+                cursor.close()
+            # The detached table itself stays as it was
+            connection.rollback()
+        finally:
+            connection.close()
+        return path
+
+    def _inline_bodies(self, cursor: Any, name: str) -> None:
+        """Fill in offloaded bodies (content_ref stays) before the COPY."""
+        cursor.execute(
+            f'SELECT DISTINCT content_ref FROM "{name}"'
+            " WHERE content IS NULL AND content_ref IS NOT NULL"
+        )
+        for (ref,) in cursor.fetchall():
+            cursor.execute(
+                f'UPDATE "{name}" SET content = %s'
+                " WHERE content_ref = %s AND content IS NULL",
+                (self.bodies.load(ref), ref),
+            )
+
+    async def start(self, months_ahead: int = 3, interval: float = 86400.0) -> None:
+        """Create upcoming partitions now and then every ``interval`` seconds."""
+        await self._ensure(months_ahead)
+        self._task = asyncio.create_task(self._run(months_ahead, interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self, months_ahead: int, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self._ensure(months_ahead)
+
+    async def _ensure(self, months_ahead: int) -> None:
+        try:
+            await asyncio.to_thread(self.ensure_partitions, months_ahead)
+        except Exception as e:
+            # Another instance may have created the same partition; the next
+            # run (or the CLI) fills any gap.
+            logger.error(f"Creating upcoming partitions failed: {e}")
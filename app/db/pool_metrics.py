@@ -0,0 +1,139 @@
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+def _summary(samples: Deque[float], scale: float = 1.0) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50": None, "p95": None, "max": None}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * scale
+
+    return {"p50": pick(0.5), "p95": pick(0.95), "max": ordered[-1] * scale}
+
+
+class PoolMetrics:
+    """
+    Connection pool counters and rolling timings for one engine.
+
+    Fed by SQLAlchemy pool events (connect/checkout/checkin/close) and by the
+    instrumented pool classes below, which time how long each checkout had
+    to wait for a connection. Long waits or timeouts while the database
+    itself is fast mean requests are starved for connections.
+    """
+
+    def __init__(self, engine: Any, window_size: int = 1000):
+        self.engine = engine
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.closes = 0
+        self.peak_checked_out = 0
+        self.peak_overflow = 0
+        self._waits: Deque[float] = deque(maxlen=window_size)
+        self._holds: Deque[float] = deque(maxlen=window_size)
+        self._lifetimes: Deque[float] = deque(maxlen=window_size)
+
+    def record_wait(self, seconds: float) -> None:
+        self._waits.append(seconds)
+
+    def record_timeout(self, seconds: float) -> None:
+        self.timeouts += 1
+        self._waits.append(seconds)
+
+    def on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connects += 1
+        connection_record.info["connected_at"] = time.monotonic()
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+        connection_record.info["checked_out_at"] = time.monotonic()
+        pool = self.engine.pool
+        self.peak_checked_out = max(self.peak_checked_out, pool.checkedout())
+        self.peak_overflow = max(self.peak_overflow, pool.overflow())
+
+    def on_checkin(self, dbapi_connection, connection_record) -> None:
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            self._holds.append(time.monotonic() - checked_out_at)
+
+    def on_close(self, dbapi_connection, connection_record) -> None:
+        self.closes += 1
+        connected_at = connection_record.info.pop("connected_at", None)
+        if connected_at is not None:
+            self._lifetimes.append(time.monotonic() - connected_at)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current pool usage plus wait, hold and lifetime distributions."""
+        pool = self.engine.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+            "max_overflow": pool._max_overflow,
+            "peak_checked_out": self.peak_checked_out,
+            "peak_overflow": max(0, self.peak_overflow),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "closes": self.closes,
+            "wait_ms": _summary(self._waits, 1000.0),
+            "hold_ms": _summary(self._holds, 1000.0),
+            "connection_lifetime_s": _summary(self._lifetimes),
+        }
+
+
+class _InstrumentedPoolMixin:
+    """Times how long each checkout waits for a free connection."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_timeout(time.perf_counter() - start)
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a recreated pool; keep counting into the
+        # same collector.
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_pool(engine: Any) -> PoolMetrics:
+    """
+    Attach a PoolMetrics collector to an engine (sync or async).
+
+    The engine should use one of the instrumented pool classes for wait
+    times to be recorded; the event-based counters work with any pool.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    metrics = PoolMetrics(sync_engine)
+    sync_engine.pool.metrics = metrics
+    event.listen(sync_engine, "connect", metrics.on_connect)
+    event.listen(sync_engine, "checkout", metrics.on_checkout)
+    event.listen(sync_engine, "checkin", metrics.on_checkin)
+    event.listen(sync_engine, "close", metrics.on_close)
+    return metrics
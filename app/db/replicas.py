@@ -0,0 +1,178 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.db.pool_metrics import PoolMetrics
+
+logger = logging.getLogger(__name__)
+
+# Seconds the replica is behind the primary. 0 when it has replayed all the
+# WAL it received, so an idle primary does not make a replica look stale.
+LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+
+class Replica:
+    """A read replica: its engines, session factories and last known lag."""
+
+    def __init__(
+        self,
+        name: str,
+        session_factory: Callable[[], Any],
+        async_session_factory: Callable[[], Any],
+        async_engine: Any,
+        pool_metrics: Optional[PoolMetrics] = None,
+    ):
+        self.name = name
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+        self.async_engine = async_engine
+        self.pool_metrics = pool_metrics
+        self.lag: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+class ReplicaRouter:
+    """
+    Picks the database a read should go to.
+
+    Replicas are used round-robin while their last lag check succeeded
+    recently and reported at most ``max_lag`` seconds. A client that wrote
+    within the last ``read_your_writes_seconds`` reads from the primary, so
+    it sees its own writes. With no usable replica, everything reads from
+    the primary.
+    """
+
+    def __init__(
+        self,
+        replicas: List[Replica],
+        max_lag: float = 5.0,
+        check_interval: float = 2.0,
+        read_your_writes_seconds: float = 10.0,
+        max_tracked_clients: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.max_tracked_clients = max_tracked_clients
+        self.clock = clock
+        self._recent_writers: "OrderedDict[str, float]" = OrderedDict()
+        self._next = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.sticky_reads = 0
+
+    def is_usable(self, replica: Replica) -> bool:
+        if replica.lag is None or replica.checked_at is None:
+            return False
+        # A check that has not succeeded for a few intervals means the lag is
+        # unknown, not small.
+        fresh = self.clock() - replica.checked_at <= 3 * self.check_interval
+        return fresh and replica.lag <= self.max_lag
+
+    def record_write(self, client: Optional[str]) -> None:
+        """Pin ``client``'s reads to the primary for the read-your-writes window."""
+        if client is None or not self.replicas:
+            return
+        self._recent_writers[client] = self.clock()
+        self._recent_writers.move_to_end(client)
+        while len(self._recent_writers) > self.max_tracked_clients:
+            self._recent_writers.popitem(last=False)
+
+    def choose(self, client: Optional[str] = None) -> Optional[Replica]:
+        """
+        The replica to read from, or None to read from the primary.
+
+        Args:
+            client: Key identifying the caller, as passed to ``record_write``
+        """
+        if not self.replicas:
+            return None
+        wrote_at = self._recent_writers.get(client) if client else None
+        if wrote_at is not None:
+            if self.clock() - wrote_at < self.read_your_writes_seconds:
+                self.sticky_reads += 1
+                return None
+            del self._recent_writers[client]
+        usable = [replica for replica in self.replicas if self.is_usable(replica)]
+        if not usable:
+            self.primary_reads += 1
+            return None
+        self.replica_reads += 1
+        return usable[next(self._next) % len(usable)]
+
+    async def check_lag(self) -> None:
+        """Measure every replica's replication lag once."""
+        for replica in self.replicas:
+            try:
+                async with replica.async_engine.connect() as connection:
+                    lag = (await connection.execute(LAG_QUERY)).scalar()
+            except Exception as e:
+                if replica.error is None:
+                    logger.warning(f"Lag check of replica {replica.name} failed: {e}")
+                replica.error = str(e) or e.__class__.__name__
+                continue
+            replica.lag = float(lag or 0)
+            replica.checked_at = self.clock()
+            replica.error = None
+            if replica.lag > self.max_lag:
+                logger.info(
+                    f"Replica {replica.name} is {replica.lag:.1f}s behind; "
+                    "reading from the primary"
+                )
+
+    async def start(self) -> None:
+        """Check lag now and then every ``check_interval`` seconds."""
+        if not self.replicas:
+            return
+        await self.check_lag()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for replica in self.replicas:
+            await replica.async_engine.dispose()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check_lag()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "sticky_reads": self.sticky_reads,
+            "max_lag": self.max_lag,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "usable": self.is_usable(replica),
+                    "lag": replica.lag,
+                    "error": replica.error,
+                    "pool": (
+                        replica.pool_metrics.snapshot()
+                        if replica.pool_metrics is not None
+                        else None
+                    ),
+                }
+                for replica in self.replicas
+            ],
+        }
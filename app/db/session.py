@@ -1,15 +1,96 @@
+import hashlib
+from typing import AsyncIterator, Iterator, Optional
+
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.config import settings
+from app.db.pool_metrics import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    instrument_pool,
+)
+from app.db.replicas import Replica, ReplicaRouter
+
+POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+
+def _create_engine(url: str):
+    return create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        connect_args={
+            "options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+        },
+        **POOL_OPTIONS,
+    )
+
+
+def _create_async_engine(url: str):
+    # Same database, asyncpg driver
+    return create_async_engine(
+        make_url(url).set(drivername="postgresql+asyncpg"),
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        connect_args={
+            "server_settings": {
+                "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)
+            }
+        },
+        **POOL_OPTIONS,
+    )
+
+
+def _async_sessionmaker(bind):
+    # Objects stay usable after commit: async sessions cannot lazy-load
+    # expired attributes implicitly.
+    return async_sessionmaker(bind, autoflush=False, expire_on_commit=False)
+
 
 # Create database engine
-engine = create_engine(settings.DATABASE_URL)
+engine = _create_engine(str(settings.DATABASE_URL))
+pool_metrics = instrument_pool(engine)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine (asyncpg) for request handlers, so DB I/O does not block the
+# event loop.
+async_engine = _create_async_engine(str(settings.DATABASE_URL))
+async_pool_metrics = instrument_pool(async_engine)
+AsyncSessionLocal = _async_sessionmaker(async_engine)
+
+
+def _create_replica(url: str) -> Replica:
+    replica_engine = _create_async_engine(url)
+    return Replica(
+        name=make_url(url).render_as_string(hide_password=True),
+        session_factory=sessionmaker(
+            autocommit=False, autoflush=False, bind=_create_engine(url)
+        ),
+        async_session_factory=_async_sessionmaker(replica_engine),
+        async_engine=replica_engine,
+        pool_metrics=instrument_pool(replica_engine),
+    )
+
+
+# Read replicas (optional); reads fall back to the primary when none is usable
+replica_router = ReplicaRouter(
+    [_create_replica(url) for url in settings.replica_urls],
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.DB_REPLICA_LAG_CHECK_INTERVAL,
+    read_your_writes_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -21,3 +102,45 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency to get an async DB session
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def client_key(request: Request) -> Optional[str]:
+    """
+    Identify the caller for read-your-writes routing.
+
+    The bearer token when there is one (hashed, so tokens are not kept in
+    memory), otherwise the client address.
+    """
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return hashlib.sha256(authorization.encode()).hexdigest()
+    return request.client.host if request.client else None
+
+
+def read_session_factory(request: Request) -> sessionmaker:
+    """Sessions on a usable replica for this caller, else on the primary."""
+    replica = replica_router.choose(client_key(request))
+    return replica.session_factory if replica else SessionLocal
+
+
+# Dependency for read-only endpoints: a replica session when one is usable
+def get_read_db(request: Request) -> Iterator[Session]:
+    db = read_session_factory(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Async variant of get_read_db
+async def get_async_read_db(request: Request) -> AsyncIterator[AsyncSession]:
+    replica = replica_router.choose(client_key(request))
+    session_factory = replica.async_session_factory if replica else AsyncSessionLocal
+    async with session_factory() as db:
+        yield db
@@ -1,9 +1,32 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.api.v1.router import api_router
 from app.core.security import get_current_user
-from app.db.session import engine, Base
+from app.config import settings
+from app.db.session import (
+    AsyncSessionLocal,
+    async_engine,
+    async_pool_metrics,
+    client_key,
+    engine,
+    pool_metrics,
+    replica_router,
+)
 from app.core.logging import configure_logging
+from app.db.blob_store import response_bodies
+from app.db.materialized_views import (
+    MaterializedViewRefresher,
+    refresh_intervals,
+    refresh_timeouts,
+)
+from app.db.partitions import PartitionManager
+from app.services.llm_service import llm_service
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.rate_limiter import ProviderBusyError
+from app.services.response_writer import ResponseWriteBuffer
+from app.services.usage_rollups import record_usage
+from app.services.analytics_cache import analytics_cache
 
 # Create the FastAPI app
 app = FastAPI(
@@ -24,14 +47,90 @@ app.add_middleware(
 # Configure logging
 configure_logging()
 
+partition_manager = PartitionManager(engine)
+view_refresher = MaterializedViewRefresher(
+    engine,
+    refresh_intervals(
+        settings.MATERIALIZED_VIEW_REFRESH_SECONDS,
+        settings.MATERIALIZED_VIEW_REFRESH_INTERVALS,
+    ),
+    refresh_timeouts(
+        settings.MATERIALIZED_VIEW_REFRESH_TIMEOUT_SECONDS,
+        settings.MATERIALIZED_VIEW_REFRESH_TIMEOUTS,
+    ),
+)
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
 
-# Create database tables on startup
+# Reads that follow a client's write go to the primary (see get_read_db)
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        replica_router.record_write(client_key(request))
+    return response
+
+
+# A provider stayed at its concurrency or rate limit for the whole queue wait
+@app.exception_handler(ProviderBusyError)
+async def provider_busy_handler(request: Request, exc: ProviderBusyError):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(exc.retry_after))},
+    )
+
+
+# Every provider in the fallback chain has its circuit open
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+    )
+
+
+# Start partition upkeep, replica lag checks, latency sketch snapshots, report
+# view refreshes and the write-behind response writer; the schema is managed
+# by Alembic
 @app.on_event("startup")
 async def startup():
-    Base.metadata.create_all(bind=engine)
+    await partition_manager.start(settings.PARTITION_MONTHS_AHEAD)
+    await replica_router.start()
+    if settings.MATERIALIZED_VIEW_REFRESH_ENABLED:
+        await view_refresher.start()
+    await llm_service.latency_sketches.start(
+        AsyncSessionLocal, settings.LATENCY_SKETCH_SNAPSHOT_INTERVAL
+    )
+    if settings.RESPONSE_WRITE_BEHIND:
+        llm_service.response_writer = ResponseWriteBuffer(
+            AsyncSessionLocal,
+            batch_size=settings.RESPONSE_WRITE_BATCH_SIZE,
+            flush_interval=settings.RESPONSE_WRITE_FLUSH_INTERVAL,
+            max_queue=settings.RESPONSE_WRITE_MAX_QUEUE,
+            spill_path=settings.RESPONSE_WRITE_SPILL_PATH,
+            on_insert=record_usage,
+            # Rows carry no organization: every cached report goes stale
+            on_commit=lambda rows: analytics_cache.record_write(),
+        )
+        await llm_service.response_writer.start()
+
+
+# Flush queued responses and latency sketches, then release provider and
+# database connections
+@app.on_event("shutdown")
+async def shutdown():
+    if llm_service.response_writer is not None:
+        await llm_service.response_writer.stop()
+    await llm_service.latency_sketches.stop(AsyncSessionLocal)
+    await llm_service.aclose()
+    await view_refresher.stop()
+    await replica_router.stop()
+    await partition_manager.stop()
+    await async_engine.dispose()
 
 
 # Health check endpoint
@@ -40,6 +139,47 @@ async def health_check():
     return {"status": "healthy"}
 
 
+# Connection pool usage; rising wait times or timeouts mean pool starvation
+@app.get("/health/db-pool", tags=["health"])
+async def db_pool_health():
+    return {"sync": pool_metrics.snapshot(), "async": async_pool_metrics.snapshot()}
+
+
+# Replica lag and how many reads each database served
+@app.get("/health/db-replicas", tags=["health"])
+async def db_replicas_health():
+    return replica_router.stats()
+
+
+# Write-behind queue depth and flush/spill counters (null when disabled)
+@app.get("/health/response-writer", tags=["health"])
+async def response_writer_health():
+    writer = llm_service.response_writer
+    return writer.stats() if writer is not None else None
+
+
+@app.get("/health/response-blobs", tags=["health"])
+async def response_blobs_health():
+    return response_bodies.stats()
+
+
+@app.get("/health/analytics-cache", tags=["health"])
+async def analytics_cache_health():
+    return analytics_cache.stats()
+
+
+# Sketches held by this worker and how its snapshots went
+@app.get("/health/latency-sketches", tags=["health"])
+async def latency_sketches_health():
+    return llm_service.latency_sketches.stats()
+
+
+# Report view refreshes done by this worker
+@app.get("/health/materialized-views", tags=["health"])
+async def materialized_views_health():
+    return view_refresher.stats()
+
+
 if __name__ == "__main__":
     import uvicorn
 
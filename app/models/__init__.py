@@ -6,6 +6,9 @@ from .response import Response
 from .llm_provider import LLMProvider
 from .feedback import Feedback
 from .workflow import Workflow
+from .usage_rollup import UsageRollupHourly, UsageRollupDaily
+from .latency_sketch import LatencySketchSnapshot
+from .materialized_view_refresh import MaterializedViewRefresh
 
 # Expose models for easier imports
 __all__ = [
@@ -17,4 +20,8 @@ __all__ = [
     "LLMProvider",
     "Feedback",
     "Workflow",
+    "UsageRollupHourly",
+    "UsageRollupDaily",
+    "LatencySketchSnapshot",
+    "MaterializedViewRefresh",
 ]
@@ -11,14 +11,14 @@ class Feedback(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     response_id = Column(
-        UUID(as_uuid=True),
-        ForeignKey("responses.id", ondelete="CASCADE"),
-        nullable=False,
-    )
+        UUID(as_uuid=True), nullable=False, index=True
+    )  # responses.id (partitioned, so no foreign key)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"))
     rating = Column(Integer, nullable=False)  # 1 to 5
     comment = Column(Text, nullable=True)  # Optional user feedback
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    response = relationship("Response", back_populates="feedback")
+    response = relationship(
+        "Response", primaryjoin="Response.id == foreign(Feedback.response_id)"
+    )
     user = relationship("User")
@@ -0,0 +1,26 @@
+from sqlalchemy import BigInteger, Column, DateTime, JSON, String
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+
+class LatencySketchSnapshot(Base):
+    """
+    One worker's latency sketch for a time bucket, provider and model.
+
+    Written by app/services/latency_sketch.py; merge rows with
+    ``latency_sketch.summarize`` to get percentiles for any range.
+    """
+
+    __tablename__ = "latency_sketches"
+
+    bucket = Column(DateTime(timezone=True), primary_key=True)  # UTC bucket start
+    llm_provider = Column(String, primary_key=True)  # Provider name
+    model = Column(String, primary_key=True)  # "" for the provider default
+    worker_id = Column(String(100), primary_key=True)  # host:pid:nonce
+
+    sample_count = Column(BigInteger, nullable=False, default=0)  # Successful calls
+    error_count = Column(BigInteger, nullable=False, default=0)  # Failed calls
+    sketch = Column(JSON, nullable=False)  # LatencySketch.to_dict()
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
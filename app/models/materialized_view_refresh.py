@@ -0,0 +1,17 @@
+from sqlalchemy import Column, DateTime, Float, String
+from app.db.session import Base
+
+
+class MaterializedViewRefresh(Base):
+    """
+    When each materialized view was last refreshed.
+
+    Written by app/db/materialized_views.py in the refresh's transaction, so
+    ``refreshed_at`` is the time the view's data is current as of.
+    """
+
+    __tablename__ = "materialized_view_refreshes"
+
+    view_name = Column(String, primary_key=True)
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+    duration_seconds = Column(Float, nullable=False)
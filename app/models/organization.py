@@ -1,5 +1,5 @@
 # app/models/organization.py
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, JSON
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -21,6 +21,9 @@ class Organization(Base):
     api_key = Column(
         String, unique=True, nullable=False, index=True
     )  # Consider encrypting before storing
+    config = Column(
+        JSON, nullable=False, server_default="{}"
+    )  # Per-org feature settings, e.g. {"response_cache": false}
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(
@@ -1,5 +1,5 @@
 # app/models/prompt.py
-from sqlalchemy import Column, String, Text, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, String, Text, ForeignKey, DateTime, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -9,14 +9,20 @@ import uuid
 
 class Prompt(Base):
     __tablename__ = "prompts"
-
-    id = Column(
-        UUID(as_uuid=True),
-        primary_key=True,
-        default=uuid.uuid4,
-        unique=True,
-        index=True,
+    # Range-partitioned by month on created_at (see app/db/partitions.py), so
+    # the primary key includes created_at; the ORM identifies rows by id.
+    __table_args__ = (
+        # Keyset pagination of a user's / organization's prompts, newest first
+        Index("ix_prompts_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index(
+            "ix_prompts_organization_id_created_at_id",
+            "organization_id",
+            "created_at",
+            "id",
+        ),
     )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     content = Column(Text, nullable=False)  # Ensure content is always required
     parameters = Column(
         JSON, nullable=False, server_default="{}"
@@ -31,13 +37,24 @@ class Prompt(Base):
         nullable=True,
     )
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(
+        DateTime(timezone=True),
+        primary_key=True,
+        server_default=func.now(),
+        index=True,
+    )
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
+    __mapper_args__ = {"primary_key": [id]}
+
     # Relationships
     user = relationship("User", back_populates="prompts")
+    # No foreign key: a partitioned table cannot be referenced by id alone
     responses = relationship(
-        "Response", back_populates="prompt", cascade="all, delete-orphan"
+        "Response",
+        primaryjoin="Prompt.id == foreign(Response.prompt_id)",
+        back_populates="prompt",
+        cascade="all, delete-orphan",
     )
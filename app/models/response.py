@@ -1,30 +1,47 @@
 # app/models/response.py
-from sqlalchemy import Column, Text, ForeignKey, DateTime, JSON, Float, Integer
+from sqlalchemy import (
+    Column,
+    Text,
+    ForeignKey,
+    DateTime,
+    JSON,
+    Float,
+    Integer,
+    Boolean,
+    Index,
+    String,
+)
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from app.db import blob_store
 from app.db.session import Base
 import uuid
 
 
 class Response(Base):
     __tablename__ = "responses"
-
-    id = Column(
-        UUID(as_uuid=True),
-        primary_key=True,
-        default=uuid.uuid4,
-        unique=True,
-        index=True,
+    # Range-partitioned by month on created_at like prompts
+    __table_args__ = (
+        # Newest response per prompt; the prefix also serves per-prompt counts
+        Index("ix_responses_prompt_id_created_at", "prompt_id", "created_at"),
+        # Per-provider usage over a time range
+        Index(
+            "ix_responses_llm_provider_id_created_at", "llm_provider_id", "created_at"
+        ),
     )
-    content = Column(Text, nullable=False)  # Ensure content is always required
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Inline body, or NULL when it was offloaded to the blob store and only
+    # content_ref ("zstd:<sha256>") is kept; read it through ``content``.
+    _content = Column("content", Text, nullable=True)
+    content_ref = Column(String(80), nullable=True)
     metadata = Column(
         JSON, nullable=False, server_default="{}"
     )  # Default to empty JSON
 
-    prompt_id = Column(
-        UUID(as_uuid=True), ForeignKey("prompts.id", ondelete="CASCADE"), nullable=False
-    )
+    prompt_id = Column(UUID(as_uuid=True), nullable=False)  # prompts.id
     llm_provider_id = Column(
         UUID(as_uuid=True),
         ForeignKey("llm_providers.id", ondelete="SET NULL"),
@@ -32,13 +49,45 @@ class Response(Base):
     )
 
     latency = Column(Float, default=0.0)  # Default latency to 0.0 seconds
+    time_to_first_token = Column(Float, nullable=True)  # Only set for streamed replies
     token_count = Column(Integer, default=0)  # Default token count to 0
+    is_cached = Column(Boolean, default=False)  # Served from the response cache
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(
+        DateTime(timezone=True),
+        primary_key=True,
+        server_default=func.now(),
+        index=True,
+    )
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
+    __mapper_args__ = {"primary_key": [id]}
+
+    @hybrid_property
+    def content(self):
+        """The response body, fetched from the blob store on first access."""
+        if self._content is not None or self.content_ref is None:
+            return self._content
+        body = self.__dict__.get("_loaded_content")
+        if body is None:
+            body = blob_store.response_bodies.load(self.content_ref)
+            self.__dict__["_loaded_content"] = body
+        return body
+
+    @content.setter
+    def content(self, value):
+        self._content = value
+
+    @content.expression
+    def content(cls):
+        return cls._content
+
     # Relationships
-    prompt = relationship("Prompt", back_populates="responses")
+    prompt = relationship(
+        "Prompt",
+        primaryjoin="Prompt.id == foreign(Response.prompt_id)",
+        back_populates="responses",
+    )
     llm_provider = relationship("LLMProvider", back_populates="responses")
@@ -0,0 +1,37 @@
+# app/models/usage_rollup.py
+from sqlalchemy import BigInteger, Column, DateTime, Float, String
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.session import Base
+import uuid
+
+# Stands in for "no organization" / "no provider": key columns cannot be NULL
+# because Postgres 14 treats NULLs as distinct in the ON CONFLICT target.
+NO_ID = uuid.UUID(int=0)
+
+
+class UsageRollupMixin:
+    """
+    Usage totals per bucket, organization, user, provider and model.
+
+    Maintained by app/services/usage_rollups.py as responses are stored;
+    ``python -m app.cli rollups rebuild`` recomputes them from responses.
+    """
+
+    bucket = Column(DateTime(timezone=True), primary_key=True)  # UTC bucket start
+    organization_id = Column(UUID(as_uuid=True), primary_key=True)  # NO_ID if none
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    llm_provider_id = Column(UUID(as_uuid=True), primary_key=True)  # NO_ID if none
+    model = Column(String, primary_key=True)  # "" if unknown
+
+    prompt_count = Column(BigInteger, nullable=False, default=0)  # Stored responses
+    cached_count = Column(BigInteger, nullable=False, default=0)
+    token_count = Column(BigInteger, nullable=False, default=0)
+    latency_sum = Column(Float, nullable=False, default=0.0)  # Seconds
+
+
+class UsageRollupHourly(UsageRollupMixin, Base):
+    __tablename__ = "usage_rollups_hourly"
+
+
+class UsageRollupDaily(UsageRollupMixin, Base):
+    __tablename__ = "usage_rollups_daily"
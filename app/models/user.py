@@ -29,6 +29,7 @@ class User(Base):
         UUID(as_uuid=True),
         ForeignKey("organizations.id", ondelete="SET NULL"),
         nullable=True,
+        index=True,
     )
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
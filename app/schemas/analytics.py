@@ -0,0 +1,83 @@
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+from uuid import UUID
+
+
+# Prompt and token usage of one user
+class UserUsage(BaseModel):
+    user_id: UUID
+    email: str
+    prompt_count: int
+    total_tokens_used: int
+
+
+# Prompts answered for one user
+class UserPromptCount(BaseModel):
+    user_id: UUID
+    email: str
+    prompt_count: int
+
+
+# Prompt and token usage of one organization
+class OrganizationUsage(BaseModel):
+    organization_id: Optional[UUID] = None
+    prompt_count: int
+    total_tokens_used: int
+
+
+# Upstream latency (seconds) and errors of one provider and model
+class LatencyPercentiles(BaseModel):
+    llm_provider: str
+    model: str
+    count: int
+    error_count: int
+    mean: Optional[float] = None
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+
+
+# Reports read from a materialized view, with when it was last refreshed
+class ViewReport(BaseModel):
+    refreshed_at: Optional[datetime] = None
+    age_seconds: Optional[float] = None
+
+
+# Prompt and token usage of one organization on one UTC day
+class OrganizationDailyUsage(BaseModel):
+    day: datetime
+    organization_id: Optional[UUID] = None
+    prompt_count: int
+    cached_count: int
+    total_tokens_used: int
+
+
+class OrganizationDailyUsageReport(ViewReport):
+    data: List[OrganizationDailyUsage]
+
+
+# Upstream calls and failures of one provider and model
+class ProviderErrorRate(BaseModel):
+    llm_provider: str
+    model: str
+    call_count: int
+    error_count: int
+    error_rate: float
+
+
+class ProviderErrorReport(ViewReport):
+    data: List[ProviderErrorRate]
+
+
+# Prompt and token usage of one team's current members
+class TeamUsage(BaseModel):
+    team_id: UUID
+    team_name: str
+    organization_id: UUID
+    prompt_count: int
+    total_tokens_used: int
+
+
+class TeamUsageReport(ViewReport):
+    data: List[TeamUsage]
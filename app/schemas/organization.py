@@ -1,12 +1,13 @@
 from pydantic import BaseModel
 from uuid import UUID
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
 
 # Shared properties
 class OrganizationBase(BaseModel):
     name: str
+    config: Dict = {}
 
 
 # Properties to receive via API on creation
@@ -17,6 +18,7 @@ class OrganizationCreate(OrganizationBase):
 # Properties received via API on update
 class OrganizationUpdate(BaseModel):
     name: Optional[str] = None
+    config: Optional[Dict] = None
 
 
 # Properties shared by models stored in DB
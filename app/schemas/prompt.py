@@ -1,5 +1,6 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
+from enum import Enum
 from pydantic import BaseModel
 from uuid import UUID
 
@@ -15,6 +16,8 @@ class PromptBase(BaseModel):
 class PromptCreate(PromptBase):
     user_id: UUID
     organization_id: Optional[UUID] = None
+    # Tried in order if llm_provider fails; defaults to the org's fallbacks
+    fallback_providers: Optional[List[str]] = None
 
 
 # Properties returned in API responses
@@ -39,3 +42,88 @@ class PromptList(PromptBase):
 
     class Config:
         orm_mode = True
+
+
+class FanOutMode(str, Enum):
+    FIRST = "first"  # First successful provider wins, the rest are cancelled
+    ALL = "all"  # Collect every provider that answers before the deadline
+
+
+# Properties to receive when sending one prompt to several providers
+class PromptFanOutCreate(BaseModel):
+    content: str
+    parameters: Dict[str, Any] = {}
+    llm_providers: List[str]
+    mode: FanOutMode = FanOutMode.ALL
+    timeout: Optional[float] = None  # Seconds; defaults to LLM_FAN_OUT_TIMEOUT
+
+
+# Outcome of a single provider in a fan-out
+class FanOutResult(BaseModel):
+    llm_provider: str
+    response_id: Optional[UUID] = None
+    response_content: Optional[str] = None
+    latency: Optional[float] = None
+    token_count: Optional[int] = None
+    error: Optional[str] = None
+
+
+# Properties returned for a fan-out prompt
+class PromptFanOutResponse(BaseModel):
+    prompt_id: UUID
+    prompt_content: str
+    mode: FanOutMode
+    results: List[FanOutResult]
+    created_at: datetime
+
+
+# Properties to receive when routing a prompt across a provider pool
+class PromptRouteCreate(BaseModel):
+    content: str
+    parameters: Dict[str, Any] = {}
+    llm_providers: List[str]  # "provider" or "provider:model" entries
+    hedge: bool = True
+
+
+# Properties returned for a routed prompt
+class PromptRouteResponse(BaseModel):
+    prompt_id: UUID
+    prompt_content: str
+    response_id: UUID
+    response_content: str
+    llm_provider: str  # Provider that actually answered
+    latency: float
+    token_count: int
+    created_at: datetime
+
+
+# One prompt in a batch submission
+class PromptBatchItem(BaseModel):
+    content: str
+    parameters: Dict[str, Any] = {}
+    llm_provider: str
+
+
+# Properties to receive when submitting many prompts at once
+class PromptBatchCreate(BaseModel):
+    items: List[PromptBatchItem]
+    max_concurrency: Optional[int] = None  # Defaults to LLM_BATCH_MAX_CONCURRENCY
+
+
+# Outcome of a single prompt in a batch
+class PromptBatchResult(BaseModel):
+    index: int
+    prompt_id: UUID
+    llm_provider: str
+    response_id: Optional[UUID] = None
+    response_content: Optional[str] = None
+    latency: Optional[float] = None
+    token_count: Optional[int] = None
+    error: Optional[str] = None
+
+
+# Properties returned for a batch submission
+class PromptBatchResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[PromptBatchResult]
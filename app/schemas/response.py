@@ -9,7 +9,9 @@ class ResponseBase(BaseModel):
     content: str
     metadata: Dict[str, Any] = {}  # Default to empty JSON
     latency: float
+    time_to_first_token: Optional[float] = None
     token_count: int
+    is_cached: bool = False
 
 
 # Properties to receive on response creation
@@ -0,0 +1,124 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from app.config import settings
+from app.services.response_cache import TTLCache
+from app.services.singleflight import SingleFlight
+
+# Scope of reports that span every organization
+ALL_ORGANIZATIONS = "*"
+
+
+class AnalyticsCache:
+    """
+    Cache for analytics reports, invalidated by new responses.
+
+    Results are kept for ``ttl_seconds``. When a response is stored,
+    cached reports covering its organization (and the unscoped ones) become
+    stale, but a stale result is still served until it is ``stale_after``
+    seconds old. A steady stream of writes therefore costs at most one
+    aggregate per report every ``stale_after`` seconds instead of one per
+    dashboard refresh. Reports whose window ended more than
+    ``settle_seconds`` before they were computed cannot change and ignore
+    writes; the margin covers rows still on their way (replica lag, queued
+    write-behind batches). Concurrent misses for the same report share one
+    query.
+
+    Invalidation only sees writes made by this process; other workers'
+    writes are picked up when entries expire.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 60.0,
+        stale_after: float = 5.0,
+        max_entries: int = 1000,
+        settle_seconds: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+        now: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ):
+        self.stale_after = stale_after
+        self.settle = timedelta(seconds=settle_seconds)
+        self.clock = clock
+        self.now = now
+        self._results = TTLCache(max_entries, ttl_seconds, clock=clock)
+        self._last_write: Dict[Any, float] = {}
+        self._last_unscoped_write = float("-inf")
+        self._in_flight = SingleFlight()
+        self.stale_misses = 0
+
+    def record_write(self, organization_id: Any = None) -> None:
+        """
+        Note that a response for ``organization_id`` was committed.
+
+        None means the organization is unknown and affects every report.
+        """
+        written_at = self.clock()
+        if organization_id is None:
+            self._last_unscoped_write = written_at
+        else:
+            self._last_write[organization_id] = written_at
+            self._last_write[ALL_ORGANIZATIONS] = written_at
+
+    async def get_or_compute(
+        self,
+        report: str,
+        organization_id: Any,
+        until: Optional[datetime],
+        params: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        A cached report, or ``compute()``'s result stored for next time.
+
+        Args:
+            report: Name of the report
+            organization_id: Organization the report is limited to, or None
+            until: End of the report's window (None = open-ended)
+            params: Any other arguments that change the result
+            compute: Coroutine factory producing the report
+        """
+        key = (report, organization_id, until, params)
+        entry = self._results.get(key)
+        if entry is not None:
+            computed_at, closed, value = entry
+            scope = ALL_ORGANIZATIONS if organization_id is None else organization_id
+            written_at = max(
+                self._last_write.get(scope, float("-inf")), self._last_unscoped_write
+            )
+            if (
+                closed
+                or written_at < computed_at
+                or self.clock() - computed_at < self.stale_after
+            ):
+                return value
+            self.stale_misses += 1
+
+        async def load() -> Any:
+            computed_at, started = self.clock(), self.now()
+            value = await compute()
+            closed = until is not None and until <= started - self.settle
+            self._results.set(key, (computed_at, closed, value))
+            return value
+
+        return await self._in_flight.do(key, load)
+
+    def clear(self) -> None:
+        self._results.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._results.stats(),
+            "stale_misses": self.stale_misses,
+            "coalescing": self._in_flight.stats(),
+        }
+
+
+analytics_cache = AnalyticsCache(
+    ttl_seconds=settings.ANALYTICS_CACHE_TTL_SECONDS,
+    stale_after=settings.ANALYTICS_CACHE_STALE_AFTER_SECONDS,
+    max_entries=settings.ANALYTICS_CACHE_MAX_ENTRIES,
+    settle_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS
+    + settings.RESPONSE_WRITE_FLUSH_INTERVAL,
+)
@@ -1,34 +1,93 @@
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from sqlalchemy.orm import Query, Session
 from sqlalchemy.sql import func
-from typing import List, Dict, Any
-from app.models.prompt import Prompt
-from app.models.response import Response
+from typing import List, Dict, Any, Optional, Type
+from app.db import materialized_views as views
+from app.models.latency_sketch import LatencySketchSnapshot
+from app.models.materialized_view_refresh import MaterializedViewRefresh
+from app.models.team import Team
+from app.models.usage_rollup import NO_ID, UsageRollupDaily, UsageRollupHourly
 from app.models.user import User
+from app.services import latency_sketch
+from app.services.usage_rollups import bucket_start
 
 
 class AnalyticsService:
-    """Service for tracking and analyzing AI API usage."""
+    """
+    Service for tracking and analyzing AI API usage.
+
+    Reports read the hourly/daily usage rollups (see
+    app/services/usage_rollups.py) instead of joining users, prompts and
+    responses over all history. A prompt counts once per stored response.
+
+    ``since``/``until`` bound a report to a time range. Ranges of whole UTC
+    days read the daily rollups; other bounds read the hourly ones and apply
+    to whole hours (buckets starting in [since, until)).
+
+    The organization, provider-error and team reports read materialized
+    views refreshed in the background (app/db/materialized_views.py) and
+    return ``{"data": [...], "refreshed_at": ..., "age_seconds": ...}`` so
+    callers can tell how current they are.
+
+    Reports only read, so callers should pass a ``get_read_db`` session,
+    which goes to a read replica when one is caught up.
+    """
 
     @staticmethod
-    def generate_usage_report(db: Session) -> List[Dict[str, Any]]:
+    def _rollup(
+        since: Optional[datetime], until: Optional[datetime]
+    ) -> Type[UsageRollupDaily]:
+        """The coarsest rollup that can answer the range."""
+        for bound in (since, until):
+            if bound is not None and bucket_start(bound, "day") != bound:
+                return UsageRollupHourly
+        return UsageRollupDaily
+
+    @staticmethod
+    def _between(
+        query: Query,
+        rollup: Any,
+        since: Optional[datetime],
+        until: Optional[datetime],
+        organization_id: Any = None,
+    ) -> Query:
+        """Restrict the rollup to buckets in [since, until) and one organization."""
+        if organization_id is not None:
+            query = query.filter(rollup.organization_id == organization_id)
+        if since is not None:
+            query = query.filter(rollup.bucket >= since)
+        if until is not None:
+            query = query.filter(rollup.bucket < until)
+        return query
+
+    @staticmethod
+    def generate_usage_report(
+        db: Session,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        organization_id: Any = None,
+    ) -> List[Dict[str, Any]]:
         """
         Generate a report of user prompt activity.
 
         Args:
             db (Session): Database session.
+            since (datetime, optional): Only count activity from this time on.
+            until (datetime, optional): Only count activity before this time.
+            organization_id (UUID, optional): Only count this organization.
 
         Returns:
             List[Dict[str, Any]]: List of users with their prompt and token usage.
         """
+        rollup = AnalyticsService._rollup(since, until)
+        query = db.query(
+            User.id.label("user_id"),
+            User.email.label("email"),
+            func.sum(rollup.prompt_count).label("prompt_count"),
+            func.sum(rollup.token_count).label("total_tokens_used"),
+        ).join(rollup, User.id == rollup.user_id)
         results = (
-            db.query(
-                User.id.label("user_id"),
-                User.email.label("email"),
-                func.count(Prompt.id).label("prompt_count"),
-                func.sum(Response.token_count).label("total_tokens_used"),
-            )
-            .join(Prompt, User.id == Prompt.user_id)
-            .join(Response, Prompt.id == Response.prompt_id)
+            AnalyticsService._between(query, rollup, since, until, organization_id)
             .group_by(User.id, User.email)
             .all()
         )
@@ -45,27 +104,36 @@ class AnalyticsService:
 
     @staticmethod
     def get_top_users_by_prompt_count(
-        db: Session, limit: int = 5
+        db: Session,
+        limit: int = 5,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        organization_id: Any = None,
     ) -> List[Dict[str, Any]]:
         """
-        Get the top users based on the number of prompts submitted.
+        Get the top users based on the number of prompts answered.
 
         Args:
             db (Session): Database session.
             limit (int, optional): Number of top users to return. Defaults to 5.
+            since (datetime, optional): Only count prompts from this time on.
+            until (datetime, optional): Only count prompts before this time.
+            organization_id (UUID, optional): Only count this organization.
 
         Returns:
             List[Dict[str, Any]]: List of users with their prompt count.
         """
+        rollup = AnalyticsService._rollup(since, until)
+        prompt_count = func.sum(rollup.prompt_count)
+        query = db.query(
+            User.id.label("user_id"),
+            User.email.label("email"),
+            prompt_count.label("prompt_count"),
+        ).join(rollup, User.id == rollup.user_id)
         results = (
-            db.query(
-                User.id.label("user_id"),
-                User.email.label("email"),
-                func.count(Prompt.id).label("prompt_count"),
-            )
-            .join(Prompt, User.id == Prompt.user_id)
+            AnalyticsService._between(query, rollup, since, until, organization_id)
             .group_by(User.id, User.email)
-            .order_by(func.count(Prompt.id).desc())
+            .order_by(prompt_count.desc())
             .limit(limit)
             .all()
         )
@@ -80,33 +148,232 @@ class AnalyticsService:
         ]
 
     @staticmethod
-    def get_token_usage_by_organization(db: Session) -> List[Dict[str, Any]]:
+    def get_token_usage_by_organization(
+        db: Session,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        organization_id: Any = None,
+    ) -> List[Dict[str, Any]]:
         """
         Get total LLM token usage for each organization.
 
         Args:
             db (Session): Database session.
+            since (datetime, optional): Only count activity from this time on.
+            until (datetime, optional): Only count activity before this time.
+            organization_id (UUID, optional): Only count this organization.
 
         Returns:
             List[Dict[str, Any]]: List of organizations with token consumption.
         """
+        rollup = AnalyticsService._rollup(since, until)
+        query = db.query(
+            rollup.organization_id.label("organization_id"),
+            func.sum(rollup.prompt_count).label("prompt_count"),
+            func.sum(rollup.token_count).label("total_tokens_used"),
+        )
         results = (
-            db.query(
-                User.organization_id.label("organization_id"),
-                func.count(Prompt.id).label("prompt_count"),
-                func.sum(Response.token_count).label("total_tokens_used"),
-            )
-            .join(Prompt, User.id == Prompt.user_id)
-            .join(Response, Prompt.id == Response.prompt_id)
-            .group_by(User.organization_id)
+            AnalyticsService._between(query, rollup, since, until, organization_id)
+            .group_by(rollup.organization_id)
             .all()
         )
 
         return [
             {
-                "organization_id": row.organization_id,
+                "organization_id": (
+                    None if row.organization_id == NO_ID else row.organization_id
+                ),
                 "prompt_count": row.prompt_count,
                 "total_tokens_used": row.total_tokens_used or 0,
             }
             for row in results
         ]
+
+    @staticmethod
+    def get_latency_percentiles(
+        db: Session,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        llm_provider: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get p50/p95/p99 latency and error counts per provider and model.
+
+        Merges the latency sketches saved by every worker for buckets starting
+        in [since, until). The current bucket lags by up to one snapshot
+        interval.
+
+        Args:
+            db (Session): Database session.
+            since (datetime, optional): Only count calls from this time on.
+            until (datetime, optional): Only count calls before this time.
+            llm_provider (str, optional): Only this provider.
+            model (str, optional): Only this model.
+
+        Returns:
+            List[Dict[str, Any]]: Call counts and latency percentiles in seconds.
+        """
+        query = db.query(
+            LatencySketchSnapshot.llm_provider,
+            LatencySketchSnapshot.model,
+            LatencySketchSnapshot.error_count,
+            LatencySketchSnapshot.sketch,
+        )
+        if llm_provider is not None:
+            query = query.filter(LatencySketchSnapshot.llm_provider == llm_provider)
+        if model is not None:
+            query = query.filter(LatencySketchSnapshot.model == model)
+        if since is not None:
+            query = query.filter(LatencySketchSnapshot.bucket >= since)
+        if until is not None:
+            query = query.filter(LatencySketchSnapshot.bucket < until)
+        return latency_sketch.summarize(query.yield_per(1000))
+
+    @staticmethod
+    def _with_freshness(
+        db: Session, view: Any, data: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Report rows with the time their view was last refreshed."""
+        refreshed_at = (
+            db.query(MaterializedViewRefresh.refreshed_at)
+            .filter(MaterializedViewRefresh.view_name == view.name)
+            .scalar()
+        )
+        age = None
+        if refreshed_at is not None:
+            age = (datetime.now(timezone.utc) - refreshed_at).total_seconds()
+        return {"data": data, "refreshed_at": refreshed_at, "age_seconds": age}
+
+    @staticmethod
+    def get_daily_usage_by_organization(
+        db: Session,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        organization_id: Any = None,
+    ) -> Dict[str, Any]:
+        """
+        Get prompts and tokens per organization and UTC day.
+
+        Args:
+            db (Session): Database session.
+            since (datetime, optional): Only days starting from this time on.
+            until (datetime, optional): Only days starting before this time.
+            organization_id (UUID, optional): Only this organization.
+
+        Returns:
+            Dict[str, Any]: Daily usage rows and the view's freshness.
+        """
+        view = views.organization_daily_usage
+        query = db.query(view)
+        if organization_id is not None:
+            query = query.filter(view.c.organization_id == organization_id)
+        if since is not None:
+            query = query.filter(view.c.day >= since)
+        if until is not None:
+            query = query.filter(view.c.day < until)
+        data = [
+            {
+                "day": row.day,
+                "organization_id": (
+                    None if row.organization_id == NO_ID else row.organization_id
+                ),
+                "prompt_count": row.prompt_count,
+                "cached_count": row.cached_count,
+                "total_tokens_used": row.token_count,
+            }
+            for row in query.order_by(view.c.day, view.c.organization_id)
+        ]
+        return AnalyticsService._with_freshness(db, view, data)
+
+    @staticmethod
+    def get_provider_error_rates(
+        db: Session,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get the share of failed upstream calls per provider and model.
+
+        Args:
+            db (Session): Database session.
+            since (datetime, optional): Only days starting from this time on.
+            until (datetime, optional): Only days starting before this time.
+
+        Returns:
+            Dict[str, Any]: Call and error counts per provider and model and
+            the view's freshness.
+        """
+        view = views.provider_daily_errors
+        query = db.query(
+            view.c.llm_provider,
+            view.c.model,
+            func.sum(view.c.success_count).label("success_count"),
+            func.sum(view.c.error_count).label("error_count"),
+        )
+        if since is not None:
+            query = query.filter(view.c.day >= since)
+        if until is not None:
+            query = query.filter(view.c.day < until)
+        data = []
+        for row in query.group_by(view.c.llm_provider, view.c.model).order_by(
+            view.c.llm_provider, view.c.model
+        ):
+            calls = row.success_count + row.error_count
+            data.append(
+                {
+                    "llm_provider": row.llm_provider,
+                    "model": row.model,
+                    "call_count": calls,
+                    "error_count": row.error_count,
+                    "error_rate": row.error_count / calls if calls else 0.0,
+                }
+            )
+        return AnalyticsService._with_freshness(db, view, data)
+
+    @staticmethod
+    def get_usage_by_team(
+        db: Session,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        organization_id: Any = None,
+    ) -> Dict[str, Any]:
+        """
+        Get prompts and tokens of each team's current members.
+
+        Args:
+            db (Session): Database session.
+            since (datetime, optional): Only days starting from this time on.
+            until (datetime, optional): Only days starting before this time.
+            organization_id (UUID, optional): Only this organization's teams.
+
+        Returns:
+            Dict[str, Any]: Usage per team and the view's freshness.
+        """
+        view = views.team_daily_usage
+        query = db.query(
+            view.c.team_id,
+            Team.name.label("team_name"),
+            view.c.organization_id,
+            func.sum(view.c.prompt_count).label("prompt_count"),
+            func.sum(view.c.token_count).label("total_tokens_used"),
+        ).join(Team, Team.id == view.c.team_id)
+        if organization_id is not None:
+            query = query.filter(view.c.organization_id == organization_id)
+        if since is not None:
+            query = query.filter(view.c.day >= since)
+        if until is not None:
+            query = query.filter(view.c.day < until)
+        data = [
+            {
+                "team_id": row.team_id,
+                "team_name": row.team_name,
+                "organization_id": row.organization_id,
+                "prompt_count": row.prompt_count,
+                "total_tokens_used": row.total_tokens_used,
+            }
+            for row in query.group_by(
+                view.c.team_id, Team.name, view.c.organization_id
+            ).order_by(func.sum(view.c.token_count).desc())
+        ]
+        return AnalyticsService._with_freshness(db, view, data)
@@ -0,0 +1,204 @@
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+    def __init__(self, provider_name: str, retry_after: float):
+        super().__init__(
+            f"LLM provider '{provider_name}' is unavailable (circuit open), "
+            f"retry in {retry_after:.0f}s"
+        )
+        self.provider_name = provider_name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker for one provider.
+
+    While closed, the outcome of the last ``window_size`` calls is kept. Once
+    at least ``min_calls`` are recorded and either the error rate or the
+    share of calls slower than ``slow_call_seconds`` reaches its threshold,
+    the circuit opens and calls fail immediately. After ``open_seconds`` it
+    goes half-open and lets ``half_open_max_calls`` trial calls through: a
+    success closes it again, a failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        provider_name: str,
+        window_size: int = 20,
+        min_calls: int = 5,
+        error_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 30.0,
+        slow_call_rate_threshold: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.provider_name = provider_name
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        # (failed, slow) per call
+        self._calls: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() >= self._opened_at + self.open_seconds:
+            self._state = HALF_OPEN
+            self._trials = 0
+        return self._state
+
+    def is_open(self) -> bool:
+        return self.state == OPEN
+
+    def before_call(self) -> None:
+        """
+        Admit a call, or fail fast.
+
+        Every admitted call must end in :meth:`record_success`,
+        :meth:`record_failure` or :meth:`release`.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with its
+                trial calls already in flight
+        """
+        state = self.state
+        if state == OPEN:
+            raise CircuitOpenError(self.provider_name, self._retry_after())
+        if state == HALF_OPEN:
+            if self._trials >= self.half_open_max_calls:
+                raise CircuitOpenError(self.provider_name, self._retry_after())
+            self._trials += 1
+
+    def record_success(self, latency: float) -> None:
+        slow = latency >= self.slow_call_seconds
+        if self._state == OPEN:
+            return  # Admitted before the circuit opened
+        if self._state == HALF_OPEN:
+            self._trials = max(0, self._trials - 1)
+            if slow:
+                self._open()
+            else:
+                self._close()
+            return
+        self._calls.append((False, slow))
+        self._evaluate()
+
+    def record_failure(self) -> None:
+        if self._state == OPEN:
+            return
+        if self._state == HALF_OPEN:
+            self._trials = max(0, self._trials - 1)
+            self._open()
+            return
+        self._calls.append((True, False))
+        self._evaluate()
+
+    def release(self) -> None:
+        """End an admitted call without an outcome (cancelled or never sent)."""
+        if self._state == HALF_OPEN:
+            self._trials = max(0, self._trials - 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        calls = len(self._calls)
+        return {
+            "llm_provider": self.provider_name,
+            "state": self.state,
+            "calls": calls,
+            "error_rate": self._rate(0),
+            "slow_call_rate": self._rate(1),
+            "times_opened": self.times_opened,
+            "retry_after": self._retry_after() if self._state == OPEN else None,
+        }
+
+    def _evaluate(self) -> None:
+        if len(self._calls) < self.min_calls:
+            return
+        if (
+            self._rate(0) >= self.error_rate_threshold
+            or self._rate(1) >= self.slow_call_rate_threshold
+        ):
+            self._open()
+
+    def _rate(self, index: int) -> float:
+        if not self._calls:
+            return 0.0
+        return sum(1 for call in self._calls if call[index]) / len(self._calls)
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._calls.clear()
+        self.times_opened += 1
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._calls.clear()
+
+    def _retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.open_seconds - self._clock())
+
+
+class CircuitBreakerRegistry:
+    """
+    One CircuitBreaker per provider.
+
+    Thresholds default to the registry's settings and can be overridden per
+    provider with a ``"circuit_breaker"`` object in ``LLMProvider.config``,
+    e.g. ``{"circuit_breaker": {"slow_call_seconds": 10}}``.
+    """
+
+    SETTINGS = (
+        "window_size",
+        "min_calls",
+        "error_rate_threshold",
+        "slow_call_seconds",
+        "slow_call_rate_threshold",
+        "open_seconds",
+        "half_open_max_calls",
+    )
+
+    def __init__(self, **defaults: Any):
+        self.defaults = defaults
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._overrides: Dict[str, Dict[str, Any]] = {}
+
+    def configure(self, provider_name: str, config: Optional[Dict[str, Any]]) -> None:
+        """Apply a provider's overrides; the breaker is rebuilt only if they changed."""
+        overrides = {
+            key: value
+            for key, value in ((config or {}).get("circuit_breaker") or {}).items()
+            if key in self.SETTINGS
+        }
+        if self._overrides.get(provider_name, {}) != overrides:
+            self._overrides[provider_name] = overrides
+            self._breakers.pop(provider_name, None)
+
+    def get(self, provider_name: str) -> CircuitBreaker:
+        if provider_name not in self._breakers:
+            self._breakers[provider_name] = CircuitBreaker(
+                provider_name,
+                **{**self.defaults, **self._overrides.get(provider_name, {})},
+            )
+        return self._breakers[provider_name]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """State of every provider's breaker seen so far."""
+        return [breaker.snapshot() for breaker in self._breakers.values()]
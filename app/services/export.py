@@ -0,0 +1,187 @@
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.blob_store import response_bodies
+from app.models.prompt import Prompt
+from app.models.response import Response
+
+FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+_responses = Response.__table__
+_prompts = Prompt.__table__
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _json(value: Any) -> Optional[str]:
+    return None if value is None else json.dumps(value, default=str)
+
+
+def _same(value: Any) -> Any:
+    return value
+
+
+# name: (selected column, Arrow type, conversion of the fetched value)
+COLUMNS: Dict[str, Tuple[Any, pa.DataType, Callable[[Any], Any]]] = {
+    "response_id": (_responses.c.id, pa.string(), _text),
+    "prompt_id": (_responses.c.prompt_id, pa.string(), _text),
+    "user_id": (_prompts.c.user_id, pa.string(), _text),
+    "organization_id": (_prompts.c.organization_id, pa.string(), _text),
+    "llm_provider_id": (_responses.c.llm_provider_id, pa.string(), _text),
+    "prompt": (_prompts.c.content, pa.large_string(), _same),
+    "parameters": (_prompts.c.parameters, pa.string(), _json),
+    "response": (_responses.c.content, pa.large_string(), _same),
+    "metadata": (_responses.c.metadata, pa.string(), _json),
+    "latency": (_responses.c.latency, pa.float64(), _same),
+    "time_to_first_token": (_responses.c.time_to_first_token, pa.float64(), _same),
+    "token_count": (_responses.c.token_count, pa.int64(), _same),
+    "is_cached": (_responses.c.is_cached, pa.bool_(), _same),
+    "prompt_created_at": (_prompts.c.created_at, pa.timestamp("us", "UTC"), _same),
+    "created_at": (_responses.c.created_at, pa.timestamp("us", "UTC"), _same),
+}
+
+
+def schema(columns: Optional[Sequence[str]] = None) -> pa.Schema:
+    """
+    Arrow schema of an export with ``columns`` (default: all of them).
+
+    Raises:
+        ValueError: If a column is not exportable
+    """
+    columns = list(columns or COLUMNS)
+    unknown = [name for name in columns if name not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown export column(s): {', '.join(unknown)}")
+    return pa.schema([(name, COLUMNS[name][1]) for name in columns])
+
+
+def export_query(
+    columns: Sequence[str],
+    organization_id: Any = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Any:
+    """
+    Responses joined to their prompts, in [since, until) by response time.
+
+    Selects ``content_ref`` after the requested columns when the response
+    body is exported, so offloaded bodies can be loaded.
+    """
+    selected = [COLUMNS[name][0].label(name) for name in columns]
+    if "response" in columns:
+        selected.append(_responses.c.content_ref)
+    query = (
+        select(*selected)
+        .select_from(_responses)
+        .join(_prompts, _prompts.c.id == _responses.c.prompt_id)
+        .order_by(_responses.c.created_at)
+    )
+    if organization_id is not None:
+        query = query.where(_prompts.c.organization_id == organization_id)
+    if since is not None:
+        query = query.where(_responses.c.created_at >= since)
+    if until is not None:
+        # A prompt is older than its responses, so this prunes prompt partitions
+        query = query.where(
+            _responses.c.created_at < until, _prompts.c.created_at < until
+        )
+    return query
+
+
+def _record_batch(rows: List[Any], export_schema: pa.Schema) -> pa.RecordBatch:
+    arrays = []
+    for position, field in enumerate(export_schema):
+        convert = COLUMNS[field.name][2]
+        values = [convert(row[position]) for row in rows]
+        if field.name == "response":
+            values = [
+                (
+                    response_bodies.load(row.content_ref)
+                    if body is None and row.content_ref
+                    else body
+                )
+                for body, row in zip(values, rows)
+            ]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=export_schema)
+
+
+def record_batches(
+    db: Session,
+    columns: Optional[Sequence[str]] = None,
+    organization_id: Any = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    batch_size: int = settings.EXPORT_BATCH_SIZE,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Stream matching rows as Arrow record batches of up to ``batch_size``.
+
+    Rows come from a server-side cursor (``yield_per``), so only one batch
+    is held in memory at a time.
+    """
+    export_schema = schema(columns)
+    query = export_query(export_schema.names, organization_id, since, until)
+    result = db.execute(query.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        yield _record_batch(rows, export_schema)
+
+
+class _ChunkSink:
+    """Write-only file collecting what Arrow writes until it is drained."""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        yield from chunks
+
+
+def stream(
+    batches: Iterator[pa.RecordBatch], export_schema: pa.Schema, format: str
+) -> Iterator[bytes]:
+    """
+    Encode record batches as a Parquet file or an Arrow IPC stream.
+
+    Output is yielded as each batch is written (one Parquet row group per
+    batch), so nothing beyond the current batch is buffered.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format: {format}")
+    sink = _ChunkSink()
+    if format == "parquet":
+        writer = pq.ParquetWriter(sink, export_schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, export_schema)
+    with writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield from sink.drain()
+    yield from sink.drain()
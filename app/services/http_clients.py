@@ -0,0 +1,89 @@
+import logging
+from typing import Dict
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderClientPool:
+    """
+    Process-wide pool of long-lived HTTP clients, one per LLM provider.
+
+    Each client keeps its own connection pool so keep-alive connections (and
+    HTTP/2 streams) are reused across prompts instead of paying a fresh
+    TCP+TLS handshake on every call.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        write_timeout: float = 10.0,
+        pool_timeout: float = 5.0,
+    ):
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._timeout = httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=write_timeout,
+            pool=pool_timeout,
+        )
+        self._http2 = http2
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def get(self, provider_name: str) -> httpx.AsyncClient:
+        """Return the shared client for a provider, creating it on first use."""
+        client = self._clients.get(provider_name)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self._limits, timeout=self._timeout, http2=self._http2
+            )
+            self._clients[provider_name] = client
+        return client
+
+    async def aclose(self) -> None:
+        """Close every client and drop its pooled connections."""
+        clients, self._clients = self._clients, {}
+        for provider_name, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing HTTP client for {provider_name}: {e}")
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Snapshot connection pool usage for each provider client.
+
+        Returns:
+            Mapping of provider name to open/idle/active connection counts and
+            the number of requests waiting for a connection.
+        """
+        return {
+            provider_name: self._pool_stats(client)
+            for provider_name, client in self._clients.items()
+        }
+
+    def _pool_stats(self, client: httpx.AsyncClient) -> Dict[str, int]:
+        # httpx does not expose pool usage publicly; read it from the
+        # underlying httpcore pool and degrade to zeros if that changes.
+        pool = getattr(client._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        requests = list(getattr(pool, "_requests", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+            "waiting_requests": sum(1 for request in requests if request.is_queued()),
+            "max_connections": self._limits.max_connections,
+            "max_keepalive_connections": self._limits.max_keepalive_connections,
+        }
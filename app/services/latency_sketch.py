@@ -0,0 +1,303 @@
+import asyncio
+import logging
+import math
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.models.latency_sketch import LatencySketchSnapshot
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencySketch:
+    """
+    Latency histogram with logarithmic buckets.
+
+    Every value is counted in the bucket ``ceil(log_gamma(value))``, so any
+    quantile is known to within ``relative_accuracy`` of the true value
+    while memory grows with the spread of latencies, not with the number of
+    calls. Sketches with the same accuracy merge exactly by adding bucket
+    counts, which lets workers and time windows be combined.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-4):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value  # Smaller values are counted as zero
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        """Count one latency in seconds."""
+        if value <= self.min_value:
+            self.zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LatencySketch") -> None:
+        """
+        Add another sketch's counts to this one.
+
+        Raises:
+            ValueError: If the sketches were built with different accuracies
+        """
+        if (other.relative_accuracy, other.min_value) != (
+            self.relative_accuracy,
+            self.min_value,
+        ):
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Latency at quantile ``q`` (0 to 1), or None when empty."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return self.min
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Midpoint (in relative terms) of (gamma^(i-1), gamma^i]
+                value = 2 * self._gamma**index / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form, read back with ``from_dict``."""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "min_value": self.min_value,
+            "buckets": {str(index): count for index, count in self.buckets.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencySketch":
+        sketch = cls(data["relative_accuracy"], data["min_value"])
+        sketch.buckets = {int(index): count for index, count in data["buckets"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if sketch.count:
+            sketch.min, sketch.max = data["min"], data["max"]
+        return sketch
+
+
+# (bucket start, provider name, model)
+SketchKey = Tuple[datetime, str, str]
+
+
+class _Entry:
+    def __init__(self, relative_accuracy: float):
+        self.sketch = LatencySketch(relative_accuracy)
+        self.error_count = 0
+        self.dirty = True
+
+
+class LatencySketches:
+    """
+    This worker's latency sketches per time bucket, provider and model.
+
+    Each worker periodically upserts its cumulative sketch for every bucket
+    it touched into its own ``latency_sketches`` row, so a snapshot can be
+    repeated safely and rows from all workers and buckets merge into
+    percentiles for any range. Buckets that ended and were saved are
+    dropped from memory.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: int = 300,
+        relative_accuracy: float = 0.01,
+        clock: Callable[[], float] = time.time,
+        worker_id: Optional[str] = None,
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.relative_accuracy = relative_accuracy
+        self.clock = clock
+        self.worker_id = (
+            worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+        self._entries: Dict[SketchKey, _Entry] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.snapshots = 0
+        self.failed_snapshots = 0
+
+    def _bucket(self) -> datetime:
+        now = self.clock()
+        return datetime.fromtimestamp(now - now % self.bucket_seconds, tz=timezone.utc)
+
+    def _entry(self, provider_name: str, model: str) -> _Entry:
+        key = (self._bucket(), provider_name, model)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry(self.relative_accuracy)
+        entry.dirty = True
+        return entry
+
+    def record_success(self, provider_name: str, model: str, latency: float) -> None:
+        """Count a successful upstream call and its latency in seconds."""
+        self._entry(provider_name, model).sketch.add(latency)
+
+    def record_failure(self, provider_name: str, model: str) -> None:
+        """Count a failed upstream call."""
+        self._entry(provider_name, model).error_count += 1
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """
+        Rows for every sketch changed since the last call.
+
+        Sketches of earlier buckets that have no new data are forgotten.
+        """
+        current = self._bucket()
+        rows = []
+        for key, entry in list(self._entries.items()):
+            bucket, provider_name, model = key
+            if entry.dirty:
+                entry.dirty = False
+                rows.append(
+                    {
+                        "bucket": bucket,
+                        "llm_provider": provider_name,
+                        "model": model,
+                        "worker_id": self.worker_id,
+                        "sample_count": entry.sketch.count,
+                        "error_count": entry.error_count,
+                        "sketch": entry.sketch.to_dict(),
+                    }
+                )
+            elif bucket < current:
+                del self._entries[key]
+        return rows
+
+    async def snapshot(self, session_factory: Callable[[], Any]) -> int:
+        """Save changed sketches; returns the number of rows written."""
+        rows = self.pending()
+        if not rows:
+            return 0
+        statement = pg_insert(LatencySketchSnapshot.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=["bucket", "llm_provider", "model", "worker_id"],
+            set_={
+                "sample_count": statement.excluded.sample_count,
+                "error_count": statement.excluded.error_count,
+                "sketch": statement.excluded.sketch,
+                "updated_at": func.now(),
+            },
+        )
+        try:
+            async with session_factory() as db:
+                await db.execute(statement, rows)
+                await db.commit()
+        except Exception:
+            # Try again with the next snapshot
+            for row in rows:
+                key = (row["bucket"], row["llm_provider"], row["model"])
+                if key in self._entries:
+                    self._entries[key].dirty = True
+            self.failed_snapshots += 1
+            raise
+        self.snapshots += 1
+        return len(rows)
+
+    async def start(
+        self, session_factory: Callable[[], Any], interval: float = 30.0
+    ) -> None:
+        """Snapshot every ``interval`` seconds in the background."""
+        self._task = asyncio.create_task(self._run(session_factory, interval))
+
+    async def stop(self, session_factory: Callable[[], Any]) -> None:
+        """Stop the background task and save what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._snapshot_logged(session_factory)
+
+    async def _run(self, session_factory: Callable[[], Any], interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self._snapshot_logged(session_factory)
+
+    async def _snapshot_logged(self, session_factory: Callable[[], Any]) -> None:
+        try:
+            await self.snapshot(session_factory)
+        except Exception as e:
+            logger.warning(f"Latency sketch snapshot failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "sketches": len(self._entries),
+            "snapshots": self.snapshots,
+            "failed_snapshots": self.failed_snapshots,
+        }
+
+
+def summarize(
+    rows: Iterable[Any], quantiles: Sequence[float] = QUANTILES
+) -> List[Dict[str, Any]]:
+    """
+    Merge stored snapshot rows into percentiles per provider and model.
+
+    Args:
+        rows: Rows with ``llm_provider``, ``model``, ``error_count`` and
+            ``sketch`` (as stored)
+        quantiles: Quantiles to report, as ``p50``/``p95``/... keys
+
+    Returns:
+        One entry per provider and model, in name order
+    """
+    merged: Dict[Tuple[str, str], Tuple[LatencySketch, List[int]]] = {}
+    for row in rows:
+        sketch = LatencySketch.from_dict(row.sketch)
+        key = (row.llm_provider, row.model)
+        if key in merged:
+            merged[key][0].merge(sketch)
+            merged[key][1][0] += row.error_count
+        else:
+            merged[key] = (sketch, [row.error_count])
+    summary = []
+    for (provider_name, model), (sketch, (errors,)) in sorted(merged.items()):
+        entry = {
+            "llm_provider": provider_name,
+            "model": model,
+            "count": sketch.count,
+            "error_count": errors,
+            "mean": sketch.sum / sketch.count if sketch.count else None,
+        }
+        for q in quantiles:
+            entry[f"p{q * 100:g}"] = sketch.quantile(q)
+        summary.append(entry)
+    return summary
@@ -1,8 +1,14 @@
+import asyncio
+import functools
+import json
 import time
+import uuid
+import weakref
 import httpx
 import logging
-from typing import Dict, Any, Optional, Tuple
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Any, Hashable, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import (
     OPENAI_API_KEY,
@@ -15,22 +21,117 @@ from app.config import (
     GEMINI_API_BASE_URL,
     DEEPSEEK_API_KEY,
     DEEPSEEK_API_BASE_URL,
+    settings,
 )
 from app.models.llm_provider import LLMProvider
 from app.models.prompt import Prompt
 from app.models.response import Response
+from app.db.blob_store import response_bodies
 from app.db.crud.llm_provider import get_provider_by_name
+from app.db.crud.prompt import save_prompt_batch
 from app.db.crud.response import create_response
+from app.db.crud.organization import async_organization_crud
+from app.services.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry
+from app.services.http_clients import ProviderClientPool
+from app.services.response_cache import TTLCache, is_deterministic, make_cache_key
+from app.services.similarity_cache import SimilarityIndex
+from app.services.latency_sketch import LatencySketches
+from app.services.provider_stats import ProviderKey, ProviderStats
+from app.services.rate_limiter import RateLimiterRegistry, parse_retry_after
+from app.services.response_writer import ResponseWriteBuffer
+from app.services.singleflight import SingleFlight
+from app.services.usage_rollups import record_usage
+from app.services.analytics_cache import analytics_cache
 
 logger = logging.getLogger(__name__)
 
+# Model each provider is called with when a request does not name one
+DEFAULT_MODELS = {
+    "openai": "gpt-4o",
+    "anthropic": "claude-3-opus-20240229",
+    "cohere": "command",
+    "gemini": "gemini-pro",
+}
+
 
 class LLMService:
     """Service for interacting with LLM providers"""
 
+    def __init__(self):
+        self.clients = ProviderClientPool(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+            http2=settings.LLM_HTTP_HTTP2,
+            connect_timeout=settings.LLM_HTTP_CONNECT_TIMEOUT,
+            read_timeout=settings.LLM_HTTP_READ_TIMEOUT,
+            write_timeout=settings.LLM_HTTP_WRITE_TIMEOUT,
+            pool_timeout=settings.LLM_HTTP_POOL_TIMEOUT,
+        )
+        self.response_cache = TTLCache(
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+        )
+        self.similar_prompts = SimilarityIndex(
+            max_entries=settings.SIMILARITY_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+        )
+        self.in_flight = SingleFlight()
+        self.provider_stats = ProviderStats(
+            window_size=settings.LLM_ROUTER_WINDOW_SIZE,
+            max_error_rate=settings.LLM_ROUTER_MAX_ERROR_RATE,
+        )
+        self.latency_sketches = LatencySketches(
+            bucket_seconds=settings.LATENCY_SKETCH_BUCKET_SECONDS,
+            relative_accuracy=settings.LATENCY_SKETCH_RELATIVE_ACCURACY,
+        )
+        self.rate_limiters = RateLimiterRegistry(
+            default_max_wait=settings.LLM_RATE_LIMIT_MAX_WAIT
+        )
+        self.circuit_breakers = CircuitBreakerRegistry(
+            window_size=settings.LLM_BREAKER_WINDOW_SIZE,
+            min_calls=settings.LLM_BREAKER_MIN_CALLS,
+            error_rate_threshold=settings.LLM_BREAKER_ERROR_RATE,
+            slow_call_seconds=settings.LLM_BREAKER_SLOW_CALL_SECONDS,
+            slow_call_rate_threshold=settings.LLM_BREAKER_SLOW_CALL_RATE,
+            open_seconds=settings.LLM_BREAKER_OPEN_SECONDS,
+        )
+        self._session_locks: "weakref.WeakKeyDictionary[AsyncSession, asyncio.Lock]"
+        self._session_locks = weakref.WeakKeyDictionary()
+        # Set on startup when RESPONSE_WRITE_BEHIND is enabled
+        self.response_writer: Optional[ResponseWriteBuffer] = None
+
+    async def aclose(self) -> None:
+        """Close pooled provider connections (called on application shutdown)."""
+        await self.clients.aclose()
+
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """Connection pool usage for each provider client."""
+        return self.clients.stats()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the exact and near-duplicate response caches."""
+        return {
+            "exact": self.response_cache.stats(),
+            "similarity": self.similar_prompts.stats(),
+            "coalescing": self.in_flight.stats(),
+        }
+
+    def routing_stats(self) -> List[Dict[str, Any]]:
+        """Rolling latency and error statistics per provider and model."""
+        return self.provider_stats.snapshot()
+
+    def rate_limit_stats(self) -> List[Dict[str, Any]]:
+        """Concurrency, queueing and adaptive rate state per provider."""
+        return self.rate_limiters.stats()
+
+    def circuit_breaker_stats(self) -> List[Dict[str, Any]]:
+        """Circuit state and recent error/slow-call rates per provider."""
+        return self.circuit_breakers.snapshot()
+
     async def process_prompt(
         self,
-        db: Session,
+        db: AsyncSession,
         prompt: Prompt,
         provider_name: str,
         parameters: Optional[Dict[str, Any]] = None,
@@ -47,28 +148,698 @@ class LLMService:
         Returns:
             Response object containing the LLM's response
         """
-        provider = get_provider_by_name(db, name=provider_name)
+        provider = await self._get_provider(db, provider_name)
+        fields = await self._complete(db, prompt, provider_name, provider, parameters)
+        return await self._save_response(db, prompt, fields)
+
+    async def process_prompt_batch(
+        self,
+        db: AsyncSession,
+        items: List[Dict[str, Any]],
+        user_id: Any,
+        organization_id: Any = None,
+        max_concurrency: int = 16,
+    ) -> List[Dict[str, Any]]:
+        """
+        Process many prompts concurrently and store them in one transaction.
+
+        At most ``max_concurrency`` provider calls run at once. Providers are
+        looked up once per distinct name, and every Prompt plus every
+        successful Response is inserted with a single commit instead of one
+        commit per row. A failing item does not affect the others.
+
+        Args:
+            db: Database session
+            items: ``{"content", "llm_provider", "parameters"}`` dicts
+            user_id: Owner of the new prompts
+            organization_id: Organization of the new prompts
+            max_concurrency: Maximum number of in-flight provider calls
+
+        Returns:
+            One ``{"prompt", "llm_provider", "response", "error"}`` dict per
+            item, in input order
+        """
+        prompts = [
+            Prompt(
+                id=uuid.uuid4(),
+                content=item["content"],
+                parameters=item.get("parameters") or {},
+                user_id=user_id,
+                organization_id=organization_id,
+            )
+            for item in items
+        ]
+
+        providers: Dict[str, Any] = {}
+        for name in dict.fromkeys(item["llm_provider"] for item in items):
+            try:
+                providers[name] = await self._get_provider(db, name)
+            except ValueError as e:
+                providers[name] = e
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(prompt: Prompt, item: Dict[str, Any]) -> Dict[str, Any]:
+            name = item["llm_provider"]
+            result = {"prompt": prompt, "llm_provider": name}
+            result.update(response=None, error=None)
+            provider = providers[name]
+            if isinstance(provider, Exception):
+                result["error"] = str(provider)
+                return result
+            async with semaphore:
+                try:
+                    fields = await self._complete(
+                        db, prompt, name, provider, prompt.parameters
+                    )
+                except Exception as e:
+                    logger.warning(f"Batch prompt to {name} failed: {str(e)}")
+                    result["error"] = str(e) or e.__class__.__name__
+                    return result
+            result["response"] = fields
+            return result
+
+        results = await asyncio.gather(
+            *(run(prompt, item) for prompt, item in zip(prompts, items))
+        )
+        answered = [result for result in results if result["response"] is not None]
+        now = datetime.now(timezone.utc)
+        rows = [
+            await response_bodies.offload_fields(
+                {"created_at": now, **result["response"]}
+            )
+            for result in answered
+        ]
+        owners = {
+            prompt.id: (prompt.user_id, prompt.organization_id) for prompt in prompts
+        }
+        async with self._db_lock(db):
+            await record_usage(db, rows, owners)
+            responses = await save_prompt_batch(db, prompts=prompts, responses=rows)
+        if rows:
+            analytics_cache.record_write(organization_id)
+        for result, response in zip(answered, responses):
+            result["response"] = response
+        return results
+
+    async def _get_provider(self, db: AsyncSession, provider_name: str) -> LLMProvider:
+        """Look a provider up and apply its rate-limit and breaker config."""
+        async with self._db_lock(db):
+            provider = await get_provider_by_name(db, name=provider_name)
         if not provider:
             raise ValueError(f"LLM provider '{provider_name}' not found")
+        self.rate_limiters.configure(provider_name.lower(), provider.config)
+        self.circuit_breakers.configure(provider_name.lower(), provider.config)
+        return provider
+
+    async def _complete(
+        self,
+        db: AsyncSession,
+        prompt: Prompt,
+        provider_name: str,
+        provider: LLMProvider,
+        parameters: Optional[Dict[str, Any]],
+        cacheable: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get a completion from the caches or the provider.
+
+        Pass ``cacheable`` when it is already known; otherwise it is looked
+        up on ``db``.
+
+        Returns:
+            The column values of the Response to store (not yet persisted)
+        """
+        cache_key = signature = namespace = threshold = coalesce_key = None
+        if cacheable is None:
+            cacheable = await self._is_cacheable(db, prompt, parameters)
+        if cacheable:
+            # Only requests that could share a cached answer share a call,
+            # and only within one organization
+            coalesce_key = (
+                prompt.organization_id,
+                make_cache_key(provider_name, prompt.content, parameters),
+            )
+            if settings.RESPONSE_CACHE_ENABLED:
+                cache_key = make_cache_key(provider_name, prompt.content, parameters)
+            threshold = self._similarity_threshold(provider)
+            if threshold:
+                signature = self.similar_prompts.signature(prompt.content)
+                # Same provider, model and parameters; any prompt content
+                namespace = make_cache_key(provider_name, "", parameters)
 
         start_time = time.time()
-        response_content, metadata = await self._send_to_provider(
-            provider_name.lower(), prompt.content, parameters
-        )
+        cached = self.response_cache.get(cache_key) if cache_key else None
+        if cached is None and signature is not None:
+            match = self.similar_prompts.query(namespace, signature, threshold)
+            if match is not None:
+                (response_content, metadata), similarity = match
+                cached = response_content, {**metadata, "similarity": similarity}
+        if cached is not None:
+            response_content, metadata = cached
+        else:
+            response_content, metadata = await self._coalesced_send(
+                provider_name.lower(), prompt.content, parameters, coalesce_key
+            )
+            if cache_key:
+                self.response_cache.set(cache_key, (response_content, metadata))
+            if signature is not None:
+                self.similar_prompts.add(
+                    namespace, signature, (response_content, metadata)
+                )
         latency = time.time() - start_time
 
-        response = create_response(
-            db=db,
+        return dict(
             prompt_id=prompt.id,
             llm_provider_id=provider.id,
             content=response_content,
             metadata=metadata,
             latency=latency,
-            token_count=metadata.get("token_count", 0),
+            # Cache hits spend no provider tokens; the original count stays
+            # available in the response metadata.
+            token_count=0 if cached is not None else metadata.get("token_count", 0),
+            is_cached=cached is not None,
+        )
+
+    async def process_prompt_with_fallback(
+        self,
+        db: AsyncSession,
+        prompt: Prompt,
+        provider_name: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        fallback_providers: Optional[List[str]] = None,
+    ) -> Tuple[Response, str]:
+        """
+        Process a prompt, falling back along a chain of providers on failure.
+
+        The chain is the requested provider followed by ``fallback_providers``
+        or, when the request gives none, the organization's
+        ``{"fallback_providers": [...]}`` config. Entries may pin a model as
+        ``"provider:model"``; otherwise fallbacks use their default model. A
+        provider with an open circuit fails instantly, so traffic moves on to
+        the next one without waiting for a timeout.
+
+        Args:
+            db: Database session
+            prompt: The prompt to process
+            provider_name: Name of the preferred LLM provider
+            parameters: Optional parameters for the LLM request
+            fallback_providers: Providers to try, in order, if it fails
+
+        Returns:
+            Tuple of (Response, name of the provider that answered)
+        """
+        if fallback_providers is None:
+            organization_config = await self._organization_config(db, prompt)
+            fallback_providers = organization_config.get("fallback_providers", [])
+        chain = [(provider_name.lower(), None)] + [
+            self._parse_pool_entry(entry) for entry in fallback_providers
+        ]
+
+        error: Optional[Exception] = None
+        tried = set()
+        for name, model in chain:
+            if model is None:
+                attempt_parameters = parameters or {}
+            else:
+                # The requested model belongs to the primary provider.
+                attempt_parameters = {
+                    k: v for k, v in (parameters or {}).items() if k != "model"
+                }
+                if model:
+                    attempt_parameters["model"] = model
+            attempt = (name, attempt_parameters.get("model", ""))
+            if attempt in tried:
+                continue
+            tried.add(attempt)
+            try:
+                response = await self.process_prompt(
+                    db, prompt, name, attempt_parameters
+                )
+            except Exception as e:
+                logger.warning(f"Provider {name} failed, trying next fallback: {e}")
+                error = e
+                continue
+            return response, name
+        raise error
+
+    async def fan_out_prompt(
+        self,
+        db: AsyncSession,
+        prompt: Prompt,
+        provider_names: List[str],
+        parameters: Optional[Dict[str, Any]] = None,
+        first_wins: bool = False,
+        timeout: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Process one prompt with several LLM providers concurrently.
+
+        Every provider that answers gets its own Response row under the same
+        prompt. With ``first_wins`` the remaining providers are cancelled as
+        soon as one succeeds; otherwise all providers are awaited until the
+        deadline.
+
+        Only the provider calls race. Providers are looked up before and
+        answers stored after, in this task, so a cancelled call can never
+        interrupt a query on the shared session.
+
+        Args:
+            db: Database session
+            prompt: The prompt to process
+            provider_names: Names of the LLM providers to use
+            parameters: Optional parameters for the LLM requests
+            first_wins: Stop at the first successful response
+            timeout: Deadline in seconds for the whole fan-out
+
+        Returns:
+            One ``{"llm_provider", "response", "error"}`` dict per provider, in
+            the order the providers were given
+        """
+        results = {
+            name: {"llm_provider": name, "response": None, "error": None}
+            for name in dict.fromkeys(provider_names)
+        }
+        providers: Dict[str, LLMProvider] = {}
+        for name in results:
+            try:
+                providers[name] = await self._get_provider(db, name)
+            except ValueError as e:
+                results[name]["error"] = str(e)
+        cacheable = await self._is_cacheable(db, prompt, parameters)
+        answers: Dict[str, Dict[str, Any]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run(name: str) -> None:
+            try:
+                answers[name] = await self._complete(
+                    db, prompt, name, providers[name], parameters, cacheable
+                )
+            except Exception as e:
+                logger.warning(f"Fan-out to {name} failed: {str(e)}")
+                results[name]["error"] = str(e) or e.__class__.__name__
+                return
+            if first_wins:
+                for other, task in tasks.items():
+                    if other != name:
+                        task.cancel()
+
+        try:
+            async with asyncio.timeout(timeout):
+                async with asyncio.TaskGroup() as group:
+                    for name in providers:
+                        tasks[name] = group.create_task(run(name))
+        except TimeoutError:
+            pass
+
+        for name, fields in answers.items():
+            results[name]["response"] = await self._save_response(db, prompt, fields)
+
+        # Providers still unanswered were either cancelled by a winner or cut
+        # off by the deadline.
+        won = first_wins and bool(answers)
+        for result in results.values():
+            if result["response"] is None and result["error"] is None:
+                result["error"] = "cancelled" if won else "deadline exceeded"
+        return list(results.values())
+
+    async def route_prompt(
+        self,
+        db: AsyncSession,
+        prompt: Prompt,
+        provider_pool: List[str],
+        parameters: Optional[Dict[str, Any]] = None,
+        hedge: bool = True,
+    ) -> Tuple[Response, str]:
+        """
+        Process a prompt with the currently fastest healthy provider in a pool.
+
+        Pool entries are provider names, optionally pinned to a model as
+        ``"provider:model"``. A ``model`` in ``parameters`` is meant for the
+        first entry; like fallbacks, the other entries use their pinned or
+        default model. With ``hedge`` a second request is sent to the
+        next-best candidate once the first has been running longer than its
+        observed p95 latency; whichever succeeds first is kept and the other
+        is cancelled. A candidate that fails outright falls through to the next.
+
+        Only the provider calls race; lookups and the winner's row happen in
+        this task, so a cancelled call never interrupts a query on ``db``.
+
+        Args:
+            db: Database session
+            prompt: The prompt to process
+            provider_pool: Candidate providers (and optional models)
+            parameters: Optional parameters for the LLM request
+            hedge: Whether to issue a hedged request to the runner-up
+
+        Returns:
+            Tuple of (Response, name of the provider that answered)
+        """
+        # Candidates are keyed by the model they will actually be called with,
+        # as the stats are.
+        candidate_parameters: Dict[ProviderKey, Dict[str, Any]] = {}
+        for position, entry in enumerate(dict.fromkeys(provider_pool)):
+            provider_name, model = self._parse_pool_entry(entry)
+            if position == 0 and not model:
+                entry_parameters = dict(parameters or {})
+            else:
+                entry_parameters = {
+                    k: v for k, v in (parameters or {}).items() if k != "model"
+                }
+                if model:
+                    entry_parameters["model"] = model
+            key = (
+                provider_name,
+                self._effective_model(provider_name, entry_parameters),
+            )
+            candidate_parameters.setdefault(key, entry_parameters)
+        candidates = self.provider_stats.rank(candidate_parameters)
+        if not candidates:
+            raise ValueError("Provider pool is empty")
+        # Providers with an open circuit would fail immediately; try them last.
+        candidates.sort(key=lambda c: self.circuit_breakers.get(c[0]).is_open())
+        cacheable = await self._is_cacheable(db, prompt, parameters)
+
+        async def start(candidate: ProviderKey) -> asyncio.Task:
+            provider_name = candidate[0]
+            task_parameters = candidate_parameters[candidate]
+            try:
+                provider = await self._get_provider(db, provider_name)
+            except ValueError as e:
+                task = asyncio.get_running_loop().create_future()
+                task.set_exception(e)
+            else:
+                task = asyncio.ensure_future(
+                    self._complete(
+                        db, prompt, provider_name, provider, task_parameters, cacheable
+                    )
+                )
+            started[task] = candidate
+            return task
+
+        started: Dict[asyncio.Future, ProviderKey] = {}
+        remaining = list(candidates)
+        pending = {await start(remaining.pop(0))}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                hedge_delay = None
+                if hedge and remaining and len(pending) == 1:
+                    # Whichever candidate is running now, not necessarily the first
+                    (running,) = pending
+                    hedge_delay = self._hedge_delay(started[running])
+                done, pending = await asyncio.wait(
+                    pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        response = await self._save_response(db, prompt, task.result())
+                        return response, started[task][0]
+                    error = task.exception()
+                    logger.warning(f"Routed call to {started[task][0]} failed: {error}")
+                # Hedge on a slow primary, or fail over once nothing is running.
+                if remaining and (not done or not pending):
+                    pending.add(await start(remaining.pop(0)))
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def _hedge_delay(self, candidate: ProviderKey) -> float:
+        """How long to wait on a candidate before hedging: its observed p95."""
+        p95 = self.provider_stats.percentile(*candidate, 0.95)
+        return p95 if p95 is not None else settings.LLM_HEDGE_DEFAULT_DELAY
+
+    @staticmethod
+    def _parse_pool_entry(entry: str) -> ProviderKey:
+        provider_name, _, model = entry.partition(":")
+        return provider_name.strip().lower(), model.strip()
+
+    @staticmethod
+    def _effective_model(
+        provider_name: str, parameters: Optional[Dict[str, Any]]
+    ) -> str:
+        """The model a request will be served by: the requested or default one."""
+        return (parameters or {}).get("model") or DEFAULT_MODELS.get(
+            provider_name.lower(), ""
         )
 
+    async def _coalesced_send(
+        self,
+        provider_name: str,
+        prompt_content: str,
+        parameters: Optional[Dict[str, Any]],
+        coalesce_key: Optional[Hashable] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Send a prompt to a provider, sharing one upstream call between
+        concurrent requests with the same ``coalesce_key`` when coalescing is
+        enabled. Without a key (uncacheable requests) every call is sent.
+        """
+        send = functools.partial(
+            self._timed_send, provider_name, prompt_content, parameters
+        )
+        if not settings.LLM_COALESCE_REQUESTS or coalesce_key is None:
+            return await send()
+        return await self.in_flight.do(coalesce_key, send)
+
+    async def _timed_send(
+        self,
+        provider_name: str,
+        prompt_content: str,
+        parameters: Optional[Dict[str, Any]],
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Send a prompt to a provider within its rate limits and record the call
+        in the routing stats and latency sketches.
+
+        Calls to a provider whose circuit is open fail immediately, before
+        queueing. Time spent queueing for capacity is not counted as provider
+        latency.
+        """
+        model = self._effective_model(provider_name, parameters)
+        breaker = self.circuit_breakers.get(provider_name)
+        limiter = self.rate_limiters.get(provider_name)
+        estimated_tokens = self._estimate_tokens(prompt_content, parameters)
+        breaker.before_call()
+        try:
+            async with limiter.slot(model, estimated_tokens):
+                start_time = time.time()
+                try:
+                    result = await self._send_to_provider(
+                        provider_name, prompt_content, parameters
+                    )
+                except Exception:
+                    self.provider_stats.record_failure(provider_name, model)
+                    self.latency_sketches.record_failure(provider_name, model)
+                    raise
+                latency = time.time() - start_time
+                self.provider_stats.record_success(provider_name, model, latency)
+                self.latency_sketches.record_success(provider_name, model, latency)
+        except Exception as e:
+            self._record_breaker_failure(breaker, e)
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success(latency)
+        limiter.record_usage(estimated_tokens, result[1].get("token_count", 0))
+        return result
+
+    @staticmethod
+    def _record_breaker_failure(breaker: CircuitBreaker, error: Exception) -> None:
+        """
+        Count an error against the circuit only if it says the provider is
+        unhealthy (5xx, connection errors, timeouts). Bad requests, throttling
+        and local queueing timeouts leave the circuit alone.
+        """
+        if isinstance(error, httpx.HTTPStatusError):
+            unhealthy = error.response.status_code >= 500
+        else:
+            unhealthy = isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+        if unhealthy:
+            breaker.record_failure()
+        else:
+            breaker.release()
+
+    @staticmethod
+    def _estimate_tokens(
+        prompt_content: str, parameters: Optional[Dict[str, Any]]
+    ) -> int:
+        """
+        Rough token budget for a call (~4 characters per prompt token plus the
+        completion limit), reserved up front and settled once usage is known.
+        A missing or malformed ``max_tokens`` counts as the default 500; the
+        provider rejects it if it has to.
+        """
+        try:
+            max_tokens = max(0, int((parameters or {}).get("max_tokens") or 500))
+        except (TypeError, ValueError):
+            max_tokens = 500
+        return len(prompt_content) // 4 + max_tokens
+
+    async def _is_cacheable(
+        self, db: AsyncSession, prompt: Prompt, parameters: Optional[Dict[str, Any]]
+    ) -> bool:
+        """
+        Whether a prompt may be answered from (and stored in) the response caches.
+
+        Only deterministic requests are cached, and organizations can opt out
+        with ``{"response_cache": false}`` in their config.
+        """
+        if not is_deterministic(parameters):
+            return False
+        config = await self._organization_config(db, prompt)
+        return config.get("response_cache", True)
+
+    async def _organization_config(
+        self, db: AsyncSession, prompt: Prompt
+    ) -> Dict[str, Any]:
+        """Config of the organization a prompt belongs to ({} if none)."""
+        if prompt.organization_id is None:
+            return {}
+        async with self._db_lock(db):
+            organization = await async_organization_crud.get(db, prompt.organization_id)
+        return (organization.config if organization else None) or {}
+
+    async def _save_response(
+        self, db: AsyncSession, prompt: Prompt, fields: Dict[str, Any]
+    ) -> Response:
+        """
+        Persist a completed response and add it to the usage rollups.
+
+        With write-behind enabled the row is queued for a batched insert and
+        the request returns without waiting on the database; otherwise it is
+        inserted and committed here. A large body is first moved to the blob
+        store, leaving only its reference on the row.
+        """
+        # Set here rather than by the database so the row and its rollup
+        # bucket agree
+        fields = {"created_at": datetime.now(timezone.utc), **fields}
+        fields = await response_bodies.offload_fields(fields)
+        if self.response_writer is not None:
+            return await self.response_writer.submit(fields)
+        async with self._db_lock(db):
+            await record_usage(
+                db, [fields], {prompt.id: (prompt.user_id, prompt.organization_id)}
+            )
+            response = await create_response(db=db, **fields)
+        analytics_cache.record_write(prompt.organization_id)
         return response
 
+    def _db_lock(self, db: AsyncSession) -> asyncio.Lock:
+        """
+        Lock serializing this service's queries on a session.
+
+        An AsyncSession does not allow concurrent operations, but fan-out,
+        routing and batches share the caller's session between tasks. Only
+        the short DB calls take turns; provider calls still overlap.
+        """
+        lock = self._session_locks.get(db)
+        if lock is None:
+            lock = self._session_locks[db] = asyncio.Lock()
+        return lock
+
+    def _similarity_threshold(self, provider: LLMProvider) -> Optional[float]:
+        """
+        Minimum similarity for answering a prompt from the near-duplicate cache.
+
+        Defaults to ``SIMILARITY_CACHE_THRESHOLD`` and can be overridden per
+        provider with ``{"similarity_threshold": 0.95}`` (or ``null`` to
+        disable) in its config. ``None`` means the layer is off.
+        """
+        if not settings.SIMILARITY_CACHE_ENABLED:
+            return None
+        config = provider.config or {}
+        return config.get("similarity_threshold", settings.SIMILARITY_CACHE_THRESHOLD)
+
+    async def stream_prompt(
+        self,
+        db: AsyncSession,
+        prompt: Prompt,
+        provider_name: str,
+        parameters: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a prompt's completion from the specified LLM provider.
+
+        Text deltas are yielded as soon as the provider emits them; the
+        Response row is persisted once, after the stream has finished.
+
+        Args:
+            db: Database session
+            prompt: The prompt to process
+            provider_name: Name of the LLM provider to use
+            parameters: Optional parameters for the LLM request
+
+        Yields:
+            ``{"event": "delta", "text": ...}`` for each chunk of generated
+            text, then ``{"event": "done", "response": Response}``
+        """
+        provider = await self._get_provider(db, provider_name)
+        breaker = self.circuit_breakers.get(provider_name.lower())
+        limiter = self.rate_limiters.get(provider_name.lower())
+        model = self._effective_model(provider_name, parameters)
+        estimated_tokens = self._estimate_tokens(prompt.content, parameters)
+
+        metadata: Dict[str, Any] = {}
+        chunks = []
+        time_to_first_token = None
+
+        breaker.before_call()
+        try:
+            async with limiter.slot(model, estimated_tokens):
+                start_time = time.time()
+                try:
+                    async for delta in self._stream_from_provider(
+                        provider_name.lower(), prompt.content, parameters, metadata
+                    ):
+                        if not delta:
+                            continue
+                        if time_to_first_token is None:
+                            time_to_first_token = time.time() - start_time
+                        chunks.append(delta)
+                        yield {"event": "delta", "text": delta}
+                except Exception:
+                    self.provider_stats.record_failure(provider_name.lower(), model)
+                    self.latency_sketches.record_failure(provider_name.lower(), model)
+                    raise
+                latency = time.time() - start_time
+                # Total latency, as for unstreamed calls: routing and hedging
+                # compare the two on the same footing.
+                self.provider_stats.record_success(
+                    provider_name.lower(), model, latency
+                )
+                self.latency_sketches.record_success(
+                    provider_name.lower(), model, latency
+                )
+        except Exception as e:
+            self._record_breaker_failure(breaker, e)
+            raise
+        except BaseException:
+            breaker.release()  # Client went away mid-stream
+            raise
+        # A long completion is not a slow provider: judge streams by first token.
+        breaker.record_success(time_to_first_token or latency)
+        limiter.record_usage(estimated_tokens, metadata.get("token_count", 0))
+
+        response = await self._save_response(
+            db,
+            prompt,
+            {
+                "prompt_id": prompt.id,
+                "llm_provider_id": provider.id,
+                "content": "".join(chunks),
+                "metadata": metadata,
+                "latency": latency,
+                "time_to_first_token": time_to_first_token,
+                "token_count": metadata.get("token_count", 0),
+            },
+        )
+
+        yield {"event": "done", "response": response}
+
     async def _send_to_provider(
         self,
         provider_name: str,
@@ -102,28 +873,120 @@ class LLMService:
 
         raise ValueError(f"Unsupported LLM provider: {provider_name}")
 
+    async def _stream_from_provider(
+        self,
+        provider_name: str,
+        prompt_content: str,
+        parameters: Optional[Dict[str, Any]],
+        metadata: Dict[str, Any],
+    ) -> AsyncIterator[str]:
+        """
+        Stream a prompt to the specified LLM provider.
+
+        Providers without a streaming adapter are called normally and their
+        whole reply is emitted as a single delta.
+
+        Args:
+            provider_name: Name of the provider (e.g., "openai", "gemini")
+            prompt_content: Content of the prompt
+            parameters: Optional parameters for the request
+            metadata: Filled in with the model and token count once the
+                stream has finished
+
+        Yields:
+            Text deltas in the order the provider produced them
+        """
+        if parameters is None:
+            parameters = {}
+
+        stream_methods = {
+            "openai": self._stream_openai,
+            "anthropic": self._stream_anthropic,
+            "cohere": self._stream_cohere,
+        }
+
+        if provider_name in stream_methods:
+            async for delta in stream_methods[provider_name](
+                prompt_content, parameters, metadata
+            ):
+                yield delta
+            return
+
+        content, result_metadata = await self._send_to_provider(
+            provider_name, prompt_content, parameters
+        )
+        metadata.update(result_metadata)
+        yield content
+
     async def _make_api_request(
         self,
+        provider_name: str,
         url: str,
         headers: Dict[str, str],
         payload: Dict[str, Any],
         method: str = "POST",
     ) -> Dict[str, Any]:
         """Handles HTTP API requests with error handling."""
-        async with httpx.AsyncClient() as client:
-            try:
-                if method == "POST":
-                    response = await client.post(url, json=payload, headers=headers)
-                else:
-                    response = await client.get(url, params=payload, headers=headers)
+        client = self.clients.get(provider_name)
+        try:
+            if method == "POST":
+                response = await client.post(url, json=payload, headers=headers)
+            else:
+                response = await client.get(url, params=payload, headers=headers)
+            response.raise_for_status()
+            self.rate_limiters.get(provider_name).succeeded()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            logger.error(f"API request error: {e.response.text}")
+            self._check_throttled(provider_name, e.response)
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error: {str(e)}")
+            raise
+
+    async def _stream_api_request(
+        self,
+        provider_name: str,
+        url: str,
+        headers: Dict[str, str],
+        payload: Dict[str, Any],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streams a POST request, yielding each SSE or NDJSON event as a dict."""
+        client = self.clients.get(provider_name)
+        try:
+            async with client.stream(
+                "POST", url, json=payload, headers=headers
+            ) as response:
+                if response.is_error:
+                    await response.aread()
                 response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                logger.error(f"API request error: {e.response.text}")
-                raise
-            except Exception as e:
-                logger.error(f"Unexpected error: {str(e)}")
-                raise
+                self.rate_limiters.get(provider_name).succeeded()
+                async for line in response.aiter_lines():
+                    line = line.strip()
+                    if line.startswith("data:"):
+                        line = line[len("data:") :].strip()
+                    elif not line.startswith("{"):
+                        continue  # Blank separators and "event:" lines
+                    if not line or line == "[DONE]":
+                        continue
+                    yield json.loads(line)
+        except httpx.HTTPStatusError as e:
+            logger.error(f"API stream error: {e.response.text}")
+            self._check_throttled(provider_name, e.response)
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error: {str(e)}")
+            raise
+
+    def _check_throttled(self, provider_name: str, response: httpx.Response) -> None:
+        """Slow the provider's rate limits down when it answered 429."""
+        if response.status_code != httpx.codes.TOO_MANY_REQUESTS:
+            return
+        retry_after = parse_retry_after(response.headers.get("retry-after"))
+        logger.warning(
+            f"{provider_name} is throttling requests (Retry-After: {retry_after})"
+        )
+        self.rate_limiters.get(provider_name).throttled(retry_after)
 
     # ------------------ OpenAI ------------------ #
     async def _call_openai(
@@ -131,7 +994,7 @@ class LLMService:
     ) -> Tuple[str, Dict[str, Any]]:
         url = f"{OPENAI_API_BASE_URL}/chat/completions"
         payload = {
-            "model": parameters.get("model", "gpt-4o"),
+            "model": parameters.get("model", DEFAULT_MODELS["openai"]),
             "messages": [{"role": "user", "content": prompt_content}],
             "temperature": parameters.get("temperature", 0.7),
             "max_tokens": parameters.get("max_tokens", 500),
@@ -140,12 +1003,40 @@ class LLMService:
             "Authorization": f"Bearer {OPENAI_API_KEY}",
             "Content-Type": "application/json",
         }
-        result = await self._make_api_request(url, headers, payload)
+        result = await self._make_api_request("openai", url, headers, payload)
 
+        usage = result["usage"]
         return result["choices"][0]["message"]["content"], {
             "model": result["model"],
-            "token_count": result["usage"]["total_tokens"],
+            "token_count": usage["total_tokens"],
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+        }
+
+    async def _stream_openai(
+        self, prompt_content: str, parameters: Dict[str, Any], metadata: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        url = f"{OPENAI_API_BASE_URL}/chat/completions"
+        payload = {
+            "model": parameters.get("model", DEFAULT_MODELS["openai"]),
+            "messages": [{"role": "user", "content": prompt_content}],
+            "temperature": parameters.get("temperature", 0.7),
+            "max_tokens": parameters.get("max_tokens", 500),
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        headers = {
+            "Authorization": f"Bearer {OPENAI_API_KEY}",
+            "Content-Type": "application/json",
         }
+        async for event in self._stream_api_request("openai", url, headers, payload):
+            metadata["model"] = event.get("model", metadata.get("model", ""))
+            if event.get("usage"):
+                metadata["token_count"] = event["usage"]["total_tokens"]
+            for choice in event.get("choices", []):
+                delta = choice.get("delta", {}).get("content")
+                if delta:
+                    yield delta
 
     # ------------------ Anthropic ------------------ #
     async def _call_anthropic(
@@ -153,26 +1044,53 @@ class LLMService:
     ) -> Tuple[str, Dict[str, Any]]:
         url = f"{ANTHROPIC_API_BASE_URL}/v1/messages"
         payload = {
-            "model": parameters.get("model", "claude-3-opus-20240229"),
+            "model": parameters.get("model", DEFAULT_MODELS["anthropic"]),
             "messages": [{"role": "user", "content": prompt_content}],
             "temperature": parameters.get("temperature", 0.7),
             "max_tokens": parameters.get("max_tokens", 500),
         }
         headers = {"x-api-key": ANTHROPIC_API_KEY, "Content-Type": "application/json"}
-        result = await self._make_api_request(url, headers, payload)
+        result = await self._make_api_request("anthropic", url, headers, payload)
 
         return result["content"][0]["text"], {
             "model": result["model"],
             "token_count": result.get("usage", {}).get("input_tokens", 0),
         }
 
+    async def _stream_anthropic(
+        self, prompt_content: str, parameters: Dict[str, Any], metadata: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        url = f"{ANTHROPIC_API_BASE_URL}/v1/messages"
+        payload = {
+            "model": parameters.get("model", DEFAULT_MODELS["anthropic"]),
+            "messages": [{"role": "user", "content": prompt_content}],
+            "temperature": parameters.get("temperature", 0.7),
+            "max_tokens": parameters.get("max_tokens", 500),
+            "stream": True,
+        }
+        headers = {"x-api-key": ANTHROPIC_API_KEY, "Content-Type": "application/json"}
+        input_tokens = output_tokens = 0
+        async for event in self._stream_api_request("anthropic", url, headers, payload):
+            event_type = event.get("type")
+            if event_type == "message_start":
+                message = event.get("message", {})
+                metadata["model"] = message.get("model", "")
+                input_tokens = message.get("usage", {}).get("input_tokens", 0)
+            elif event_type == "content_block_delta":
+                delta = event.get("delta", {}).get("text")
+                if delta:
+                    yield delta
+            elif event_type == "message_delta":
+                output_tokens = event.get("usage", {}).get("output_tokens", 0)
+        metadata["token_count"] = input_tokens + output_tokens
+
     # ------------------ Cohere ------------------ #
     async def _call_cohere(
         self, prompt_content: str, parameters: Dict[str, Any]
     ) -> Tuple[str, Dict[str, Any]]:
         url = f"{COHERE_API_BASE_URL}/v1/generate"
         payload = {
-            "model": parameters.get("model", "command"),
+            "model": parameters.get("model", DEFAULT_MODELS["cohere"]),
             "prompt": prompt_content,
             "temperature": parameters.get("temperature", 0.7),
         }
@@ -180,20 +1098,44 @@ class LLMService:
             "Authorization": f"Bearer {COHERE_API_KEY}",
             "Content-Type": "application/json",
         }
-        result = await self._make_api_request(url, headers, payload)
+        result = await self._make_api_request("cohere", url, headers, payload)
 
         return result["generations"][0]["text"], {
             "model": result.get("model", ""),
             "token_count": sum(result.get("meta", {}).get("billed_units", {}).values()),
         }
 
+    async def _stream_cohere(
+        self, prompt_content: str, parameters: Dict[str, Any], metadata: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        url = f"{COHERE_API_BASE_URL}/v1/generate"
+        payload = {
+            "model": parameters.get("model", DEFAULT_MODELS["cohere"]),
+            "prompt": prompt_content,
+            "temperature": parameters.get("temperature", 0.7),
+            "stream": True,
+        }
+        headers = {
+            "Authorization": f"Bearer {COHERE_API_KEY}",
+            "Content-Type": "application/json",
+        }
+        async for event in self._stream_api_request("cohere", url, headers, payload):
+            if event.get("is_finished"):
+                result = event.get("response", {})
+                metadata["model"] = result.get("model", "")
+                metadata["token_count"] = sum(
+                    result.get("meta", {}).get("billed_units", {}).values()
+                )
+            elif event.get("text"):
+                yield event["text"]
+
     # ------------------ Gemini ------------------ #
     async def _call_gemini(
         self, prompt_content: str, parameters: Dict[str, Any]
     ) -> Tuple[str, Dict[str, Any]]:
         url = f"{GEMINI_API_BASE_URL}/text/generate"
         payload = {
-            "model": parameters.get("model", "gemini-pro"),
+            "model": parameters.get("model", DEFAULT_MODELS["gemini"]),
             "prompt": prompt_content,
             "temperature": parameters.get("temperature", 0.7),
         }
@@ -201,7 +1143,7 @@ class LLMService:
             "Authorization": f"Bearer {GEMINI_API_KEY}",
             "Content-Type": "application/json",
         }
-        result = await self._make_api_request(url, headers, payload)
+        result = await self._make_api_request("gemini", url, headers, payload)
 
         return result["candidates"][0]["content"], {
             "model": result["model"],
@@ -221,7 +1163,7 @@ class LLMService:
             "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
             "Content-Type": "application/json",
         }
-        result = await self._make_api_request(url, headers, payload)
+        result = await self._make_api_request("deepseek", url, headers, payload)
 
         return result["response"], {
             "model": result.get("model", ""),
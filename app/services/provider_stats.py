@@ -0,0 +1,110 @@
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+ProviderKey = Tuple[str, str]  # (provider name, model)
+
+
+class _Window:
+    """Rolling latency samples and success/failure outcomes for one key."""
+
+    def __init__(self, size: int):
+        self.latencies: Deque[float] = deque(maxlen=size)
+        self.outcomes: Deque[bool] = deque(maxlen=size)
+
+
+class ProviderStats:
+    """
+    Rolling per-provider/per-model latency and error statistics.
+
+    Only the most recent ``window_size`` calls are kept for each key, so the
+    numbers track current provider behaviour rather than all-time averages.
+    """
+
+    def __init__(
+        self,
+        window_size: int = 200,
+        min_samples: int = 5,
+        max_error_rate: float = 0.5,
+    ):
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self._windows: Dict[ProviderKey, _Window] = {}
+
+    def record_success(self, provider_name: str, model: str, latency: float) -> None:
+        """Record a successful upstream call and its latency in seconds."""
+        window = self._window(provider_name, model)
+        window.latencies.append(latency)
+        window.outcomes.append(True)
+
+    def record_failure(self, provider_name: str, model: str) -> None:
+        """Record a failed upstream call."""
+        self._window(provider_name, model).outcomes.append(False)
+
+    def percentile(self, provider_name: str, model: str, q: float) -> Optional[float]:
+        """
+        Latency percentile over the rolling window.
+
+        Args:
+            provider_name: Name of the provider
+            model: Model name ("" for the provider default)
+            q: Quantile between 0 and 1 (e.g. 0.95)
+
+        Returns:
+            Latency in seconds, or ``None`` until ``min_samples`` calls succeeded
+        """
+        window = self._windows.get((provider_name, model))
+        if window is None or len(window.latencies) < self.min_samples:
+            return None
+        ordered = sorted(window.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def error_rate(self, provider_name: str, model: str) -> float:
+        """Fraction of failed calls over the rolling window."""
+        window = self._windows.get((provider_name, model))
+        if window is None or not window.outcomes:
+            return 0.0
+        return window.outcomes.count(False) / len(window.outcomes)
+
+    def is_healthy(self, provider_name: str, model: str) -> bool:
+        """Whether the error rate is below ``max_error_rate`` (or unknown yet)."""
+        window = self._windows.get((provider_name, model))
+        if window is None or len(window.outcomes) < self.min_samples:
+            return True
+        return self.error_rate(provider_name, model) < self.max_error_rate
+
+    def rank(self, candidates: Iterable[ProviderKey]) -> List[ProviderKey]:
+        """
+        Order candidates fastest-healthy-first.
+
+        Healthy candidates come before unhealthy ones and are ordered by
+        median latency. Candidates without enough samples sort first so new
+        or recovered providers get traffic and gather statistics.
+        """
+
+        def sort_key(candidate: ProviderKey) -> Tuple[bool, float]:
+            median = self.percentile(*candidate, 0.5)
+            return (not self.is_healthy(*candidate), median or 0.0)
+
+        return sorted(candidates, key=sort_key)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Current statistics for every provider/model seen so far."""
+        return [
+            {
+                "llm_provider": provider_name,
+                "model": model,
+                "samples": len(window.latencies),
+                "p50": self.percentile(provider_name, model, 0.5),
+                "p95": self.percentile(provider_name, model, 0.95),
+                "error_rate": self.error_rate(provider_name, model),
+                "healthy": self.is_healthy(provider_name, model),
+            }
+            for (provider_name, model), window in self._windows.items()
+        ]
+
+    def _window(self, provider_name: str, model: str) -> _Window:
+        key = (provider_name, model)
+        if key not in self._windows:
+            self._windows[key] = _Window(self.window_size)
+        return self._windows[key]
@@ -0,0 +1,289 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+
+class ProviderBusyError(Exception):
+    """Raised when a call cannot get provider capacity within its wait budget."""
+
+    def __init__(self, provider_name: str, retry_after: float):
+        super().__init__(
+            f"LLM provider '{provider_name}' is at capacity, retry in {retry_after:.0f}s"
+        )
+        self.provider_name = provider_name
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a ``Retry-After`` header into seconds.
+
+    Accepts both delay-seconds and HTTP-date forms; returns ``None`` when the
+    header is missing or unparseable.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket whose refill rate backs off on throttling and then recovers.
+
+    Each throttle (HTTP 429) multiplies the rate by ``decrease_factor`` and
+    can pause refills for a ``Retry-After`` period; each success adds back
+    ``recovery_step`` of the configured rate until it is reached again
+    (AIMD). Callers queue FIFO and wait at most until their deadline.
+    """
+
+    def __init__(
+        self,
+        per_minute: float,
+        burst_seconds: float = 10.0,
+        decrease_factor: float = 0.5,
+        recovery_step: float = 0.05,
+        min_fraction: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_rate = per_minute / 60.0
+        self.rate = self.max_rate
+        self.min_rate = self.max_rate * min_fraction
+        self.capacity = max(1.0, self.max_rate * burst_seconds)
+        self.decrease_factor = decrease_factor
+        self.recovery_step = recovery_step
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated_at = clock()
+        self._paused_until = 0.0
+        self._queue = asyncio.Lock()
+
+    async def acquire(self, amount: float, deadline: float) -> None:
+        """
+        Take ``amount`` tokens, waiting in line until ``deadline`` at most.
+
+        Raises:
+            asyncio.TimeoutError: If the tokens cannot be had by the deadline
+        """
+        amount = min(amount, self.capacity)
+        await asyncio.wait_for(self._queue.acquire(), self._remaining(deadline))
+        try:
+            while True:
+                wait = self._time_until_available(amount)
+                if wait <= 0:
+                    self._tokens -= amount
+                    return
+                if self._clock() + wait > deadline:
+                    raise asyncio.TimeoutError()
+                await asyncio.sleep(wait)
+        finally:
+            self._queue.release()
+
+    def refund(self, amount: float) -> None:
+        """Return unused tokens, or take more (negative) once actual usage is known."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        """Back off after the provider throttled a request."""
+        self._refill()
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self._tokens = min(self._tokens, 0.0)
+        if retry_after:
+            self._paused_until = max(self._paused_until, self._clock() + retry_after)
+
+    def succeeded(self) -> None:
+        """Recover a little of the configured rate after a successful request."""
+        self._refill()
+        self.rate = min(self.max_rate, self.rate + self.max_rate * self.recovery_step)
+
+    def stats(self) -> Dict[str, float]:
+        self._refill()
+        return {
+            "rate_per_minute": self.rate * 60.0,
+            "max_rate_per_minute": self.max_rate * 60.0,
+            "available": self._tokens,
+            "paused_for": max(0.0, self._paused_until - self._clock()),
+        }
+
+    def _refill(self) -> None:
+        now = self._clock()
+        start = max(self._updated_at, self._paused_until)
+        if now > start:
+            self._tokens = min(self.capacity, self._tokens + (now - start) * self.rate)
+        self._updated_at = max(self._updated_at, now)
+
+    def _time_until_available(self, amount: float) -> float:
+        self._refill()
+        paused_for = max(0.0, self._paused_until - self._clock())
+        missing = amount - self._tokens
+        return paused_for + (missing / self.rate if missing > 0 else 0.0)
+
+    def _remaining(self, deadline: float) -> float:
+        return max(0.0, deadline - self._clock())
+
+
+class ProviderLimiter:
+    """
+    Concurrency and rate limits for a single provider.
+
+    Configured from ``LLMProvider.config``::
+
+        {
+            "max_concurrency": 32,
+            "model_max_concurrency": {"gpt-4o": 8},
+            "requests_per_minute": 500,
+            "tokens_per_minute": 90000,
+            "max_queue_wait": 30
+        }
+
+    Every key is optional; missing limits are not enforced.
+    """
+
+    CONFIG_KEYS = (
+        "max_concurrency",
+        "model_max_concurrency",
+        "requests_per_minute",
+        "tokens_per_minute",
+        "max_queue_wait",
+    )
+
+    def __init__(
+        self,
+        provider_name: str,
+        config: Optional[Dict[str, Any]] = None,
+        default_max_wait: float = 30.0,
+    ):
+        config = config or {}
+        self.provider_name = provider_name
+        self.config = {key: config.get(key) for key in self.CONFIG_KEYS}
+        self.max_wait = config.get("max_queue_wait") or default_max_wait
+
+        max_concurrency = config.get("max_concurrency")
+        self._semaphore = (
+            asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        )
+        self._model_limits: Dict[str, int] = config.get("model_max_concurrency") or {}
+        self._model_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        rpm = config.get("requests_per_minute")
+        tpm = config.get("tokens_per_minute")
+        self.requests = AdaptiveTokenBucket(rpm) if rpm else None
+        self.tokens = AdaptiveTokenBucket(tpm) if tpm else None
+        self.waiting = 0
+
+    @asynccontextmanager
+    async def slot(self, model: str, estimated_tokens: int) -> AsyncIterator[None]:
+        """
+        Hold a concurrency slot and rate budget for one upstream call.
+
+        Raises:
+            ProviderBusyError: If capacity is not available within ``max_wait``
+        """
+        deadline = time.monotonic() + self.max_wait
+        semaphores = [
+            s for s in (self._semaphore, self._model_semaphore(model)) if s is not None
+        ]
+        acquired = []
+        self.waiting += 1
+        try:
+            for semaphore in semaphores:
+                await asyncio.wait_for(
+                    semaphore.acquire(), max(0.0, deadline - time.monotonic())
+                )
+                acquired.append(semaphore)
+            if self.requests:
+                await self.requests.acquire(1, deadline)
+            if self.tokens:
+                await self.tokens.acquire(estimated_tokens, deadline)
+        except BaseException as e:
+            # Also on cancellation, or the slots are never given back
+            for semaphore in acquired:
+                semaphore.release()
+            if isinstance(e, asyncio.TimeoutError):
+                raise ProviderBusyError(self.provider_name, self.max_wait)
+            raise
+        finally:
+            self.waiting -= 1
+
+        try:
+            yield
+        finally:
+            for semaphore in acquired:
+                semaphore.release()
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Settle the token budget once the real token count is known."""
+        if self.tokens and actual_tokens:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        """The provider answered 429: slow down both rate limits."""
+        for bucket in (self.requests, self.tokens):
+            if bucket:
+                bucket.throttled(retry_after)
+
+    def succeeded(self) -> None:
+        for bucket in (self.requests, self.tokens):
+            if bucket:
+                bucket.succeeded()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "llm_provider": self.provider_name,
+            "waiting": self.waiting,
+            "in_use": (
+                self.config["max_concurrency"] - self._semaphore._value
+                if self._semaphore
+                else None
+            ),
+            "max_concurrency": self.config["max_concurrency"],
+            "requests": self.requests.stats() if self.requests else None,
+            "tokens": self.tokens.stats() if self.tokens else None,
+        }
+
+    def _model_semaphore(self, model: str) -> Optional[asyncio.Semaphore]:
+        limit = self._model_limits.get(model)
+        if not limit:
+            return None
+        if model not in self._model_semaphores:
+            self._model_semaphores[model] = asyncio.Semaphore(limit)
+        return self._model_semaphores[model]
+
+
+class RateLimiterRegistry:
+    """One ProviderLimiter per provider, rebuilt when its config changes."""
+
+    def __init__(self, default_max_wait: float = 30.0):
+        self.default_max_wait = default_max_wait
+        self._limiters: Dict[str, ProviderLimiter] = {}
+
+    def configure(self, provider_name: str, config: Optional[Dict[str, Any]]) -> None:
+        """Apply a provider's config, keeping the current limiter if unchanged."""
+        config = config or {}
+        limiter = self._limiters.get(provider_name)
+        wanted = {key: config.get(key) for key in ProviderLimiter.CONFIG_KEYS}
+        if limiter is None or limiter.config != wanted:
+            self._limiters[provider_name] = ProviderLimiter(
+                provider_name, config, self.default_max_wait
+            )
+
+    def get(self, provider_name: str) -> ProviderLimiter:
+        """The provider's limiter; unconfigured providers are not limited."""
+        if provider_name not in self._limiters:
+            self._limiters[provider_name] = ProviderLimiter(
+                provider_name, default_max_wait=self.default_max_wait
+            )
+        return self._limiters[provider_name]
+
+    def stats(self) -> list:
+        return [limiter.stats() for limiter in self._limiters.values()]
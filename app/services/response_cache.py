@@ -0,0 +1,137 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+def normalize_parameters(parameters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Normalize request parameters so equivalent requests compare equal.
+
+    Unset (``None``) values are dropped and numbers are compared by value,
+    so ``{"temperature": 0}`` and ``{"temperature": 0.0}`` are the same.
+    """
+    normalized = {}
+    for key, value in (parameters or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = float(value)
+        normalized[key] = value
+    return normalized
+
+
+def is_deterministic(parameters: Optional[Dict[str, Any]]) -> bool:
+    """Only ``temperature: 0`` requests are safe to answer from a cache."""
+    temperature = (parameters or {}).get("temperature")
+    try:
+        return temperature is not None and float(temperature) == 0.0
+    except (TypeError, ValueError):
+        # Malformed values are for the provider to reject, not the cache
+        return False
+
+
+def make_cache_key(
+    provider_name: str,
+    prompt_content: str,
+    parameters: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Build a canonical key for a provider request.
+
+    Args:
+        provider_name: Name of the provider (e.g., "openai")
+        prompt_content: Content of the prompt
+        parameters: Request parameters, including the model
+
+    Returns:
+        SHA-256 hex digest of the provider, model, prompt and parameters
+    """
+    normalized = normalize_parameters(parameters)
+    canonical = json.dumps(
+        {
+            "provider": provider_name.lower(),
+            "model": normalized.pop("model", None),
+            "content": prompt_content,
+            "parameters": normalized,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries also expire after a fixed TTL.
+
+    Not thread-safe; intended for use from a single event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or ``None`` on a miss or expired entry."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry if present."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
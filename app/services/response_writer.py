@@ -0,0 +1,304 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from app.models.response import Response
+
+logger = logging.getLogger(__name__)
+
+_UUID_FIELDS = ("id", "prompt_id", "llm_provider_id")
+
+# What an INSERT leaving a column out stores; rows of one executemany must
+# all set the same columns
+_COLUMN_DEFAULTS = {
+    column.key: (
+        column.default.arg
+        if column.default is not None and column.default.is_scalar
+        else None
+    )
+    for column in Response.__table__.c
+}
+_COLUMN_DEFAULTS["metadata"] = {}
+_ALWAYS_SET = [
+    column.key
+    for column in Response.__table__.c
+    if column.default is not None and column.default.is_scalar
+]
+
+# The database (not the rows) is the problem: retry everything later
+_UNAVAILABLE = (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)
+
+# Queued by stop(); the flusher writes out what precedes it and exits
+_STOP = None
+
+
+def _encode(row: Dict[str, Any]) -> str:
+    return json.dumps(row, default=str)
+
+
+def _uniform(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Rows with the same keys, columns a row leaves out set to their default."""
+    keys = set(_ALWAYS_SET).union(*rows)
+    return [
+        {key: row.get(key, _COLUMN_DEFAULTS.get(key)) for key in keys} for row in rows
+    ]
+
+
+def _decode(line: str) -> Dict[str, Any]:
+    row = json.loads(line)
+    for field in _UUID_FIELDS:
+        if row.get(field) is not None:
+            row[field] = uuid.UUID(row[field])
+    if row.get("created_at") is not None:
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return row
+
+
+class ResponseWriteBuffer:
+    """
+    Write-behind persistence for Response rows.
+
+    ``submit`` queues a row and returns at once, so the request does not
+    wait on an INSERT. A background task inserts queued rows in batches of
+    up to ``batch_size``, or whatever has arrived after ``flush_interval``
+    seconds. When the queue holds ``max_queue`` rows, ``submit`` waits for
+    room (backpressure) instead of growing without bound.
+
+    If a batch cannot be inserted it is appended to ``spill_path`` (JSON
+    lines, fsynced) and replayed once the database accepts writes again.
+    Replay truncates the file after every committed batch, so a retry never
+    inserts a row twice. A row the database keeps rejecting is moved to
+    ``dead_letter_path`` after ``max_replay_attempts`` tries instead of
+    holding up the rest. ``stop`` flushes everything that is still queued.
+
+    ``on_insert(db, rows)`` runs in each batch's transaction before the
+    commit, for derived writes that must not drift from the rows (such as
+    the usage rollups); ``on_commit(rows)`` runs once they are visible.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Any],
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        max_queue: int = 10000,
+        spill_path: str = "var/response_spill.jsonl",
+        replay_interval: float = 30.0,
+        dead_letter_path: Optional[str] = None,
+        max_replay_attempts: int = 3,
+        on_insert: Optional[Callable[[Any, List[Dict[str, Any]]], Awaitable]] = None,
+        on_commit: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    ):
+        self.session_factory = session_factory
+        self.on_insert = on_insert
+        self.on_commit = on_commit
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.replay_interval = replay_interval
+        self.dead_letter_path = dead_letter_path or f"{spill_path}.dead"
+        self.max_replay_attempts = max_replay_attempts
+        self._replay_failures: Dict[Any, int] = {}
+        self._queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue(
+            max_queue
+        )
+        self._task: Optional[asyncio.Task] = None
+        self._last_replay = 0.0
+        self.written = 0
+        self.batches = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.failed_flushes = 0
+        self.dead_lettered = 0
+
+    async def start(self) -> None:
+        """Replay rows spilled by a previous run and start the flusher."""
+        await self._replay_spill()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher once everything queued so far has been written."""
+        if self._task is not None:
+            await self._queue.put(_STOP)
+            await self._task
+            self._task = None
+        while not self._queue.empty():
+            await self._flush(self._take_batch())
+
+    async def submit(self, fields: Dict[str, Any]) -> Response:
+        """
+        Queue a Response for insertion.
+
+        Args:
+            fields: Response column values, as passed to ``create_response``
+
+        Returns:
+            The (not yet persisted) Response, with its id and created_at set
+        """
+        row = {
+            "id": uuid.uuid4(),
+            "created_at": datetime.now(timezone.utc),
+            **fields,
+        }
+        await self._queue.put(row)
+        return Response(**row)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "max_queue": self._queue.maxsize,
+            "written": self.written,
+            "batches": self.batches,
+            "failed_flushes": self.failed_flushes,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "spill_pending": os.path.exists(self.spill_path)
+            or os.path.exists(f"{self.spill_path}.replay"),
+            "dead_lettered": self.dead_lettered,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            stopping = batch[-1] is _STOP
+            if stopping:
+                batch.pop()
+            await self._flush(batch)
+            if stopping:
+                return
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        batch = []
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        try:
+            await self._insert(batch)
+        except Exception as e:
+            logger.error(f"Write-behind flush of {len(batch)} responses failed: {e}")
+            self.failed_flushes += 1
+            await asyncio.to_thread(self._spill, batch)
+            return
+        self.written += len(batch)
+        self.batches += 1
+        if time.monotonic() - self._last_replay >= self.replay_interval:
+            await self._replay_spill()
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        # Core executemany against the table: one round-trip per batch and no
+        # ORM identity-map bookkeeping.
+        rows = _uniform(rows)
+        async with self.session_factory() as db:
+            await db.execute(insert(Response.__table__), rows)
+            if self.on_insert is not None:
+                await self.on_insert(db, rows)
+            await db.commit()
+        if self.on_commit is not None:
+            self.on_commit(rows)
+
+    def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        self._append(self.spill_path, rows)
+        self.spilled += len(rows)
+
+    @staticmethod
+    def _append(path: str, rows: List[Dict[str, Any]]) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.writelines(_encode(row) + "\n" for row in rows)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _truncate(path: str, size: int) -> None:
+        with open(path, "r+b") as f:
+            f.truncate(size)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def _replay_spill(self) -> None:
+        """
+        Insert spilled rows, from the end of the file backwards.
+
+        The file is cut off before each batch once it is committed, so an
+        interrupted replay resumes where it stopped. A batch the database
+        rejects is retried one row at a time to find the bad rows.
+        """
+        self._last_replay = time.monotonic()
+        # Move the file aside first so rows spilled meanwhile are not lost.
+        replay_path = f"{self.spill_path}.replay"
+        if not os.path.exists(replay_path):
+            if not os.path.exists(self.spill_path):
+                return
+            os.replace(self.spill_path, replay_path)
+        entries = []  # (offset of the line, row)
+        offset = 0
+        with open(replay_path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    entries.append((offset, _decode(line.decode("utf-8"))))
+                offset += len(line)
+
+        end = single_from = len(entries)
+        replayed = 0
+        try:
+            while end > 0:
+                size = 1 if end > single_from else self.batch_size
+                start = max(0, end - size)
+                batch = [row for _, row in entries[start:end]]
+                try:
+                    await self._insert(batch)
+                    replayed += len(batch)
+                except _UNAVAILABLE:
+                    raise
+                except Exception as e:
+                    if len(batch) > 1:
+                        logger.warning(f"Spilled batch rejected, retrying by row: {e}")
+                        single_from = start
+                        continue
+                    self._replay_failed(batch[0], e)
+                end = start
+                self._truncate(replay_path, entries[end][0] if end else 0)
+        except _UNAVAILABLE as e:
+            logger.warning(f"Replaying spilled responses failed, will retry: {e}")
+        else:
+            os.remove(replay_path)
+        finally:
+            self.replayed += replayed
+        if replayed:
+            logger.info(f"Replayed {replayed} spilled responses")
+
+    def _replay_failed(self, row: Dict[str, Any], error: Exception) -> None:
+        """Spill a rejected row again, or dead-letter it if it failed too often."""
+        attempts = self._replay_failures.get(row["id"], 0) + 1
+        if attempts < self.max_replay_attempts:
+            self._replay_failures[row["id"]] = attempts
+            self._append(self.spill_path, [row])
+            return
+        self._replay_failures.pop(row["id"], None)
+        self._append(self.dead_letter_path, [row])
+        self.dead_lettered += 1
+        logger.error(
+            f"Response {row['id']} rejected {attempts} times, moved to "
+            f"{self.dead_letter_path}: {error}"
+        )
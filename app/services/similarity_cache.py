@@ -0,0 +1,199 @@
+import hashlib
+import re
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple, Union
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def shingle(text: str, size: int = 3) -> Set[str]:
+    """
+    Split text into overlapping word n-grams.
+
+    Texts shorter than ``size`` words become a single shingle so short
+    prompts still only match near-identical ones. Texts without any words
+    have no shingles.
+    """
+    words = normalize_text(text).split()
+    if not words:
+        return set()
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+class SimilarityIndex:
+    """
+    MinHash/LSH index for finding stored responses to near-duplicate prompts.
+
+    Prompts are reduced to ``num_perm`` MinHash values over word shingles
+    (each shingle is hashed once with SHAKE-128 into ``num_perm`` independent
+    32-bit values) and bucketed by ``bands`` LSH bands, so a lookup only
+    compares the handful of entries sharing a band rather than the whole
+    index. Like the exact response cache, entries expire after
+    ``ttl_seconds`` and are evicted least-recently-used beyond
+    ``max_entries`` so memory stays bounded.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+        max_entries: int = 100000,
+        ttl_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+
+        # entry id -> (namespace, signature, value, expires_at)
+        self._entries: "OrderedDict[int, Tuple[Hashable, array, Any, float]]"
+        self._entries = OrderedDict()
+        # band key -> entry id, or a list of ids once a bucket is shared. Most
+        # buckets hold a single entry, so this avoids a container per bucket.
+        self._buckets: Dict[int, Union[int, List[int]]] = {}
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def signature(self, text: str) -> Optional[array]:
+        """
+        Compute the MinHash signature of a prompt.
+
+        Returns ``None`` for prompts without words (only punctuation or
+        whitespace): they would all share one signature and match each other.
+        """
+        digest_size = 4 * self.num_perm
+        hashes = [
+            array("I", hashlib.shake_128(s.encode("utf-8")).digest(digest_size))
+            for s in shingle(text, self.shingle_size)
+        ]
+        if not hashes:
+            return None
+        return array("I", map(min, zip(*hashes)))
+
+    def query(
+        self, namespace: Hashable, signature: array, threshold: float
+    ) -> Optional[Tuple[Any, float]]:
+        """
+        Find the most similar stored entry in the same namespace.
+
+        Args:
+            namespace: Only entries added under the same namespace match
+            signature: MinHash signature from :meth:`signature`
+            threshold: Minimum estimated Jaccard similarity (0-1)
+
+        Returns:
+            Tuple of (stored value, estimated similarity), or ``None``
+        """
+        best_id, best_similarity = None, threshold
+        now = self._clock()
+        for entry_id in self._candidates(namespace, signature):
+            entry_namespace, entry_signature, _, expires_at = self._entries[entry_id]
+            if expires_at <= now:
+                self._remove(entry_id)
+                self.expirations += 1
+                continue
+            if entry_namespace != namespace:
+                continue
+            matches = sum(1 for x, y in zip(signature, entry_signature) if x == y)
+            similarity = matches / self.num_perm
+            if similarity >= best_similarity:
+                best_id, best_similarity = entry_id, similarity
+
+        if best_id is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(best_id)
+        self.hits += 1
+        return self._entries[best_id][2], best_similarity
+
+    def add(self, namespace: Hashable, signature: array, value: Any) -> None:
+        """Index a value under a prompt signature, evicting LRU entries if full."""
+        entry_id = self._next_id
+        self._next_id += 1
+        expires_at = self._clock() + self.ttl_seconds
+        self._entries[entry_id] = (namespace, signature, value, expires_at)
+        for band_key in self._band_keys(namespace, signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is None:
+                self._buckets[band_key] = entry_id
+            elif isinstance(bucket, list):
+                bucket.append(entry_id)
+            else:
+                self._buckets[band_key] = [bucket, entry_id]
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        self._entries.clear()
+        self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "buckets": len(self._buckets),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _band_keys(self, namespace: Hashable, signature: array) -> List[int]:
+        rows = self.rows
+        return [
+            hash((namespace, band, tuple(signature[band * rows : (band + 1) * rows])))
+            for band in range(self.bands)
+        ]
+
+    def _candidates(self, namespace: Hashable, signature: array) -> Set[int]:
+        candidates: Set[int] = set()
+        for band_key in self._band_keys(namespace, signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is None:
+                continue
+            if isinstance(bucket, list):
+                candidates.update(bucket)
+            else:
+                candidates.add(bucket)
+        return candidates
+
+    def _remove(self, entry_id: int) -> None:
+        namespace, signature, _, _ = self._entries.pop(entry_id)
+        for band_key in self._band_keys(namespace, signature):
+            bucket = self._buckets.get(band_key)
+            if isinstance(bucket, list):
+                bucket.remove(entry_id)
+                if len(bucket) == 1:
+                    self._buckets[band_key] = bucket[0]
+            elif bucket == entry_id:
+                del self._buckets[band_key]
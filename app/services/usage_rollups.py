@@ -0,0 +1,170 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, literal, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.prompt import Prompt
+from app.models.response import Response
+from app.models.usage_rollup import NO_ID, UsageRollupDaily, UsageRollupHourly
+
+logger = logging.getLogger(__name__)
+
+# (rollup model, bucket width as understood by date_trunc)
+ROLLUPS = ((UsageRollupHourly, "hour"), (UsageRollupDaily, "day"))
+
+KEY_COLUMNS = ("bucket", "organization_id", "user_id", "llm_provider_id", "model")
+TOTAL_COLUMNS = ("prompt_count", "cached_count", "token_count", "latency_sum")
+
+# (user_id, organization_id) of a prompt
+Owner = Tuple[Any, Any]
+
+
+def bucket_start(value: datetime, width: str) -> datetime:
+    """Start (UTC) of the hour or day bucket containing ``value``."""
+    value = value.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0) if width == "day" else value
+
+
+def aggregate(
+    rows: Iterable[Dict[str, Any]], owners: Mapping[Any, Owner], width: str
+) -> List[Dict[str, Any]]:
+    """
+    Sum Response rows into rollup rows for one bucket width.
+
+    Rows whose prompt has no known owner are skipped. The result is sorted
+    by key, so concurrent writers lock rollup rows in the same order and
+    cannot deadlock each other.
+    """
+    totals: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        owner = owners.get(row["prompt_id"])
+        if owner is None:
+            continue
+        user_id, organization_id = owner
+        key = (
+            bucket_start(row.get("created_at") or datetime.now(timezone.utc), width),
+            organization_id or NO_ID,
+            user_id or NO_ID,
+            row.get("llm_provider_id") or NO_ID,
+            (row.get("metadata") or {}).get("model") or "",
+        )
+        entry = totals.get(key)
+        if entry is None:
+            entry = totals[key] = dict(zip(KEY_COLUMNS, key))
+            entry.update(prompt_count=0, cached_count=0, token_count=0)
+            entry["latency_sum"] = 0.0
+        entry["prompt_count"] += 1
+        entry["cached_count"] += 1 if row.get("is_cached") else 0
+        entry["token_count"] += row.get("token_count") or 0
+        entry["latency_sum"] += row.get("latency") or 0.0
+    return [totals[key] for key in sorted(totals, key=lambda k: tuple(map(str, k)))]
+
+
+def _upsert(model: Any) -> Any:
+    statement = pg_insert(model.__table__)
+    table = model.__table__
+    return statement.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={name: table.c[name] + statement.excluded[name] for name in TOTAL_COLUMNS},
+    )
+
+
+async def record_usage(
+    db: AsyncSession,
+    rows: List[Dict[str, Any]],
+    owners: Optional[Mapping[Any, Owner]] = None,
+) -> None:
+    """
+    Add newly stored responses to the hourly and daily rollups.
+
+    Runs in the caller's transaction, so the totals commit (or roll back)
+    together with the Response rows.
+
+    Args:
+        db: Session the responses are being written with
+        rows: Response column values
+        owners: ``{prompt_id: (user_id, organization_id)}`` when the caller
+            has the prompts at hand; missing ones are looked up
+    """
+    if not rows:
+        return
+    owners = dict(owners or {})
+    missing = {row["prompt_id"] for row in rows} - owners.keys()
+    if missing:
+        result = await db.execute(
+            select(Prompt.id, Prompt.user_id, Prompt.organization_id).where(
+                Prompt.id.in_(missing)
+            )
+        )
+        owners.update(
+            {prompt_id: (user_id, org_id) for prompt_id, user_id, org_id in result}
+        )
+    for model, width in ROLLUPS:
+        entries = aggregate(rows, owners, width)
+        if entries:
+            await db.execute(_upsert(model), entries)
+
+
+def rebuild(
+    connection: Any,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """
+    Recompute the rollups from responses for whole UTC days.
+
+    ``since`` is rounded down and ``until`` up to a day boundary; without
+    them everything is rebuilt. Run it in one transaction (``engine.begin()``):
+    responses stored while it runs are added by their writers on top of the
+    rebuilt rows. The app's statement timeout is lifted for that transaction,
+    since scanning all of history can take longer.
+
+    Returns:
+        Rollup rows written per table
+    """
+    if since is not None:
+        since = bucket_start(since, "day")
+    if until is not None and bucket_start(until, "day") != until:
+        until = bucket_start(until, "day") + timedelta(days=1)
+
+    connection.execute(text("SET LOCAL statement_timeout = 0"))
+    responses = Response.__table__
+    prompts = Prompt.__table__
+    written = {}
+    for model, width in ROLLUPS:
+        table = model.__table__
+        cleanup = delete(table)
+        keys = [
+            func.date_trunc(width, responses.c.created_at, "UTC"),
+            func.coalesce(prompts.c.organization_id, literal(NO_ID)),
+            func.coalesce(prompts.c.user_id, literal(NO_ID)),
+            func.coalesce(responses.c.llm_provider_id, literal(NO_ID)),
+            func.coalesce(responses.c.metadata["model"].as_string(), ""),
+        ]
+        query = (
+            select(
+                *keys,
+                func.count(),
+                func.count().filter(responses.c.is_cached.is_(True)),
+                func.coalesce(func.sum(responses.c.token_count), 0),
+                func.coalesce(func.sum(responses.c.latency), 0.0),
+            )
+            .join(prompts, prompts.c.id == responses.c.prompt_id)
+            .group_by(*keys)
+        )
+        if since is not None:
+            cleanup = cleanup.where(table.c.bucket >= since)
+            query = query.where(responses.c.created_at >= since)
+        if until is not None:
+            cleanup = cleanup.where(table.c.bucket < until)
+            query = query.where(responses.c.created_at < until)
+        connection.execute(cleanup)
+        result = connection.execute(
+            insert(table).from_select([*KEY_COLUMNS, *TOTAL_COLUMNS], query)
+        )
+        written[table.name] = result.rowcount
+        logger.info(f"Rebuilt {result.rowcount} rows of {table.name}")
+    return written
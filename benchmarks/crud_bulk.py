@@ -0,0 +1,92 @@
+"""
+Compare per-row CRUD against the bulk methods of AsyncCRUDBase.
+
+Inserts ``--rows`` organizations with each method: ``create`` (one INSERT,
+commit and refresh per row, as the endpoints do), ``create_many``
+(multi-row INSERTs), ``copy_many`` (COPY), then ``upsert_many`` and
+``update_many`` over the rows just written. Rows are named
+``bench-<uuid>`` and deleted afterwards.
+
+Needs a migrated database (alembic upgrade head).
+
+Usage:
+    python -m benchmarks.crud_bulk --rows 5000
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete
+
+import app.models  # noqa: F401
+from app.db.crud.base import AsyncCRUDBase
+from app.db.session import AsyncSessionLocal, async_engine
+from app.models.organization import Organization
+
+crud = AsyncCRUDBase(Organization)
+
+
+def make_rows(count: int):
+    return [
+        {"name": f"bench-{key}", "api_key": f"bench-{key}"}
+        for key in (uuid.uuid4() for _ in range(count))
+    ]
+
+
+async def per_row(db, rows):
+    return [(await crud.create(db, row)).id for row in rows]
+
+
+async def timed(label: str, method, rows) -> list:
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        keys = await method(db, rows)
+        elapsed = time.perf_counter() - start
+    print(
+        f"{label:>12}: {len(rows) / elapsed:10.0f} rows/s  "
+        f"({elapsed * 1000:8.1f}ms for {len(rows)} rows)"
+    )
+    return keys
+
+
+async def main_async(args) -> None:
+    written = []
+    try:
+        written += await timed("create", per_row, make_rows(args.rows))
+        written += await timed("create_many", crud.create_many, make_rows(args.rows))
+        copied = make_rows(args.rows)
+        copied_keys = await timed("copy_many", crud.copy_many, copied)
+        written += copied_keys
+
+        changed = [{**row, "api_key": f"{row['api_key']}-2"} for row in copied]
+        await timed(
+            "upsert_many",
+            lambda db, rows: crud.upsert_many(db, rows, conflict_columns=["name"]),
+            changed,
+        )
+        await timed(
+            "update_many",
+            crud.update_many,
+            [
+                {"id": key, "api_key": f"{row['api_key']}-3"}
+                for key, row in zip(copied_keys, copied)
+            ],
+        )
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Organization).where(Organization.id.in_(written)))
+            await db.commit()
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Compare concurrent-request throughput of the sync and async database paths.
+
+Each simulated request runs a few queries, like submit_prompt does (user
+lookup, prompt insert, response insert). Between them it awaits a fake
+provider call. In ``sync`` mode the queries go through SessionLocal inside
+the coroutine, as the endpoints used to, so every query blocks the event
+loop. In ``async`` mode they go through AsyncSessionLocal (asyncpg).
+
+Needs a reachable database (DATABASE_URL / POSTGRES_* settings); only
+``SELECT pg_sleep(...)`` is executed, so no schema is required.
+
+Usage:
+    python -m benchmarks.db_concurrency --requests 500 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+
+QUERY = text("SELECT pg_sleep(:seconds)")
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def sync_request(args) -> None:
+    db = SessionLocal()
+    try:
+        for _ in range(args.queries):
+            db.execute(QUERY, {"seconds": args.query_time})
+            await asyncio.sleep(args.provider_latency / args.queries)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def async_request(args) -> None:
+    async with AsyncSessionLocal() as db:
+        for _ in range(args.queries):
+            await db.execute(QUERY, {"seconds": args.query_time})
+            await asyncio.sleep(args.provider_latency / args.queries)
+        await db.commit()
+
+
+async def run(mode: str, args) -> None:
+    request = sync_request if mode == "sync" else async_request
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def timed() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await request(args)
+            latencies.append(time.perf_counter() - start)
+
+    await request(args)  # Warm up the connection pool
+    start = time.perf_counter()
+    await asyncio.gather(*(timed() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{mode:>5}: {args.requests / elapsed:8.1f} req/s  "
+        f"p50 {percentile(latencies, 0.5) * 1000:7.1f}ms  "
+        f"p95 {percentile(latencies, 0.95) * 1000:7.1f}ms  "
+        f"({elapsed:.2f}s total)"
+    )
+
+
+async def main_async(args) -> None:
+    for mode in args.modes:
+        await run(mode, args)
+    await async_engine.dispose()
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=3)
+    parser.add_argument("--query-time", type=float, default=0.005)
+    parser.add_argument("--provider-latency", type=float, default=0.05)
+    parser.add_argument(
+        "--modes", nargs="+", choices=["sync", "async"], default=["sync", "async"]
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{args.requests} requests, concurrency {args.concurrency}, "
+        f"{args.queries} x {args.query_time * 1000:.0f}ms queries, "
+        f"{args.provider_latency * 1000:.0f}ms provider latency"
+    )
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
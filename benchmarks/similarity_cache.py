@@ -0,0 +1,87 @@
+"""
+Benchmark lookup latency of the MinHash/LSH similarity cache.
+
+Usage:
+    python -m benchmarks.similarity_cache --entries 100000 --queries 2000
+"""
+
+import argparse
+import random
+import statistics
+import time
+import resource
+
+from app.services.similarity_cache import SimilarityIndex
+
+WORDS = (
+    "explain summarize compare write describe list translate draft review "
+    "the a an of for with in on about between how why what which "
+    "quantum computing machine learning neural network database index "
+    "python rust latency throughput cache memory cluster kubernetes "
+    "customer email report policy contract invoice revenue forecast"
+).split()
+
+
+def make_prompt(rng: random.Random, length: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def perturb(rng: random.Random, prompt: str) -> str:
+    """Change casing/whitespace and append a trailing sentence."""
+    words = prompt.split()
+    text = "  ".join(w.upper() if rng.random() < 0.2 else w for w in words)
+    return f"{text}. Please be concise."
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=60)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    index = SimilarityIndex(max_entries=args.entries)
+    prompts = [make_prompt(rng, args.words) for _ in range(args.entries)]
+
+    start = time.perf_counter()
+    for i, prompt in enumerate(prompts):
+        index.add("bench", index.signature(prompt), i)
+    build_seconds = time.perf_counter() - start
+
+    signature_ms, lookup_ms, hits = [], [], 0
+    for _ in range(args.queries):
+        prompt = rng.choice(prompts)
+        query = perturb(rng, prompt) if rng.random() < 0.5 else make_prompt(rng, 60)
+
+        start = time.perf_counter()
+        signature = index.signature(query)
+        signed = time.perf_counter()
+        match = index.query("bench", signature, args.threshold)
+        done = time.perf_counter()
+
+        signature_ms.append((signed - start) * 1000)
+        lookup_ms.append((done - signed) * 1000)
+        hits += match is not None
+
+    print(f"entries:           {len(index):,}")
+    print(f"build time:        {build_seconds:.1f}s")
+    # ru_maxrss is in KiB on Linux; includes the generated prompts as well.
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"peak RSS:          {max_rss / 1024:.1f} MiB")
+    print(f"hit rate:          {hits / args.queries:.1%}")
+    for name, samples in (("signature", signature_ms), ("lookup", lookup_ms)):
+        print(
+            f"{name + ' ms':<18} p50={statistics.median(samples):.3f} "
+            f"p95={percentile(samples, 0.95):.3f} p99={percentile(samples, 0.99):.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from app.db import blob_store
+from app.db.blob_store import BlobStore, LocalBlobStore, ResponseBodyStore
+from app.models.response import Response
+
+
+@pytest.fixture
+def bodies(tmp_path, monkeypatch):
+    store = ResponseBodyStore(LocalBlobStore(str(tmp_path)), enabled=True, threshold=64)
+    monkeypatch.setattr(blob_store, "response_bodies", store)
+    return store
+
+
+def _blob_files(root):
+    return [name for _, _, names in os.walk(root) for name in names]
+
+
+def test_incomplete_backends_cannot_be_created():
+    """Test that a blob store missing an operation fails when constructed."""
+
+    class WriteOnlyStore(BlobStore):
+        def put(self, key, data):
+            pass
+
+    with pytest.raises(TypeError):
+        WriteOnlyStore()
+
+
+def test_small_bodies_stay_inline(bodies):
+    """Test that bodies under the threshold are not offloaded."""
+    assert bodies.offload("short") is None
+    assert bodies.offload(None) is None
+
+
+def test_large_bodies_are_compressed_and_deduplicated(bodies, tmp_path):
+    """Test that identical large bodies share one compressed blob."""
+    body = "the same paragraph again. " * 200
+
+    ref = bodies.offload(body)
+
+    assert ref.startswith("zstd:")
+    assert bodies.offload(body) == ref
+    files = _blob_files(tmp_path)
+    assert len(files) == 1
+    assert os.path.getsize(os.path.join(tmp_path, ref[5:7], ref[7:9], ref[5:])) < len(
+        body
+    )
+    assert bodies.load(ref) == body
+    assert bodies.stats()["deduplicated"] == 1
+
+
+def test_disabled_store_keeps_everything_inline(tmp_path):
+    """Test that nothing is offloaded while the mode is off."""
+    store = ResponseBodyStore(LocalBlobStore(str(tmp_path)), threshold=1)
+
+    assert store.offload("x" * 100) is None
+    assert _blob_files(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_offload_fields_replaces_content_with_ref(bodies):
+    """Test that the row keeps only the reference for a large body."""
+    fields = {"content": "y" * 100, "token_count": 3}
+
+    offloaded = await bodies.offload_fields(fields)
+
+    assert offloaded["content"] is None
+    assert offloaded["content_ref"].startswith("zstd:")
+    assert offloaded["token_count"] == 3
+    assert await bodies.offload_fields({"content": "hi"}) == {
+        "content": "hi",
+        "content_ref": None,
+    }
+
+
+def test_response_content_is_fetched_lazily(bodies):
+    """Test that Response.content loads an offloaded body on first access only."""
+    body = "z" * 100
+    response = Response(content=None, content_ref=bodies.offload(body))
+
+    assert bodies.loads == 0
+    assert response.content == body
+    assert response.content == body
+    assert bodies.loads == 1
+    assert Response(content="inline").content == "inline"
@@ -0,0 +1,146 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import psycopg2
+
+from app.db.crud.base import AsyncCRUDBase, CRUDBase, _copy_rows, _copy_text
+from app.models.llm_provider import LLMProvider
+from app.models.organization import Organization
+from app.models.prompt import Prompt
+
+
+def _db(rows):
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=rows)
+    db.commit = AsyncMock()
+    db.refresh = AsyncMock()
+    return db
+
+
+def _sql(db):
+    statement = db.execute.call_args.args[0]
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_create_many_is_one_insert_without_refresh():
+    """Test that create_many sends one INSERT ... RETURNING and one commit."""
+    ids = [uuid.uuid4(), uuid.uuid4()]
+    db = _db([(ids[0],), (ids[1],)])
+    rows = [{"name": "a", "api_key": "ka"}, {"name": "b", "api_key": "kb"}]
+
+    keys = await AsyncCRUDBase(Organization).create_many(db, rows)
+
+    assert keys == ids
+    db.execute.assert_awaited_once()
+    assert db.execute.call_args.args[1] == rows
+    assert "RETURNING organizations.id" in _sql(db)
+    db.commit.assert_awaited_once()
+    db.refresh.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_bulk_rows_must_share_fields():
+    """Test that rows setting different fields are rejected."""
+    db = _db([])
+
+    with pytest.raises(ValueError):
+        await AsyncCRUDBase(Organization).create_many(
+            db, [{"name": "a", "api_key": "k"}, {"name": "b"}]
+        )
+    assert await AsyncCRUDBase(Organization).create_many(db, []) == []
+    db.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_updates_conflicts_once_per_key():
+    """Test ON CONFLICT DO UPDATE with duplicate keys collapsed, last one winning."""
+    db = _db([])
+    rows = [{"name": "a", "api_key": "k1"}, {"name": "a", "api_key": "k2"}]
+
+    await AsyncCRUDBase(Organization).upsert_many(db, rows, conflict_columns=["name"])
+
+    sql = _sql(db)
+    assert "ON CONFLICT (name) DO UPDATE SET api_key = excluded.api_key" in sql
+    assert "updated_at = now()" in sql
+    assert db.execute.call_args.args[1] == [{"name": "a", "api_key": "k2"}]
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_can_skip_conflicts():
+    """Test that an empty update_columns turns the upsert into DO NOTHING."""
+    db = _db([])
+
+    await AsyncCRUDBase(Organization).upsert_many(
+        db, [{"name": "a", "api_key": "k"}], ["name"], update_columns=[]
+    )
+
+    assert "ON CONFLICT (name) DO NOTHING" in _sql(db)
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_defaults_to_the_primary_key():
+    """Test that partitioned tables conflict on their whole (id, created_at) key."""
+    db = _db([])
+    row = {"id": uuid.uuid4(), "created_at": "2026-10-01", "content": "x"}
+
+    await AsyncCRUDBase(Prompt).upsert_many(db, [row])
+
+    assert "ON CONFLICT (id, created_at) DO UPDATE" in _sql(db)
+    with pytest.raises(ValueError, match="created_at"):
+        await AsyncCRUDBase(Prompt).upsert_many(db, [{"id": row["id"]}])
+
+
+@pytest.mark.asyncio
+async def test_update_many_is_one_statement():
+    """Test that per-row updates are sent as a single UPDATE ... FROM VALUES."""
+    ids = [uuid.uuid4(), uuid.uuid4()]
+    db = _db([(ids[0],)])
+
+    keys = await AsyncCRUDBase(Organization).update_many(
+        db, [{"id": ids[0], "name": "x"}, {"id": ids[1], "name": "y"}]
+    )
+
+    assert keys == [ids[0]]
+    db.execute.assert_awaited_once()
+    sql = _sql(db)
+    assert sql.startswith("UPDATE organizations SET name=")
+    assert "FROM (VALUES" in sql
+    assert "WHERE organizations.id = CAST(source.id AS UUID)" in sql
+
+
+def test_sync_create_many_returns_keys():
+    """Test the sync variant used by the Session-based endpoints."""
+    key = uuid.uuid4()
+    db = MagicMock()
+    db.execute.return_value = [(key,)]
+
+    keys = CRUDBase(Organization).create_many(db, [{"name": "a", "api_key": "k"}])
+
+    assert keys == [key]
+    db.commit.assert_called_once()
+    db.refresh.assert_not_called()
+
+
+def test_copy_rows_fill_client_side_defaults():
+    """Test that COPY rows get Python defaults and driver-ready values."""
+    rows = [{"name": "p", "api_base_url": "u", "config": {"a": 1}}]
+
+    names, records = _copy_rows(LLMProvider.__table__, rows, psycopg2.dialect())
+
+    assert names[:3] == ["name", "api_base_url", "config"]
+    record = dict(zip(names, records[0]))
+    assert isinstance(record["id"], uuid.UUID)
+    assert record["id"] == rows[0]["id"]
+    assert record["config"] == '{"a": 1}'
+    assert record["auth_method"] == "API_KEY"
+    assert "created_at" not in names  # Server default
+
+
+def test_copy_text_escapes_values():
+    """Test COPY text-format encoding of NULLs, booleans and special characters."""
+    assert _copy_text(None) == "\\N"
+    assert _copy_text(True) == "t"
+    assert _copy_text("a\tb\nc\\") == "a\\tb\\nc\\\\"
@@ -0,0 +1,128 @@
+import io
+from unittest.mock import MagicMock
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy.dialects import postgresql
+
+from app.db.materialized_views import (
+    VIEWS,
+    MaterializedViewRefresher,
+    refresh_intervals,
+    refresh_timeouts,
+)
+
+VIEW = "mv_provider_daily_errors"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fake_engine(*results):
+    """Engine whose connection returns ``results`` from successive executes."""
+    connection = MagicMock()
+    connection.execute.side_effect = list(results) + [MagicMock()] * 3
+    engine = MagicMock()
+    engine.begin.return_value.__enter__.return_value = connection
+    return engine, connection
+
+
+def result(scalar=None, first=None):
+    value = MagicMock()
+    value.scalar.return_value = scalar
+    value.first.return_value = first
+    return value
+
+
+def _sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_refresh_intervals_apply_overrides():
+    """Test that per-view intervals override the default."""
+    intervals = refresh_intervals(300, {VIEW: 60})
+
+    assert intervals[VIEW] == 60
+    assert set(intervals) == set(VIEWS)
+    assert intervals["mv_team_daily_usage"] == 300
+    with pytest.raises(ValueError, match="mv_unknown"):
+        refresh_intervals(300, {"mv_unknown": 5})
+
+
+@pytest.mark.parametrize("populated, keyword", [(True, "CONCURRENTLY "), (None, "")])
+def test_refresh_records_the_refresh(populated, keyword):
+    """Test that a due view is refreshed (concurrently once populated)."""
+    engine, connection = fake_engine(
+        result(scalar=True), result(first=None), result(scalar=populated)
+    )
+    refresher = MaterializedViewRefresher(
+        engine, refresh_intervals(300), refresh_timeouts(600, {VIEW: 90})
+    )
+
+    assert refresher.refresh(VIEW)
+
+    statements = [call.args[0] for call in connection.execute.call_args_list]
+    assert "pg_try_advisory_xact_lock" in _sql(statements[0])
+    assert str(statements[3]) == "SET LOCAL statement_timeout = 90000"
+    assert str(statements[4]) == f"REFRESH MATERIALIZED VIEW {keyword}{VIEW}"
+    assert "ON CONFLICT (view_name) DO UPDATE" in _sql(statements[5])
+    assert VIEW in refresher.last_duration
+
+
+def test_refresh_skips_views_other_workers_handle():
+    """Test that a locked or recently refreshed view is left alone."""
+    engine, connection = fake_engine(result(scalar=False))
+    refresher = MaterializedViewRefresher(engine, refresh_intervals(300))
+    assert not refresher.refresh(VIEW)
+    assert connection.execute.call_count == 1
+
+    engine, connection = fake_engine(result(scalar=True), result(first=(VIEW,)))
+    refresher = MaterializedViewRefresher(engine, refresh_intervals(300))
+    assert not refresher.refresh(VIEW)
+    assert connection.execute.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_refresh_due_follows_intervals():
+    """Test that views refresh per interval; skipped and failed ones retry sooner."""
+    clock = FakeClock()
+    refresher = MaterializedViewRefresher(
+        MagicMock(), refresh_intervals(100, {VIEW: 10}), clock=clock
+    )
+    calls = []
+    outcomes = {VIEW: True, "mv_team_daily_usage": False}
+
+    def refresh(name):
+        calls.append(name)
+        if name == "mv_organization_daily_usage":
+            raise RuntimeError("db down")
+        return outcomes[name]
+
+    refresher.refresh = refresh
+
+    await refresher.refresh_due()
+    assert len(calls) == 3
+    clock.now = 10
+    await refresher.refresh_due()
+    assert calls[3:] == ["mv_organization_daily_usage", VIEW, "mv_team_daily_usage"]
+
+    stats = refresher.stats()
+    assert stats[VIEW]["refreshes"] == 2
+    assert stats["mv_organization_daily_usage"]["failures"] == 2
+
+
+def test_migration_creates_concurrently_refreshable_views():
+    """Test that every view gets the unique index REFRESH CONCURRENTLY needs."""
+    config = Config("alembic.ini", output_buffer=io.StringIO())
+    command.upgrade(config, "0006:0007", sql=True)
+    sql = config.output_buffer.getvalue()
+
+    for name in VIEWS:
+        assert f"CREATE MATERIALIZED VIEW {name} AS" in sql
+        assert f"CREATE UNIQUE INDEX ux_{name} ON {name} " in sql
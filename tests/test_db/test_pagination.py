@@ -0,0 +1,84 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.db.crud.prompt import async_prompt_crud
+from app.db.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.models.prompt import Prompt
+
+
+def test_cursor_round_trip():
+    """Test that a cursor decodes back to the key it was made from."""
+    key = (datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc), uuid.uuid4())
+
+    cursor = encode_cursor(*key)
+
+    assert "|" not in cursor
+    assert decode_cursor(cursor) == key
+
+
+@pytest.mark.parametrize(
+    "cursor", ["not-a-cursor", "", encode_cursor(datetime.now(), "x")]
+)
+def test_invalid_cursor(cursor):
+    """Test that malformed cursors raise InvalidCursorError."""
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def _prompts(n):
+    start = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    return [
+        Prompt(id=uuid.uuid4(), content=f"p{i}", created_at=start - timedelta(i))
+        for i in range(n)
+    ]
+
+
+def _db(rows):
+    db = MagicMock()
+    result = MagicMock()
+    result.all.return_value = rows
+    db.execute = AsyncMock(return_value=result)
+    return db
+
+
+@pytest.mark.asyncio
+async def test_get_page_returns_next_key():
+    """Test that a full page reports the key of its last row."""
+    prompts = _prompts(3)
+    db = _db([(prompt, 2) for prompt in prompts])
+
+    rows, next_key = await async_prompt_crud.get_page(db, limit=2)
+
+    assert rows == [(prompts[0], 2), (prompts[1], 2)]
+    assert next_key == (prompts[1].created_at, prompts[1].id)
+
+
+@pytest.mark.asyncio
+async def test_get_page_last_page():
+    """Test that a short page has no next key."""
+    prompts = _prompts(1)
+    db = _db([(prompts[0], 0)])
+
+    rows, next_key = await async_prompt_crud.get_page(db, limit=2)
+
+    assert rows == [(prompts[0], 0)]
+    assert next_key is None
+
+
+@pytest.mark.asyncio
+async def test_get_page_query_is_keyset_with_counted_responses():
+    """Test that the query seeks past the cursor and never selects response rows."""
+    db = _db([])
+    after = (datetime(2024, 5, 1, tzinfo=timezone.utc), uuid.uuid4())
+
+    await async_prompt_crud.get_page(db, Prompt.user_id == uuid.uuid4(), after=after)
+
+    sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "(prompts.created_at, prompts.id) <" in sql
+    assert "count(responses.id)" in sql
+    assert "responses.content" not in sql
+    assert "OFFSET" not in sql
@@ -0,0 +1,174 @@
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from app.db.blob_store import LocalBlobStore, ResponseBodyStore
+from app.db.partitions import (
+    PartitionManager,
+    add_months,
+    month_start,
+    partition_month,
+    partition_name,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime(2024, 11, 20, 15, 30, tzinfo=timezone.utc)
+
+    def __call__(self):
+        return self.now
+
+
+class FakeEngine:
+    """Sync engine that records statements and serves a partition listing."""
+
+    def __init__(self, partitions=None, content_refs=None, referenced=()):
+        self.partitions = partitions or {}
+        self.content_refs = content_refs or {}
+        self.referenced = set(referenced)
+        self.statements = []
+
+    def connect(self):
+        return FakeConnection(self)
+
+    begin = connect
+
+
+class FakeConnection:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execution_options(self, **options):
+        return self
+
+    def execute(self, statement, params=None):
+        if params is not None and "refs" in params:
+            return FakeResult(
+                [r for r in params["refs"] if r in self.engine.referenced]
+            )
+        if params is not None:
+            return FakeResult(self.engine.partitions.get(params["table"], []))
+        self.engine.statements.append(str(statement))
+        for name, refs in self.engine.content_refs.items():
+            if str(statement).startswith(f'SELECT DISTINCT content_ref FROM "{name}"'):
+                return FakeResult(refs)
+        return FakeResult([])
+
+
+class FakeResult:
+    def __init__(self, values):
+        self.values = values
+
+    def scalars(self):
+        return iter(self.values)
+
+
+def test_month_helpers():
+    """Test month arithmetic and partition naming round trips."""
+    month = month_start(datetime(2024, 12, 31, 23, 59, tzinfo=timezone.utc))
+
+    assert month == datetime(2024, 12, 1, tzinfo=timezone.utc)
+    assert add_months(month, 1) == datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert add_months(month, -12) == datetime(2023, 12, 1, tzinfo=timezone.utc)
+    assert partition_name("prompts", month) == "prompts_p2024_12"
+    assert partition_month("prompts_p2024_12") == month
+    assert partition_month("prompts_unpartitioned") is None
+
+
+def test_ensure_partitions_creates_only_missing_months():
+    """Test that existing partitions are left alone and gaps are filled."""
+    engine = FakeEngine({"prompts": ["prompts_p2024_11", "prompts_p2024_12"]})
+    manager = PartitionManager(engine, tables=("prompts",), clock=FakeClock())
+
+    created = manager.ensure_partitions(months_ahead=2)
+
+    assert created == ["prompts_p2025_01"]
+    assert "FOR VALUES FROM ('2025-01-01T00:00:00+00:00')" in engine.statements[0]
+    assert "TO ('2025-02-01T00:00:00+00:00')" in engine.statements[0]
+
+
+def test_retention_keeps_current_month_and_drops_older():
+    """Test that only partitions older than the kept months are retired."""
+    engine = FakeEngine(
+        {"prompts": ["prompts_p2024_08", "prompts_p2024_09", "prompts_p2024_10"]}
+    )
+    manager = PartitionManager(engine, tables=("prompts",), clock=FakeClock())
+
+    retired = manager.apply_retention(keep_months=3, action="drop")
+
+    assert retired == ["prompts_p2024_08"]
+    assert engine.statements == [
+        'ALTER TABLE "prompts" DETACH PARTITION "prompts_p2024_08" CONCURRENTLY',
+        'DROP TABLE "prompts_p2024_08"',
+    ]
+
+
+def test_retention_rejects_bad_arguments():
+    """Test that retention validates its action and window."""
+    manager = PartitionManager(FakeEngine(), clock=FakeClock())
+
+    with pytest.raises(ValueError):
+        manager.apply_retention(keep_months=3, action="truncate")
+    with pytest.raises(ValueError):
+        manager.apply_retention(keep_months=0)
+    with pytest.raises(ValueError):
+        manager.apply_retention(keep_months=3, action="archive")
+
+
+def test_retention_deletes_only_unused_blobs_of_dropped_responses(tmp_path):
+    """Test that blobs still referenced or recently reused are kept."""
+    bodies = ResponseBodyStore(LocalBlobStore(str(tmp_path)), enabled=True, threshold=1)
+    orphan = bodies.offload("only in the old partition")
+    shared = bodies.offload("also in a newer partition")
+    reused = bodies.offload("stored again just now")
+    an_hour_ago = time.time() - 3600
+    for ref in (orphan, shared, reused):
+        os.utime(bodies.blobs._path(bodies._key(ref)), (an_hour_ago, an_hour_ago))
+    assert bodies.offload("stored again just now") == reused
+
+    engine = FakeEngine(
+        {"responses": ["responses_p2024_08", "responses_p2024_09"]},
+        content_refs={"responses_p2024_08": [orphan, shared, reused]},
+        referenced=[shared],
+    )
+    manager = PartitionManager(
+        engine,
+        tables=("responses",),
+        clock=FakeClock(),
+        bodies=bodies,
+        body_grace_seconds=60,
+    )
+
+    assert manager.apply_retention(keep_months=3, action="drop") == [
+        "responses_p2024_08"
+    ]
+    assert "SET LOCAL statement_timeout = 0" in engine.statements
+    assert bodies.deleted == 1
+    with pytest.raises(FileNotFoundError):
+        bodies.load(orphan)
+    assert bodies.load(shared) == "also in a newer partition"
+    assert bodies.load(reused) == "stored again just now"
+
+
+def test_retention_detach_keeps_blobs():
+    """Test that a detached partition's rows keep their blobs."""
+    engine = FakeEngine(
+        {"responses": ["responses_p2024_08"]},
+        content_refs={"responses_p2024_08": ["zstd:abc"]},
+    )
+    manager = PartitionManager(engine, tables=("responses",), clock=FakeClock())
+
+    manager.apply_retention(keep_months=3, action="detach")
+
+    assert engine.statements == [
+        'ALTER TABLE "responses" DETACH PARTITION "responses_p2024_08" CONCURRENTLY'
+    ]
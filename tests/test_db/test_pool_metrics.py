@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.db.pool_metrics import InstrumentedQueuePool, instrument_pool
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_counts_checkouts_and_overflow(engine):
+    """Test that checkouts, overflow and hold times are tracked."""
+    metrics = instrument_pool(engine)
+
+    with engine.connect() as first, engine.connect() as second:
+        first.execute(text("SELECT 1"))
+        second.execute(text("SELECT 1"))
+        snapshot = metrics.snapshot()
+        assert snapshot["checked_out"] == 2
+        assert snapshot["overflow"] == 1
+
+    snapshot = metrics.snapshot()
+    assert snapshot["checkouts"] == 2
+    assert snapshot["checked_out"] == 0
+    assert snapshot["peak_checked_out"] == 2
+    assert snapshot["peak_overflow"] == 1
+    assert snapshot["connects"] == 2
+    assert snapshot["hold_ms"]["max"] is not None
+
+
+def test_records_pool_timeouts(engine):
+    """Test that a starved pool shows up as timeouts and wait time."""
+    metrics = instrument_pool(engine)
+
+    with engine.connect(), engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["timeouts"] == 1
+    assert snapshot["wait_ms"]["max"] >= 50
+
+
+def test_metrics_survive_dispose(engine):
+    """Test that closed connections report lifetimes and counting continues."""
+    metrics = instrument_pool(engine)
+    with engine.connect():
+        pass
+
+    engine.dispose()
+    with engine.connect():
+        pass
+
+    snapshot = metrics.snapshot()
+    assert snapshot["closes"] == 1
+    assert snapshot["connection_lifetime_s"]["max"] is not None
+    assert snapshot["checkouts"] == 2
+    assert snapshot["wait_ms"]["p50"] is not None
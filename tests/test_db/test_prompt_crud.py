@@ -0,0 +1,41 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.db.crud.prompt import async_prompt_crud
+from app.models.prompt import Prompt
+
+
+def _db(row):
+    result = MagicMock()
+    result.first.return_value = row
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=result)
+    return db
+
+
+@pytest.mark.asyncio
+async def test_latest_response_is_one_lateral_query():
+    """Test that the newest response and provider come from a single query."""
+    prompt = Prompt(id=uuid.uuid4(), content="hi")
+    db = _db((prompt, None, None))
+
+    found = await async_prompt_crud.get_with_latest_response(db, prompt.id)
+
+    assert found == (prompt, None, None)
+    db.execute.assert_awaited_once()
+    sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "LEFT OUTER JOIN LATERAL" in sql
+    assert "ORDER BY responses.created_at DESC, responses.id DESC" in sql
+    assert "LIMIT" in sql
+    assert "llm_providers.name" in sql
+
+
+@pytest.mark.asyncio
+async def test_latest_response_missing_prompt():
+    """Test that an unknown prompt id returns None."""
+    db = _db(None)
+
+    assert await async_prompt_crud.get_with_latest_response(db, uuid.uuid4()) is None
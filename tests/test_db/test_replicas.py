@@ -0,0 +1,126 @@
+import pytest
+
+from app.db.replicas import Replica, ReplicaRouter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeEngine:
+    """Async engine whose connections report a configurable lag."""
+
+    def __init__(self, lag=0.0):
+        self.lag = lag
+        self.down = False
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def __aenter__(self):
+        if self.engine.down:
+            raise ConnectionError("replica unreachable")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement):
+        return FakeResult(self.engine.lag)
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+def make_replica(name, lag=0.0):
+    return Replica(name, object, object, FakeEngine(lag))
+
+
+def make_router(clock, *replicas, **kwargs):
+    options = {"max_lag": 5.0, "check_interval": 2.0, "read_your_writes_seconds": 10}
+    return ReplicaRouter(list(replicas), clock=clock, **{**options, **kwargs})
+
+
+def test_no_replicas_reads_from_primary():
+    """Test that reads go to the primary when no replica is configured."""
+    router = make_router(FakeClock())
+
+    assert router.choose("client") is None
+
+
+@pytest.mark.asyncio
+async def test_replicas_used_round_robin_once_checked():
+    """Test that replicas are only used after a successful lag check."""
+    clock = FakeClock()
+    first, second = make_replica("a"), make_replica("b")
+    router = make_router(clock, first, second)
+
+    assert router.choose() is None  # Lag not known yet
+
+    await router.check_lag()
+    assert {router.choose().name for _ in range(4)} == {"a", "b"}
+    assert router.stats()["replica_reads"] == 4
+
+
+@pytest.mark.asyncio
+async def test_lagging_replica_falls_back_to_primary():
+    """Test that a replica behind by more than max_lag is skipped."""
+    clock = FakeClock()
+    replica = make_replica("a", lag=12.0)
+    router = make_router(clock, replica)
+
+    await router.check_lag()
+    assert router.choose() is None
+
+    replica.async_engine.lag = 1.0
+    await router.check_lag()
+    assert router.choose() is replica
+
+
+@pytest.mark.asyncio
+async def test_failed_checks_make_replica_unusable():
+    """Test that a replica whose lag cannot be measured is not trusted for long."""
+    clock = FakeClock()
+    replica = make_replica("a")
+    router = make_router(clock, replica)
+    await router.check_lag()
+
+    replica.async_engine.down = True
+    clock.now += 3
+    await router.check_lag()
+    assert replica.error == "replica unreachable"
+    assert router.choose() is replica  # Last good check is still recent
+
+    clock.now += 4
+    assert router.choose() is None
+
+
+@pytest.mark.asyncio
+async def test_reads_follow_writes_to_primary():
+    """Test read-your-writes stickiness and its expiry."""
+    clock = FakeClock()
+    replica = make_replica("a")
+    router = make_router(clock, replica, check_interval=60)
+    await router.check_lag()
+
+    router.record_write("writer")
+    assert router.choose("writer") is None
+    assert router.choose("reader") is replica
+
+    clock.now += 11
+    assert router.choose("writer") is replica
+    assert router.stats()["sticky_reads"] == 1
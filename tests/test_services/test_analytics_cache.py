@@ -0,0 +1,137 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services.analytics_cache import AnalyticsCache
+
+ORG = uuid.uuid4()
+OTHER_ORG = uuid.uuid4()
+NOW = datetime(2025, 4, 7, 12, tzinfo=timezone.utc)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(clock):
+    return AnalyticsCache(ttl_seconds=60, stale_after=5, clock=clock, now=lambda: NOW)
+
+
+@pytest.mark.asyncio
+async def test_repeated_reports_are_cached():
+    """Test that the same report is computed once until it expires."""
+    clock = FakeClock()
+    cache = make_cache(clock)
+    compute = AsyncMock(return_value=[{"prompt_count": 1}])
+
+    first = await cache.get_or_compute("usage", ORG, None, None, compute)
+    second = await cache.get_or_compute("usage", ORG, None, None, compute)
+    clock.now = 61
+    await cache.get_or_compute("usage", ORG, None, None, compute)
+
+    assert first == second == [{"prompt_count": 1}]
+    assert compute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_writes_make_open_windows_stale_after_a_delay():
+    """Test that a write is only picked up once the result is stale_after old."""
+    clock = FakeClock()
+    cache = make_cache(clock)
+    compute = AsyncMock(side_effect=[1, 2])
+
+    await cache.get_or_compute("usage", ORG, None, None, compute)
+    clock.now = 1
+    cache.record_write(ORG)
+    assert await cache.get_or_compute("usage", ORG, None, None, compute) == 1
+    clock.now = 6
+    assert await cache.get_or_compute("usage", ORG, None, None, compute) == 2
+    assert cache.stats()["stale_misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_closed_windows_ignore_writes():
+    """Test that a report whose window has ended is not recomputed on writes."""
+    clock = FakeClock()
+    cache = make_cache(clock)
+    compute = AsyncMock(return_value=1)
+    until = NOW - timedelta(hours=1)
+
+    await cache.get_or_compute("usage", ORG, until, None, compute)
+    clock.now = 10
+    cache.record_write(ORG)
+    await cache.get_or_compute("usage", ORG, until, None, compute)
+
+    assert compute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_recently_ended_windows_still_take_writes():
+    """Test that a window is only closed once late rows can no longer arrive."""
+    clock = FakeClock()
+    cache = AnalyticsCache(
+        stale_after=5, settle_seconds=5.5, clock=clock, now=lambda: NOW
+    )
+    compute = AsyncMock(return_value=1)
+    until = NOW - timedelta(seconds=2)
+
+    await cache.get_or_compute("usage", ORG, until, None, compute)
+    clock.now = 10
+    cache.record_write(ORG)
+    await cache.get_or_compute("usage", ORG, until, None, compute)
+
+    assert compute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_writes_only_invalidate_their_organization():
+    """Test that a write affects its organization and unscoped reports."""
+    clock = FakeClock()
+    cache = make_cache(clock)
+    compute = AsyncMock(return_value=1)
+    for scope in (ORG, OTHER_ORG, None):
+        await cache.get_or_compute("usage", scope, None, None, compute)
+
+    clock.now = 10
+    cache.record_write(ORG)
+    for scope in (ORG, OTHER_ORG, None):
+        await cache.get_or_compute("usage", scope, None, None, compute)
+    assert compute.await_count == 5
+
+    clock.now = 20
+    cache.record_write()
+    await cache.get_or_compute("usage", OTHER_ORG, None, None, compute)
+    assert compute.await_count == 6
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_query():
+    """Test that simultaneous requests for one report run it once."""
+    cache = make_cache(FakeClock())
+    release = asyncio.Event()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "report"
+
+    tasks = [
+        asyncio.ensure_future(cache.get_or_compute("usage", ORG, None, 7, compute))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == ["report"] * 3
+    assert calls == 1
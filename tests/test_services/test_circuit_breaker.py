@@ -0,0 +1,97 @@
+import pytest
+
+from app.services.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(clock, **kwargs):
+    options = {"window_size": 10, "min_calls": 4, "open_seconds": 30, **kwargs}
+    return CircuitBreaker("openai", clock=clock, **options)
+
+
+def test_opens_on_error_rate():
+    """Test that the circuit opens once the error rate reaches the threshold."""
+    breaker = make_breaker(FakeClock())
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_success(0.1)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "closed"  # Below min_calls
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.before_call()
+    assert exc_info.value.retry_after == pytest.approx(30)
+
+
+def test_opens_on_slow_calls():
+    """Test that mostly-slow calls open the circuit even without errors."""
+    breaker = make_breaker(FakeClock(), slow_call_seconds=5)
+
+    for _ in range(4):
+        breaker.before_call()
+        breaker.record_success(10.0)
+
+    assert breaker.state == "open"
+
+
+def test_half_open_trial_closes_or_reopens():
+    """Test that a single trial call decides whether the circuit closes."""
+    clock = FakeClock()
+    breaker = make_breaker(clock, min_calls=1)
+    breaker.before_call()
+    breaker.record_failure()
+
+    clock.now += 30
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # Only one trial at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_success(0.1)
+    assert breaker.state == "closed"
+    assert breaker.times_opened == 2
+
+
+def test_released_trial_frees_the_slot():
+    """Test that a cancelled trial call does not block the next one."""
+    clock = FakeClock()
+    breaker = make_breaker(clock, min_calls=1)
+    breaker.before_call()
+    breaker.record_failure()
+    clock.now += 30
+
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == "half_open"
+
+
+def test_registry_applies_provider_overrides():
+    """Test that config["circuit_breaker"] overrides the registry defaults."""
+    registry = CircuitBreakerRegistry(min_calls=5, open_seconds=30)
+    registry.configure("openai", {"circuit_breaker": {"open_seconds": 5}})
+
+    assert registry.get("openai").open_seconds == 5
+    assert registry.get("openai").min_calls == 5
+    assert registry.get("cohere").open_seconds == 30
+    assert [s["llm_provider"] for s in registry.snapshot()] == ["openai", "cohere"]
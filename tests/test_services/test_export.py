@@ -0,0 +1,95 @@
+import io
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import export
+
+ORG = uuid.uuid4()
+CREATED = datetime(2025, 4, 7, 10, tzinfo=timezone.utc)
+
+Row = namedtuple("Row", ["response_id", "response", "token_count", "content_ref"])
+
+
+def _sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_schema_rejects_unknown_columns():
+    """Test that only known columns can be exported."""
+    assert export.schema(["token_count"]).names == ["token_count"]
+    assert export.schema().names == list(export.COLUMNS)
+    with pytest.raises(ValueError, match="password"):
+        export.schema(["token_count", "password"])
+
+
+def test_export_query_filters_and_loads_refs():
+    """Test that filters apply and content_ref is fetched with the body."""
+    query = export.export_query(
+        ["response_id", "response"],
+        organization_id=ORG,
+        since=CREATED,
+        until=datetime(2025, 4, 8, tzinfo=timezone.utc),
+    )
+    sql = _sql(query)
+
+    assert "responses.content_ref" in sql
+    assert "prompts.organization_id = " in sql
+    assert "responses.created_at >= " in sql
+    assert "prompts.created_at < " in sql
+    assert "content_ref" not in _sql(export.export_query(["token_count"]))
+
+
+def test_record_batches_stream_partitions(monkeypatch):
+    """Test that each fetched partition becomes one batch with bodies loaded."""
+    monkeypatch.setattr(export.response_bodies, "load", lambda ref: f"body of {ref}")
+    first, second = uuid.uuid4(), uuid.uuid4()
+    db = MagicMock()
+    db.execute.return_value.partitions.return_value = iter(
+        [
+            [Row(first, "inline", 3, None)],
+            [Row(second, None, 5, "zstd:abc")],
+        ]
+    )
+
+    batches = list(
+        export.record_batches(
+            db, ["response_id", "response", "token_count"], batch_size=1
+        )
+    )
+
+    options = db.execute.call_args.args[0].get_execution_options()
+    assert options["yield_per"] == 1
+    assert [batch.num_rows for batch in batches] == [1, 1]
+    assert batches[0].to_pylist() == [
+        {"response_id": str(first), "response": "inline", "token_count": 3}
+    ]
+    assert batches[1].column("response").to_pylist() == ["body of zstd:abc"]
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_stream_round_trips(format):
+    """Test that streamed output decodes back to the written rows."""
+    schema = export.schema(["token_count", "created_at"])
+    batches = [
+        pa.RecordBatch.from_pylist(
+            [{"token_count": count, "created_at": CREATED}], schema=schema
+        )
+        for count in (1, 2)
+    ]
+
+    data = b"".join(export.stream(iter(batches), schema, format))
+
+    if format == "parquet":
+        table = pq.read_table(io.BytesIO(data))
+        assert pq.ParquetFile(io.BytesIO(data)).num_row_groups == 2
+    else:
+        table = pa.ipc.open_stream(data).read_all()
+    assert table.column("token_count").to_pylist() == [1, 2]
+    assert table.column("created_at").to_pylist() == [CREATED, CREATED]
@@ -0,0 +1,125 @@
+import random
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.latency_sketch import LatencySketch, LatencySketches, summarize
+
+
+class FakeClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self, now=1_744_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_quantiles_are_within_relative_accuracy():
+    """Test that sketch quantiles stay within 1% of the exact ones."""
+    rng = random.Random(7)
+    values = [rng.lognormvariate(0, 1) for _ in range(10000)]
+    sketch = LatencySketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.95, 0.99):
+        exact = exact_quantile(values, q)
+        assert abs(sketch.quantile(q) - exact) <= 0.0101 * exact
+    assert sketch.quantile(0) == min(values)
+    assert sketch.quantile(1) == max(values)
+    assert LatencySketch().quantile(0.5) is None
+
+
+def test_merge_equals_one_sketch_of_everything():
+    """Test that merged sketches (also after storage) match a combined one."""
+    rng = random.Random(3)
+    first, second, combined = LatencySketch(), LatencySketch(), LatencySketch()
+    for index in range(2000):
+        value = rng.expovariate(2)
+        (first if index % 3 else second).add(value)
+        combined.add(value)
+
+    first.merge(LatencySketch.from_dict(second.to_dict()))
+
+    assert first.buckets == combined.buckets
+    assert first.count == combined.count
+    assert first.quantile(0.99) == combined.quantile(0.99)
+    with pytest.raises(ValueError):
+        first.merge(LatencySketch(relative_accuracy=0.05))
+
+
+def test_pending_rows_cover_changed_buckets_only():
+    """Test that each snapshot carries changed sketches and drops old ones."""
+    clock = FakeClock()
+    sketches = LatencySketches(bucket_seconds=300, clock=clock, worker_id="w1")
+    sketches.record_success("openai", "gpt-4o", 0.4)
+    sketches.record_failure("openai", "gpt-4o")
+
+    (row,) = sketches.pending()
+    assert row["worker_id"] == "w1"
+    assert row["bucket"].timestamp() % 300 == 0
+    assert (row["sample_count"], row["error_count"]) == (1, 1)
+    assert sketches.pending() == []
+
+    clock.now += 300
+    sketches.record_success("openai", "gpt-4o", 0.5)
+    (row,) = sketches.pending()
+    assert row["sample_count"] == 1
+    assert sketches.stats()["sketches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_snapshot_upserts_rows_and_retries_on_failure():
+    """Test that snapshots replace this worker's rows and failed ones are resent."""
+    sketches = LatencySketches(clock=FakeClock(), worker_id="w1")
+    sketches.record_success("anthropic", "", 1.0)
+    db = MagicMock()
+    db.execute = AsyncMock(side_effect=[RuntimeError("down"), None])
+    db.commit = AsyncMock()
+    session_factory = MagicMock()
+    session_factory.return_value.__aenter__.return_value = db
+
+    with pytest.raises(RuntimeError):
+        await sketches.snapshot(session_factory)
+    assert await sketches.snapshot(session_factory) == 1
+
+    statement, rows = db.execute.call_args.args
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (bucket, llm_provider, model, worker_id) DO UPDATE" in sql
+    assert rows[0]["sketch"]["count"] == 1
+    assert sketches.stats()["failed_snapshots"] == 1
+    assert await sketches.snapshot(session_factory) == 0
+
+
+def test_summarize_merges_workers_and_buckets():
+    """Test that stored rows merge into percentiles per provider and model."""
+    rows = []
+    for worker, latencies, errors in (("w1", [0.1, 0.2], 1), ("w2", [0.3], 2)):
+        sketch = LatencySketch()
+        for latency in latencies:
+            sketch.add(latency)
+        rows.append(
+            SimpleNamespace(
+                llm_provider="openai",
+                model="gpt-4o",
+                error_count=errors,
+                sketch=sketch.to_dict(),
+            )
+        )
+
+    (entry,) = summarize(rows)
+
+    assert (entry["count"], entry["error_count"]) == (3, 3)
+    assert entry["mean"] == pytest.approx(0.2)
+    assert entry["p50"] == pytest.approx(0.2, rel=0.01)
+    assert set(entry) >= {"p95", "p99"}
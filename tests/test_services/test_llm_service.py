@@ -1,6 +1,8 @@
+import asyncio
+import httpx
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services.llm_service import LLMService
 from app.models.llm_provider import LLMProvider
@@ -10,7 +12,11 @@ from app.models.prompt import Prompt
 @pytest.fixture
 def mock_db():
     """Fixture to mock the database session."""
-    return MagicMock(spec=Session)
+    db = MagicMock(spec=AsyncSession)
+    db.execute = AsyncMock()
+    db.commit = AsyncMock()
+    db.refresh = AsyncMock()
+    return db
 
 
 @pytest.fixture
@@ -40,13 +46,16 @@ async def test_process_prompt(mock_db, mock_prompt, mock_provider):
     llm_service = LLMService()
 
     with patch(
-        "app.db.crud.llm_provider.get_provider_by_name", return_value=mock_provider
+        "app.services.llm_service.get_provider_by_name",
+        AsyncMock(return_value=mock_provider),
     ):
         llm_service._send_to_provider = AsyncMock(
             return_value=("Test response", {"token_count": 10})
         )
 
-        with patch("app.db.crud.response.create_response") as mock_create_response:
+        with patch(
+            "app.services.llm_service.create_response", AsyncMock()
+        ) as mock_create_response:
             mock_response = MagicMock()
             mock_create_response.return_value = mock_response
 
@@ -81,14 +90,12 @@ async def test_process_openai(mock_provider):
         "usage": {"total_tokens": 10, "prompt_tokens": 5, "completion_tokens": 5},
     }
 
-    with patch("httpx.AsyncClient") as mock_client:
-        mock_client.return_value.__aenter__.return_value.post.return_value = (
-            mock_response
-        )
+    with patch.object(llm_service.clients, "get") as mock_get_client:
+        mock_get_client.return_value.post = AsyncMock(return_value=mock_response)
 
         # Act
         content, metadata = await llm_service._call_openai(
-            mock_provider, "Test prompt", {"model": "gpt-4"}
+            "Test prompt", {"model": "gpt-4"}
         )
 
         # Assert
@@ -99,3 +106,456 @@ async def test_process_openai(mock_provider):
             "prompt_tokens": 5,
             "completion_tokens": 5,
         }
+
+
+@pytest.mark.asyncio
+async def test_provider_clients_are_reused():
+    """Test that each provider gets one long-lived pooled client."""
+    llm_service = LLMService()
+
+    openai_client = llm_service.clients.get("openai")
+    assert llm_service.clients.get("openai") is openai_client
+    assert llm_service.clients.get("anthropic") is not openai_client
+    assert llm_service.pool_stats()["openai"]["open_connections"] == 0
+
+    await llm_service.aclose()
+    assert openai_client.is_closed
+    assert llm_service.pool_stats() == {}
+
+
+@pytest.mark.asyncio
+async def test_stream_openai_yields_deltas():
+    """Test that OpenAI SSE chunks are forwarded as text deltas."""
+    llm_service = LLMService()
+    body = (
+        'data: {"model": "gpt-4", "choices": [{"delta": {"content": "Hel"}}]}\n\n'
+        'data: {"model": "gpt-4", "choices": [{"delta": {"content": "lo"}}]}\n\n'
+        'data: {"model": "gpt-4", "choices": [], "usage": {"total_tokens": 7}}\n\n'
+        "data: [DONE]\n\n"
+    )
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text=body))
+
+    with patch.object(
+        llm_service.clients,
+        "get",
+        return_value=httpx.AsyncClient(transport=transport),
+    ):
+        metadata = {}
+        deltas = [
+            delta
+            async for delta in llm_service._stream_openai(
+                "Test prompt", {"model": "gpt-4"}, metadata
+            )
+        ]
+
+    assert deltas == ["Hel", "lo"]
+    assert metadata == {"model": "gpt-4", "token_count": 7}
+
+
+@pytest.mark.asyncio
+async def test_stream_prompt_persists_once(mock_db, mock_prompt, mock_provider):
+    """Test that a streamed reply is stored once with time-to-first-token."""
+    llm_service = LLMService()
+
+    async def fake_stream(provider_name, prompt_content, parameters, metadata):
+        metadata["token_count"] = 3
+        for delta in ["a", "b", "c"]:
+            yield delta
+
+    llm_service._stream_from_provider = fake_stream
+
+    with patch(
+        "app.services.llm_service.get_provider_by_name", return_value=mock_provider
+    ), patch("app.services.llm_service.create_response") as mock_create_response:
+        events = [
+            event
+            async for event in llm_service.stream_prompt(mock_db, mock_prompt, "openai")
+        ]
+
+    assert [e["text"] for e in events if e["event"] == "delta"] == ["a", "b", "c"]
+    assert events[-1]["event"] == "done"
+    mock_create_response.assert_called_once()
+    _, kwargs = mock_create_response.call_args
+    assert kwargs["content"] == "abc"
+    assert kwargs["token_count"] == 3
+    assert kwargs["time_to_first_token"] <= kwargs["latency"]
+
+
+@pytest.mark.asyncio
+async def test_stream_prompt_records_stats(mock_db, mock_prompt, mock_provider):
+    """Test that streamed calls feed the routing stats and latency sketches."""
+    llm_service = LLMService()
+
+    async def fake_stream(provider_name, prompt_content, parameters, metadata):
+        yield "a"
+        if parameters.get("fail"):
+            raise RuntimeError("upstream error")
+
+    llm_service._stream_from_provider = fake_stream
+
+    with patch(
+        "app.services.llm_service.get_provider_by_name", return_value=mock_provider
+    ), patch("app.services.llm_service.create_response"):
+        async for _ in llm_service.stream_prompt(mock_db, mock_prompt, "openai", {}):
+            pass
+        with pytest.raises(RuntimeError):
+            async for _ in llm_service.stream_prompt(
+                mock_db, mock_prompt, "openai", {"fail": True}
+            ):
+                pass
+
+    (stats,) = llm_service.provider_stats.snapshot()
+    assert (stats["model"], stats["samples"]) == ("gpt-4o", 1)
+    assert stats["error_rate"] == 0.5
+    (row,) = llm_service.latency_sketches.pending()
+    assert (row["sample_count"], row["error_count"]) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_process_prompt_cache_hit(mock_db, mock_prompt, mock_provider):
+    """Test that a repeated deterministic prompt is served from the cache."""
+    llm_service = LLMService()
+    llm_service._send_to_provider = AsyncMock(
+        return_value=("Test response", {"token_count": 10})
+    )
+    mock_prompt.organization_id = None
+    parameters = {"model": "gpt-4", "temperature": 0}
+
+    with patch(
+        "app.services.llm_service.get_provider_by_name", return_value=mock_provider
+    ), patch("app.services.llm_service.create_response") as mock_create_response:
+        await llm_service.process_prompt(mock_db, mock_prompt, "openai", parameters)
+        await llm_service.process_prompt(mock_db, mock_prompt, "openai", parameters)
+
+    llm_service._send_to_provider.assert_called_once()
+    first, second = [call.kwargs for call in mock_create_response.call_args_list]
+    assert first["is_cached"] is False
+    assert second["is_cached"] is True
+    assert second["content"] == "Test response"
+    assert second["token_count"] == 0
+    assert llm_service.cache_stats()["exact"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_coalescing_is_scoped_to_the_key():
+    """Test that only requests with the same coalescing key share a call."""
+    llm_service = LLMService()
+    calls = 0
+
+    async def slow_send(provider_name, prompt_content, parameters):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "Test response", {}
+
+    llm_service._timed_send = slow_send
+    keys = [("org-a", "k"), ("org-a", "k"), ("org-b", "k"), None, None]
+
+    await asyncio.gather(
+        *(
+            llm_service._coalesced_send("openai", "Test", {"temperature": 0}, key)
+            for key in keys
+        )
+    )
+
+    assert calls == 4
+
+
+@pytest.mark.asyncio
+async def test_calls_are_recorded_under_the_effective_model():
+    """Test that stats and latency sketches name the model actually called."""
+    llm_service = LLMService()
+    llm_service._send_to_provider = AsyncMock(return_value=("Test response", {}))
+
+    await llm_service._timed_send("openai", "Test", {})
+    await llm_service._timed_send("openai", "Test", {"model": "gpt-4o-mini"})
+
+    models = sorted(row["model"] for row in llm_service.latency_sketches.pending())
+    assert models == ["gpt-4o", "gpt-4o-mini"]
+    stats = llm_service.provider_stats.snapshot()
+    assert sorted(entry["model"] for entry in stats) == models
+
+
+@pytest.mark.parametrize(
+    "parameters, expected",
+    [
+        (None, 501),
+        ({"max_tokens": 100}, 101),
+        ({"max_tokens": "100"}, 101),
+        ({"max_tokens": None}, 501),
+        ({"max_tokens": "many"}, 501),
+        ({"max_tokens": [1]}, 501),
+    ],
+)
+def test_estimate_tokens_tolerates_malformed_max_tokens(parameters, expected):
+    """Test that a bad max_tokens does not break the rate-limit estimate."""
+    assert LLMService._estimate_tokens("four", parameters) == expected
+
+
+def fan_out_service(delays):
+    """LLMService whose providers answer after ``delays`` (cohere fails)."""
+    llm_service = LLMService()
+
+    async def fake_complete(db, prompt, provider_name, provider, parameters, *args):
+        await asyncio.sleep(delays[provider_name])
+        if provider_name == "cohere":
+            raise ValueError("cohere is down")
+        return {"provider": provider_name}
+
+    llm_service._get_provider = AsyncMock()
+    llm_service._is_cacheable = AsyncMock(return_value=False)
+    llm_service._complete = fake_complete
+    llm_service._save_response = AsyncMock(side_effect=lambda db, p, f: MagicMock())
+    return llm_service
+
+
+@pytest.mark.asyncio
+async def test_fan_out_first_wins_cancels_the_rest(mock_db, mock_prompt):
+    """Test that the first successful provider cancels slower ones."""
+    llm_service = fan_out_service({"openai": 0.01, "anthropic": 10, "cohere": 0})
+
+    results = await llm_service.fan_out_prompt(
+        mock_db, mock_prompt, ["openai", "anthropic", "cohere"], first_wins=True
+    )
+
+    by_provider = {r["llm_provider"]: r for r in results}
+    assert by_provider["openai"]["response"] is not None
+    assert by_provider["anthropic"]["error"] == "cancelled"
+    assert by_provider["cohere"]["error"] == "cohere is down"
+    # Only the winner is stored, after the race, by the calling task
+    llm_service._save_response.assert_awaited_once()
+    assert llm_service._save_response.call_args.args[2] == {"provider": "openai"}
+
+
+@pytest.mark.asyncio
+async def test_fan_out_all_respects_deadline(mock_db, mock_prompt):
+    """Test that compare-all mode returns what finished before the deadline."""
+    llm_service = fan_out_service({"openai": 0, "anthropic": 10})
+
+    results = await llm_service.fan_out_prompt(
+        mock_db, mock_prompt, ["openai", "anthropic"], timeout=0.05
+    )
+
+    assert [r["llm_provider"] for r in results] == ["openai", "anthropic"]
+    assert results[0]["response"] is not None
+    assert results[1]["error"] == "deadline exceeded"
+
+
+def route_service(complete):
+    """LLMService whose provider calls are made by ``complete``."""
+    llm_service = LLMService()
+    llm_service._get_provider = AsyncMock()
+    llm_service._is_cacheable = AsyncMock(return_value=False)
+    llm_service._complete = complete
+    llm_service._save_response = AsyncMock(side_effect=lambda db, p, f: f)
+    return llm_service
+
+
+@pytest.mark.asyncio
+async def test_route_prompt_hedges_slow_provider(mock_db, mock_prompt):
+    """Test that a slow primary is hedged and the faster answer wins."""
+    delays = {"openai": 10, "anthropic": 0}
+    cancelled = []
+
+    async def fake_complete(db, prompt, provider_name, provider, parameters, *args):
+        try:
+            await asyncio.sleep(delays[provider_name])
+        except asyncio.CancelledError:
+            cancelled.append(provider_name)
+            raise
+        return {"provider": provider_name}
+
+    llm_service = route_service(fake_complete)
+    # Calls without a model are recorded under the provider's default model
+    for _ in range(5):
+        llm_service.provider_stats.record_success("openai", "gpt-4o", 0.01)
+        llm_service.provider_stats.record_success(
+            "anthropic", "claude-3-opus-20240229", 0.02
+        )
+
+    response, provider_name = await llm_service.route_prompt(
+        mock_db, mock_prompt, ["anthropic", "openai"]
+    )
+
+    assert provider_name == "anthropic"
+    assert cancelled == ["openai"]
+    # Only the winner is stored, after the race, by the calling task
+    llm_service._save_response.assert_awaited_once()
+    assert response == {"provider": "anthropic"}
+
+
+@pytest.mark.asyncio
+async def test_route_prompt_fails_over(mock_db, mock_prompt):
+    """Test that a failing provider falls through to the next candidate."""
+    calls = []
+
+    async def fake_complete(db, prompt, provider_name, provider, parameters, *args):
+        calls.append((provider_name, parameters.get("model")))
+        if provider_name == "openai":
+            raise ValueError("openai is down")
+        return {"provider": provider_name}
+
+    llm_service = route_service(fake_complete)
+
+    _, provider_name = await llm_service.route_prompt(
+        mock_db, mock_prompt, ["openai:gpt-4o", "cohere"], hedge=False
+    )
+
+    assert provider_name == "cohere"
+    assert calls == [("openai", "gpt-4o"), ("cohere", None)]
+
+
+@pytest.mark.asyncio
+async def test_route_prompt_hedges_on_the_running_candidates_p95(mock_db, mock_prompt):
+    """Test that after a failover the hedge waits on the new candidate's p95."""
+    delays = {"openai": 0, "anthropic": 10, "cohere": 0}
+
+    async def fake_complete(db, prompt, provider_name, provider, parameters, *args):
+        await asyncio.sleep(delays[provider_name])
+        if provider_name == "openai":
+            raise ValueError("openai is down")
+        return {"provider": provider_name}
+
+    llm_service = route_service(fake_complete)
+    llm_service.provider_stats.rank = list
+    p95 = {"openai": 10, "anthropic": 0.01, "cohere": 0.01}
+    llm_service._hedge_delay = lambda candidate: p95[candidate[0]]
+
+    _, provider_name = await asyncio.wait_for(
+        llm_service.route_prompt(
+            mock_db, mock_prompt, ["openai", "anthropic", "cohere"]
+        ),
+        1,
+    )
+
+    assert provider_name == "cohere"
+
+
+@pytest.mark.asyncio
+async def test_route_prompt_keeps_requested_model_to_first_entry(mock_db, mock_prompt):
+    """Test that the requested model is not sent to other providers."""
+    calls = []
+
+    async def fake_complete(db, prompt, provider_name, provider, parameters, *args):
+        calls.append((provider_name, parameters.get("model")))
+        raise ValueError(f"{provider_name} is down")
+
+    llm_service = route_service(fake_complete)
+
+    with pytest.raises(ValueError):
+        await llm_service.route_prompt(
+            mock_db,
+            mock_prompt,
+            ["openai", "anthropic", "cohere:command-r"],
+            parameters={"model": "gpt-4o-mini"},
+            hedge=False,
+        )
+
+    assert sorted(calls) == [
+        ("anthropic", None),
+        ("cohere", "command-r"),
+        ("openai", "gpt-4o-mini"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_throttled_provider_slows_down():
+    """Test that a 429 with Retry-After lowers the provider's request rate."""
+    llm_service = LLMService()
+    llm_service.rate_limiters.configure("openai", {"requests_per_minute": 600})
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(429, headers={"Retry-After": "2"})
+    )
+
+    with patch.object(
+        llm_service.clients,
+        "get",
+        return_value=httpx.AsyncClient(transport=transport),
+    ):
+        with pytest.raises(httpx.HTTPStatusError):
+            await llm_service._call_openai("Test prompt", {})
+
+    requests = llm_service.rate_limit_stats()[0]["requests"]
+    assert requests["rate_per_minute"] == pytest.approx(300)
+    assert requests["paused_for"] > 1
+
+
+@pytest.mark.asyncio
+async def test_fallback_chain_skips_open_circuit(mock_db, mock_prompt):
+    """Test that an open circuit fails fast and the next fallback answers."""
+    llm_service = LLMService()
+    breaker = llm_service.circuit_breakers.get("anthropic")
+    for _ in range(breaker.min_calls):
+        breaker.before_call()
+        breaker.record_failure()
+    sent = []
+
+    async def fake_send(provider_name, prompt_content, parameters):
+        sent.append((provider_name, parameters.get("model")))
+        return "answer", {"model": "", "token_count": 1}
+
+    mock_prompt.organization_id = None
+    with patch("app.services.llm_service.get_provider_by_name") as get_provider:
+        get_provider.return_value = MagicMock(spec=LLMProvider, id=1, config={})
+        with patch("app.services.llm_service.create_response"):
+            llm_service._send_to_provider = fake_send
+            _, provider_name = await llm_service.process_prompt_with_fallback(
+                mock_db,
+                mock_prompt,
+                "anthropic",
+                {"model": "claude-3-haiku", "temperature": 0.7},
+                fallback_providers=["openai:gpt-4o-mini", "cohere"],
+            )
+
+    assert provider_name == "openai"
+    assert sent == [("openai", "gpt-4o-mini")]
+    assert llm_service.circuit_breaker_stats()[0]["state"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_process_prompt_batch(mock_db, mock_provider):
+    """Test that a batch runs with bounded concurrency and is saved in one go."""
+    llm_service = LLMService()
+    running = peak = 0
+
+    async def fake_send(provider_name, prompt_content, parameters):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if prompt_content == "fail":
+            raise ValueError("provider error")
+        return prompt_content.upper(), {"token_count": 3}
+
+    def fake_get_provider(db, name):
+        return mock_provider if name == "openai" else None
+
+    items = [{"content": f"prompt {i}", "llm_provider": "openai"} for i in range(5)]
+    items += [
+        {"content": "fail", "llm_provider": "openai"},
+        {"content": "x", "llm_provider": "missing"},
+    ]
+
+    llm_service._send_to_provider = fake_send
+    with patch(
+        "app.services.llm_service.get_provider_by_name", side_effect=fake_get_provider
+    ) as get_provider, patch(
+        "app.services.llm_service.save_prompt_batch",
+        side_effect=lambda db, prompts, responses: [
+            MagicMock(**fields) for fields in responses
+        ],
+    ) as save:
+        results = await llm_service.process_prompt_batch(
+            mock_db, items, user_id=1, max_concurrency=2
+        )
+
+    assert peak == 2
+    assert get_provider.call_count == 2  # Once per distinct provider
+    save.assert_called_once()
+    assert len(save.call_args.kwargs["prompts"]) == 7
+    assert [r["response"].content for r in results[:5]] == [
+        f"PROMPT {i}" for i in range(5)
+    ]
+    assert results[5]["error"] == "provider error"
+    assert results[6]["error"] == "LLM provider 'missing' not found"
@@ -0,0 +1,39 @@
+from app.services.provider_stats import ProviderStats
+
+
+def test_percentiles_need_min_samples():
+    """Test that percentiles are only reported once enough calls succeeded."""
+    stats = ProviderStats(min_samples=3)
+    stats.record_success("openai", "gpt-4", 1.0)
+    stats.record_success("openai", "gpt-4", 2.0)
+    assert stats.percentile("openai", "gpt-4", 0.95) is None
+
+    stats.record_success("openai", "gpt-4", 3.0)
+    assert stats.percentile("openai", "gpt-4", 0.5) == 2.0
+    assert stats.percentile("openai", "gpt-4", 0.95) == 3.0
+
+
+def test_window_only_keeps_recent_calls():
+    """Test that old samples fall out of the rolling window."""
+    stats = ProviderStats(window_size=3, min_samples=1)
+    for latency in [10.0, 10.0, 10.0, 1.0, 1.0, 1.0]:
+        stats.record_success("openai", "", latency)
+    assert stats.percentile("openai", "", 0.95) == 1.0
+
+
+def test_rank_prefers_fast_healthy_providers():
+    """Test ranking by median latency with unhealthy providers last."""
+    stats = ProviderStats(min_samples=2, max_error_rate=0.5)
+    for _ in range(2):
+        stats.record_success("openai", "", 2.0)
+        stats.record_success("anthropic", "", 1.0)
+        stats.record_success("cohere", "", 0.5)
+        stats.record_failure("cohere", "")
+        stats.record_failure("cohere", "")
+
+    ranked = stats.rank([("openai", ""), ("cohere", ""), ("anthropic", "")])
+    assert ranked == [("anthropic", ""), ("openai", ""), ("cohere", "")]
+    assert not stats.is_healthy("cohere", "")
+
+    # Providers without statistics are tried first to gather samples.
+    assert stats.rank([("openai", ""), ("gemini", "")])[0] == ("gemini", "")
@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.rate_limiter import (
+    AdaptiveTokenBucket,
+    ProviderBusyError,
+    ProviderLimiter,
+    RateLimiterRegistry,
+    parse_retry_after,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_retry_after():
+    """Test that both Retry-After forms are understood."""
+    assert parse_retry_after("12") == 12.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_bucket_backs_off_and_recovers():
+    """Test that a throttle halves the rate and successes restore it gradually."""
+    clock = FakeClock()
+    bucket = AdaptiveTokenBucket(600, clock=clock)  # 10/s
+
+    bucket.throttled(retry_after=5)
+    assert bucket.rate == pytest.approx(5.0)
+    assert bucket.stats()["paused_for"] == pytest.approx(5.0)
+
+    # No refill while paused
+    clock.now += 5
+    assert bucket.stats()["available"] == pytest.approx(0.0)
+    clock.now += 1
+    assert bucket.stats()["available"] == pytest.approx(5.0)
+
+    for _ in range(9):
+        bucket.succeeded()
+    assert bucket.rate < bucket.max_rate
+    bucket.succeeded()
+    assert bucket.rate == pytest.approx(bucket.max_rate)
+
+
+@pytest.mark.asyncio
+async def test_bucket_refuses_past_deadline():
+    """Test that a caller who cannot be served by its deadline is not queued."""
+    bucket = AdaptiveTokenBucket(60, burst_seconds=1)  # 1/s, capacity 1
+
+    await bucket.acquire(1, time.monotonic() + 1)
+    with pytest.raises(asyncio.TimeoutError):
+        await bucket.acquire(1, time.monotonic() + 0.1)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_queues_callers():
+    """Test that callers beyond max_concurrency wait for a free slot."""
+    limiter = ProviderLimiter("openai", {"max_concurrency": 2})
+    running = peak = 0
+
+    async def call():
+        nonlocal running, peak
+        async with limiter.slot("", 10):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(call() for _ in range(6)))
+
+    assert peak == 2
+    assert limiter.stats()["in_use"] == 0
+
+
+@pytest.mark.asyncio
+async def test_model_limit_and_bounded_wait():
+    """Test that a per-model limit applies and waiting is bounded."""
+    limiter = ProviderLimiter(
+        "openai",
+        {"model_max_concurrency": {"gpt-4o": 1}, "max_queue_wait": 0.05},
+    )
+
+    async with limiter.slot("gpt-4o", 10):
+        # Other models are not affected by the gpt-4o limit
+        async with limiter.slot("gpt-4o-mini", 10):
+            pass
+        with pytest.raises(ProviderBusyError):
+            async with limiter.slot("gpt-4o", 10):
+                pass
+
+    assert limiter.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_wait_releases_slots():
+    """Test that a caller cancelled while queueing gives back what it held."""
+    limiter = ProviderLimiter(
+        "openai", {"max_concurrency": 2, "model_max_concurrency": {"gpt-4o": 1}}
+    )
+
+    async with limiter.slot("gpt-4o", 10):
+        # Takes a provider slot, then queues for the model slot
+        waiter = asyncio.create_task(limiter.slot("gpt-4o", 10).__aenter__())
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["in_use"] == 2
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    assert limiter.stats()["in_use"] == 0
+    assert limiter.waiting == 0
+
+
+def test_registry_rebuilds_on_config_change():
+    """Test that limiters are reused until the provider config changes."""
+    registry = RateLimiterRegistry()
+    registry.configure("openai", {"max_concurrency": 4, "api_key": "a"})
+    limiter = registry.get("openai")
+
+    registry.configure("openai", {"max_concurrency": 4, "api_key": "b"})
+    assert registry.get("openai") is limiter
+
+    registry.configure("openai", {"max_concurrency": 8})
+    assert registry.get("openai") is not limiter
+    assert registry.get("openai").stats()["max_concurrency"] == 8
@@ -0,0 +1,74 @@
+import pytest
+
+from app.services.response_cache import TTLCache, is_deterministic, make_cache_key
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_key_normalizes_parameters():
+    """Test that equivalent requests share one cache key."""
+    key = make_cache_key("openai", "What is AI?", {"model": "gpt-4", "temperature": 0})
+    assert key == make_cache_key(
+        "OpenAI", "What is AI?", {"temperature": 0.0, "model": "gpt-4", "top_p": None}
+    )
+    assert key != make_cache_key(
+        "openai", "What is AI?", {"model": "gpt-4o", "temperature": 0}
+    )
+    assert key != make_cache_key("anthropic", "What is AI?", {"temperature": 0})
+
+
+@pytest.mark.parametrize(
+    "parameters, expected",
+    [
+        ({"temperature": 0}, True),
+        ({"temperature": 0.0, "model": "gpt-4"}, True),
+        ({"temperature": 0.7}, False),
+        ({}, False),
+        (None, False),
+        ({"temperature": "cold"}, False),
+        ({"temperature": [0]}, False),
+    ],
+)
+def test_is_deterministic(parameters, expected):
+    """Test that only temperature 0 requests are cacheable."""
+    assert is_deterministic(parameters) is expected
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    """Test that entries expire after the TTL and count as misses."""
+    clock = FakeClock()
+    cache = TTLCache(max_entries=10, ttl_seconds=30, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 29
+    assert cache.get("a") == 1
+    clock.now = 30
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["expirations"] == 1
+    assert stats["entries"] == 0
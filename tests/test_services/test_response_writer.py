@@ -0,0 +1,260 @@
+import asyncio
+import uuid
+
+import pytest
+from unittest.mock import MagicMock
+
+from app.db.blob_store import LocalBlobStore, ResponseBodyStore
+from app.services.llm_service import LLMService
+from app.services.response_writer import ResponseWriteBuffer
+
+
+class FakeDatabase:
+    """Session factory that records inserted batches and can be taken down."""
+
+    def __init__(self):
+        self.batches = []
+        self.available = True
+        self.commits_left = None  # Goes down after this many more commits
+        self.rejected = set()  # Contents the database refuses
+
+    def __call__(self):
+        return FakeSession(self)
+
+
+class FakeSession:
+    def __init__(self, database):
+        self.database = database
+        self.pending = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement, rows):
+        if not self.database.available or self.database.commits_left == 0:
+            raise ConnectionError("database unavailable")
+        if any(row["content"] in self.database.rejected for row in rows):
+            raise ValueError("invalid row")
+        self.pending = list(rows)
+
+    async def commit(self):
+        self.database.batches.append(self.pending)
+        if self.database.commits_left is not None:
+            self.database.commits_left -= 1
+
+
+def fields(n=0):
+    return {
+        "prompt_id": uuid.uuid4(),
+        "llm_provider_id": uuid.uuid4(),
+        "content": f"response {n}",
+        "metadata": {"model": "gpt-4o"},
+        "latency": 0.5,
+        "token_count": 10,
+    }
+
+
+@pytest.fixture
+def database():
+    return FakeDatabase()
+
+
+@pytest.fixture
+def writer(database, tmp_path):
+    return ResponseWriteBuffer(
+        database,
+        batch_size=10,
+        flush_interval=0.05,
+        max_queue=100,
+        spill_path=str(tmp_path / "spill.jsonl"),
+    )
+
+
+@pytest.mark.asyncio
+async def test_submit_returns_before_insert_and_flushes_in_batches(writer, database):
+    """Test that rows are queued, then inserted together by the flusher."""
+    await writer.start()
+    responses = [await writer.submit(fields(n)) for n in range(25)]
+
+    assert database.batches == []
+    assert all(response.id is not None for response in responses)
+
+    await asyncio.sleep(0.2)
+    assert [len(batch) for batch in database.batches] == [10, 10, 5]
+    assert database.batches[0][0]["id"] == responses[0].id
+    await writer.stop()
+    assert writer.stats()["written"] == 25
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_queued_rows(writer, database):
+    """Test that nothing queued is lost when the writer is stopped."""
+    await writer.start()
+    for n in range(15):
+        await writer.submit(fields(n))
+
+    await writer.stop()
+    assert sum(len(batch) for batch in database.batches) == 15
+    assert writer.stats()["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_on_insert_runs_before_commit(database, tmp_path):
+    """Test that derived writes join each batch's transaction."""
+    seen = []
+
+    async def on_insert(db, rows):
+        seen.append((len(rows), len(database.batches)))
+
+    writer = ResponseWriteBuffer(
+        database, spill_path=str(tmp_path / "spill.jsonl"), on_insert=on_insert
+    )
+    await writer.start()
+    for n in range(3):
+        await writer.submit(fields(n))
+    await writer.stop()
+
+    assert seen == [(3, 0)]  # All rows, before the batch was committed
+
+
+@pytest.mark.asyncio
+async def test_submit_waits_when_queue_is_full(database, tmp_path):
+    """Test that a full queue applies backpressure instead of growing."""
+    writer = ResponseWriteBuffer(
+        database, max_queue=2, spill_path=str(tmp_path / "spill.jsonl")
+    )
+    await writer.submit(fields())
+    await writer.submit(fields())
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(writer.submit(fields()), 0.05)
+
+    await writer.start()
+    await asyncio.wait_for(writer.submit(fields()), 1.0)
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_spill_to_disk_and_replay(writer, database):
+    """Test that rows survive a database outage and are inserted later."""
+    database.available = False
+    await writer.start()
+    submitted = [await writer.submit(fields(n)) for n in range(3)]
+    await writer.stop()
+
+    stats = writer.stats()
+    assert stats["spilled"] == 3
+    assert stats["spill_pending"] is True
+    assert database.batches == []
+
+    database.available = True
+    await writer.start()
+    await writer.stop()
+
+    assert writer.stats()["replayed"] == 3
+    assert writer.stats()["spill_pending"] is False
+    replayed = database.batches[0]
+    assert [row["id"] for row in replayed] == [r.id for r in submitted]
+    assert isinstance(replayed[0]["prompt_id"], uuid.UUID)
+    assert replayed[0]["metadata"] == {"model": "gpt-4o"}
+
+
+@pytest.mark.asyncio
+async def test_rows_of_a_batch_set_the_same_columns(writer, database):
+    """Test that columns only some rows set are filled in for the others."""
+    await writer.start()
+    await writer.submit(fields(0))
+    await writer.submit({**fields(1), "time_to_first_token": 0.1})
+    await writer.submit({**fields(2), "content": None, "content_ref": "zstd:ab"})
+    await writer.stop()
+
+    (batch,) = database.batches
+    assert len({frozenset(row) for row in batch}) == 1
+    assert batch[0]["time_to_first_token"] is None
+    assert batch[0]["content_ref"] is None
+    assert batch[0]["is_cached"] is False
+    assert batch[1]["time_to_first_token"] == 0.1
+    assert batch[2]["content_ref"] == "zstd:ab"
+
+
+async def spill(writer, database, rows):
+    """Spill ``rows`` through a writer whose database is down."""
+    database.available = False
+    await writer.start()
+    submitted = [await writer.submit(row) for row in rows]
+    await writer.stop()
+    database.available = True
+    return submitted
+
+
+@pytest.mark.asyncio
+async def test_interrupted_replay_does_not_insert_rows_twice(
+    writer, database, tmp_path
+):
+    """Test that a replay resumes after the batches it already committed."""
+    await spill(writer, database, [fields(n) for n in range(25)])
+
+    database.commits_left = 1
+    await writer.start()
+    await writer.stop()
+    assert sum(len(batch) for batch in database.batches) == 10
+
+    database.commits_left = None
+    await writer.start()
+    await writer.stop()
+
+    ids = [row["id"] for batch in database.batches for row in batch]
+    assert len(ids) == len(set(ids)) == 25
+    assert not (tmp_path / "spill.jsonl.replay").exists()
+
+
+@pytest.mark.asyncio
+async def test_rows_that_keep_failing_are_dead_lettered(writer, database, tmp_path):
+    """Test that one bad row does not block the rest of the spill."""
+    rows = [fields(n) for n in range(5)]
+    await spill(writer, database, rows)
+    database.rejected.add("response 2")
+
+    await writer.start()
+    await writer.stop()
+    replayed = [row["content"] for batch in database.batches for row in batch]
+    assert sorted(replayed) == ["response 0", "response 1", "response 3", "response 4"]
+    assert writer.stats()["spill_pending"] is True  # The bad row, to retry
+
+    for _ in range(writer.max_replay_attempts - 1):
+        await writer.start()
+        await writer.stop()
+
+    stats = writer.stats()
+    assert stats["dead_lettered"] == 1
+    assert stats["spill_pending"] is False
+    assert "response 2" in (tmp_path / "spill.jsonl.dead").read_text()
+
+
+@pytest.mark.asyncio
+async def test_offloaded_and_inline_bodies_share_a_batch(
+    writer, database, tmp_path, monkeypatch
+):
+    """Test that saved responses keep the same columns whether offloaded or not."""
+    bodies = ResponseBodyStore(
+        LocalBlobStore(str(tmp_path / "blobs")), enabled=True, threshold=64
+    )
+    monkeypatch.setattr("app.services.llm_service.response_bodies", bodies)
+    llm_service = LLMService()
+    llm_service.response_writer = writer
+
+    await writer.start()
+    for content in ("short", "long " * 100, "short again"):
+        await llm_service._save_response(
+            MagicMock(), MagicMock(), {**fields(), "content": content}
+        )
+    await writer.stop()
+
+    (batch,) = database.batches
+    assert len({frozenset(row) for row in batch}) == 1
+    assert [row["content_ref"] is None for row in batch] == [True, False, True]
+    assert batch[1]["content"] is None
+    assert bodies.load(batch[1]["content_ref"]) == "long " * 100
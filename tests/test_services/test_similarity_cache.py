@@ -0,0 +1,75 @@
+from app.services.similarity_cache import SimilarityIndex, shingle
+
+PROMPT = (
+    "Summarize the quarterly revenue report for the sales team and highlight "
+    "the three regions with the largest growth compared to last year"
+)
+
+
+def test_shingle_ignores_case_punctuation_and_whitespace():
+    """Test that formatting-only differences produce identical shingles."""
+    assert shingle("What is  AI?") == shingle("what is ai")
+    assert shingle("Hi") == {"hi"}
+
+
+def test_near_duplicate_prompt_matches():
+    """Test that a reformatted prompt with a trailing sentence is a hit."""
+    index = SimilarityIndex()
+    index.add("openai", index.signature(PROMPT), "stored response")
+
+    variant = PROMPT.upper().replace(" ", "   ") + ". Keep it short."
+    match = index.query("openai", index.signature(variant), threshold=0.7)
+
+    assert match is not None
+    value, similarity = match
+    assert value == "stored response"
+    assert 0.7 <= similarity < 1.0
+
+
+def test_unrelated_prompt_and_other_namespace_miss():
+    """Test that dissimilar prompts and other namespaces never match."""
+    index = SimilarityIndex()
+    signature = index.signature(PROMPT)
+    index.add("openai", signature, "stored response")
+
+    other = index.signature("Write a haiku about autumn leaves falling in the rain")
+    assert index.query("openai", other, threshold=0.5) is None
+    assert index.query("anthropic", signature, threshold=0.5) is None
+    assert index.stats()["misses"] == 2
+
+
+def test_index_is_bounded():
+    """Test that the oldest entries are evicted beyond max_entries."""
+    index = SimilarityIndex(max_entries=2)
+    prompts = [f"prompt number {i} about a distinct topic {i}" for i in range(3)]
+    for i, prompt in enumerate(prompts):
+        index.add("openai", index.signature(prompt), i)
+
+    assert len(index) == 2
+    assert index.query("openai", index.signature(prompts[0]), 0.99) is None
+    assert index.query("openai", index.signature(prompts[2]), 0.99) == (2, 1.0)
+    assert index.stats()["evictions"] == 1
+
+
+def test_prompts_without_words_are_not_indexed():
+    """Test that punctuation-only prompts get no signature to match on."""
+    index = SimilarityIndex()
+
+    assert shingle("?!  ...") == set()
+    assert index.signature("?!  ...") is None
+    assert index.signature("   ") is None
+
+
+def test_entries_expire_after_ttl():
+    """Test that an expired entry is dropped instead of matched."""
+    now = [0.0]
+    index = SimilarityIndex(ttl_seconds=10, clock=lambda: now[0])
+    signature = index.signature(PROMPT)
+    index.add("openai", signature, "stored response")
+
+    now[0] = 9
+    assert index.query("openai", signature, threshold=0.9) is not None
+    now[0] = 10
+    assert index.query("openai", signature, threshold=0.9) is None
+    assert len(index) == 0
+    assert index.stats()["expirations"] == 1
@@ -0,0 +1,141 @@
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.usage_rollup import NO_ID, UsageRollupDaily, UsageRollupHourly
+from app.services.analytics_service import AnalyticsService
+from app.services.usage_rollups import aggregate, rebuild, record_usage
+
+USER = uuid.uuid4()
+ORG = uuid.uuid4()
+PROVIDER = uuid.uuid4()
+
+
+def response(prompt_id, minute=0, hour=10, **fields):
+    return {
+        "prompt_id": prompt_id,
+        "llm_provider_id": PROVIDER,
+        "metadata": {"model": "gpt-4o"},
+        "created_at": datetime(2025, 4, 7, hour, minute, tzinfo=timezone.utc),
+        "latency": 0.5,
+        "token_count": 10,
+        **fields,
+    }
+
+
+def _sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_aggregate_sums_per_bucket_and_key():
+    """Test that responses are summed per hour/day, provider, model and owner."""
+    prompt_id = uuid.uuid4()
+    rows = [
+        response(prompt_id, minute=5),
+        response(prompt_id, minute=55, is_cached=True, token_count=0),
+        response(prompt_id, hour=11),
+    ]
+    owners = {prompt_id: (USER, ORG)}
+
+    hourly = aggregate(rows, owners, "hour")
+    daily = aggregate(rows, owners, "day")
+
+    assert [entry["prompt_count"] for entry in hourly] == [2, 1]
+    assert hourly[0]["bucket"] == datetime(2025, 4, 7, 10, tzinfo=timezone.utc)
+    assert hourly[0]["cached_count"] == 1
+    assert hourly[0]["token_count"] == 10
+    assert hourly[0]["latency_sum"] == 1.0
+    assert len(daily) == 1
+    assert daily[0]["bucket"] == datetime(2025, 4, 7, tzinfo=timezone.utc)
+    assert daily[0]["prompt_count"] == 3
+    assert (daily[0]["user_id"], daily[0]["organization_id"]) == (USER, ORG)
+    assert daily[0]["model"] == "gpt-4o"
+
+
+def test_aggregate_fills_missing_keys():
+    """Test that missing organization, provider and model get placeholder keys."""
+    prompt_id, orphan = uuid.uuid4(), uuid.uuid4()
+    rows = [
+        response(prompt_id, llm_provider_id=None, metadata={}),
+        response(orphan),
+    ]
+
+    (entry,) = aggregate(rows, {prompt_id: (USER, None)}, "day")
+
+    assert entry["organization_id"] == NO_ID
+    assert entry["llm_provider_id"] == NO_ID
+    assert entry["model"] == ""
+
+
+@pytest.mark.asyncio
+async def test_record_usage_upserts_both_rollups():
+    """Test that usage is added to existing totals with one upsert per table."""
+    db = MagicMock()
+    db.execute = AsyncMock()
+    prompt_id = uuid.uuid4()
+
+    await record_usage(db, [response(prompt_id)], {prompt_id: (USER, ORG)})
+
+    assert db.execute.await_count == 2
+    hourly_sql = _sql(db.execute.call_args_list[0].args[0])
+    assert "INSERT INTO usage_rollups_hourly" in hourly_sql
+    assert (
+        "ON CONFLICT (bucket, organization_id, user_id, llm_provider_id, model)"
+        in hourly_sql
+    )
+    assert (
+        "prompt_count = (usage_rollups_hourly.prompt_count + excluded.prompt_count)"
+        in hourly_sql
+    )
+    assert "usage_rollups_daily" in _sql(db.execute.call_args_list[1].args[0])
+
+
+@pytest.mark.asyncio
+async def test_record_usage_looks_up_unknown_prompts():
+    """Test that owners missing from the mapping are fetched in one query."""
+    prompt_id = uuid.uuid4()
+    db = MagicMock()
+    db.execute = AsyncMock(side_effect=[[(prompt_id, USER, ORG)], None, None])
+
+    await record_usage(db, [response(prompt_id), response(prompt_id)])
+
+    assert db.execute.await_count == 3
+    assert "FROM prompts" in _sql(db.execute.call_args_list[0].args[0])
+    entries = db.execute.call_args_list[1].args[1]
+    assert entries[0]["user_id"] == USER
+    assert entries[0]["prompt_count"] == 2
+
+
+def test_rebuild_covers_whole_days():
+    """Test that a rebuild replaces rollups for whole UTC days from responses."""
+    connection = MagicMock()
+    connection.execute.return_value.rowcount = 4
+
+    written = rebuild(
+        connection,
+        since=datetime(2025, 4, 7, 15, tzinfo=timezone.utc),
+        until=datetime(2025, 4, 8, 1, tzinfo=timezone.utc),
+    )
+
+    assert written == {"usage_rollups_hourly": 4, "usage_rollups_daily": 4}
+    statements = [call.args[0] for call in connection.execute.call_args_list]
+    # Not bound by the app engine's statement_timeout
+    assert str(statements[0]) == "SET LOCAL statement_timeout = 0"
+    assert _sql(statements[1]).startswith("DELETE FROM usage_rollups_hourly")
+    params = statements[2].compile(dialect=postgresql.dialect()).params
+    assert datetime(2025, 4, 7, tzinfo=timezone.utc) in params.values()
+    assert datetime(2025, 4, 9, tzinfo=timezone.utc) in params.values()
+    assert "GROUP BY date_trunc(" in _sql(statements[2])
+
+
+def test_reports_pick_the_coarsest_rollup():
+    """Test that whole-day ranges read daily rollups and others hourly ones."""
+    day = datetime(2025, 4, 7, tzinfo=timezone.utc)
+    hour = datetime(2025, 4, 7, 13, tzinfo=timezone.utc)
+
+    assert AnalyticsService._rollup(None, None) is UsageRollupDaily
+    assert AnalyticsService._rollup(day, None) is UsageRollupDaily
+    assert AnalyticsService._rollup(day, hour) is UsageRollupHourly